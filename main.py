@@ -6,15 +6,45 @@ import subprocess
 import json
 import shlex
 import re 
+import csv
+import shutil
+import codecs
+import collections
+import copy
+import fcntl
+import tempfile
+import argparse
+import threading
+import time
+import statistics
+import io
+import lzma
+import tarfile
+import heapq
+import zlib
+import hashlib
+import math
+import base64
+import mmap
+import concurrent.futures
+import functools
+import platform
+import zipfile
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QLabel, QLineEdit, QPushButton,
     QListWidget, QListWidgetItem, QWidget, QHBoxLayout,
     QMessageBox, QStackedWidget, QToolButton, QInputDialog, QDialog,
     QComboBox, QDialogButtonBox, QFileDialog, QScrollArea, QSizePolicy,
-    QTabWidget, QTextEdit
+    QTabWidget, QTextEdit, QTreeWidget, QTreeWidgetItem, QSplitter,
+    QSpinBox, QCheckBox, QProgressDialog, QTableWidget, QTableWidgetItem, QPlainTextEdit, QHeaderView, QAbstractItemView, QMenu
+)
+from PySide6.QtGui import QIcon, QColor, QTextCursor, QPainter, QShortcut, QKeySequence
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+from PySide6.QtCore import (
+    Qt, QSize, QTranslator, QCoreApplication, QObject, QDir,
+    QProcess, QProcessEnvironment, QElapsedTimer, QEvent, QTimer,
+    QFileSystemWatcher, Signal, QThread, QRectF, QPoint
 )
-from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt, QSize, QTranslator, QCoreApplication, QObject, QDir
 
 # --- Definición del Tema (Modo Oscuro Fijo) ---
 
@@ -148,6 +178,19 @@ TRANSLATIONS_DIR = os.path.join(BASE_DIR, 'translations')
 CONFIG_BASE_DIR = os.path.expanduser('~/.env-creator-ui').rstrip('/')
 ARCHIVO_REGISTRO = os.path.join(CONFIG_BASE_DIR, 'registro_env.txt')
 ARCHIVO_CONFIG = os.path.join(CONFIG_BASE_DIR, 'config.json')
+ARCHIVO_CACHE_METADATOS = os.path.join(CONFIG_BASE_DIR, 'cache_metadatos.json')
+ARCHIVO_CACHE_TERMINALES = os.path.join(CONFIG_BASE_DIR, 'cache_terminales.json')
+ARCHIVO_USO_ENTORNOS = os.path.join(CONFIG_BASE_DIR, 'uso_entornos.json')
+ARCHIVO_HISTORIAL_ARRANQUE = os.path.join(CONFIG_BASE_DIR, 'historial_arranque.json')
+ARCHIVO_CACHE_DESCUBRIMIENTO = os.path.join(CONFIG_BASE_DIR, 'cache_descubrimiento.json')
+ARCHIVO_ORIGENES_ENTORNOS = os.path.join(CONFIG_BASE_DIR, 'origenes_entornos.json')
+ARCHIVO_BASE_AVISOS = os.path.join(CONFIG_BASE_DIR, 'avisos_seguridad.json')
+ARCHIVO_CACHE_INTERPRETES = os.path.join(CONFIG_BASE_DIR, 'cache_interpretes.json')
+DIRECTORIO_PYTHONS = os.path.join(CONFIG_BASE_DIR, 'pythons')
+DIRECTORIO_WHEELS = os.path.join(CONFIG_BASE_DIR, 'wheels')
+ARCHIVO_CACHE_VERIFICACION = os.path.join(CONFIG_BASE_DIR, 'cache_verificacion.json')
+ARCHIVO_METADATOS_ENTORNOS = os.path.join(CONFIG_BASE_DIR, 'metadatos_entornos.json')
+ARCHIVO_HISTORIAL_PALETA = os.path.join(CONFIG_BASE_DIR, 'historial_paleta.json')
 
 # Lista de rutas comunes de binarios de Python para búsqueda
 COMMON_PYTHON_PATHS = [
@@ -176,7 +219,7 @@ system_terminals = {
     "XTerm": ["/usr/bin/xterm", "/usr/local/bin/xterm"]
 }
 
-# Comandos específicos para cada terminal. Usan {command} como placeholder para 'bash --init-file /tmp/activate_venv.sh'
+# Comandos específicos para cada terminal. Usan {command} como placeholder para 'bash --init-file <script de activación>'
 # La ejecución se maneja en iniciar_entorno_terminal para mayor robustez.
 terminal_commands = {
     "GNOME Terminal": "-- bash -c '{command}'", 
@@ -189,16 +232,750 @@ terminal_commands = {
     "Tilix": "-e '{command}'",
     "Rxvt": "-e '{command}'",
     "XTerm": "-e '{command}'",
+    "WezTerm": "start -- {command}",
+    "Foot": "{command}",
+    "GNOME Console": "-- {command}",
+    "Ptyxis": "-- {command}",
     "Otro": "{custom_command}" 
 }
 
+# Argumentos para reutilizar una instancia ya abierta de la terminal (se añaden antes del comando)
+terminal_reutilizacion = {
+    "Kitty": ["--single-instance"],
+    "Konsole (KDE)": ["--new-tab"],
+}
+
+# Nombres de ejecutable de cada terminal, para buscarlas en $PATH y en los archivos .desktop
+terminal_ejecutables = {
+    nombre: list(dict.fromkeys(os.path.basename(ruta) for ruta in rutas))
+    for nombre, rutas in system_terminals.items()
+}
+terminal_ejecutables.update({
+    "WezTerm": ["wezterm"],
+    "Foot": ["foot"],
+    "GNOME Console": ["kgx"],
+    "Ptyxis": ["ptyxis"],
+})
+
+# IDs de aplicación Flatpak de terminales conocidas
+terminal_flatpak = {
+    "org.wezfurlong.wezterm": "WezTerm",
+    "org.gnome.Console": "GNOME Console",
+    "app.devsuite.Ptyxis": "Ptyxis",
+    "com.gexperts.Tilix": "Tilix",
+}
+
+# --- Catálogo de Cadenas de la Interfaz ---
+
+# Cadenas fuente (español), usadas también como identificadores para los archivos .qm
+CADENAS_FUENTE = {
+    "app_title": "Entornos Virtuales (py)",
+    "create_env": "Crear entorno",
+    "env_name_placeholder": "Nombre del entorno",
+    "delete_selected": "Eliminar seleccionado",
+    "open_directory": "Abrir directorio",
+    "open_terminal": "Abrir terminal",
+    "config_title": "Configuración",
+    "warning": "Advertencia",
+    "success": "Éxito",
+    "select_terminal": "Seleccionar Terminal",
+    "choose_terminal": "Elige una terminal:",
+    "custom_terminal": "Terminal Personalizada",
+    "terminal_name": "Nombre para esta terminal:",
+    "terminal_path": "Ruta del ejecutable:",
+    "custom_command": "Comando personalizado (usa {script} para el script):",
+    "custom_command_full": "Comando personalizado de la terminal (usa {script} para el script de activación):",
+    "executable_not_found": "Ejecutable no encontrado",
+    "continue_anyway": "¿La ruta no existe. Deseas continuar de todos modos?",
+    "missing_fields": "Campos faltantes",
+    "provide_name": "Por favor, proporciona un nombre para el entorno.",
+    "env_created": "Entorno creado correctamente.",
+    "error": "Error",
+    "venv_error": "Error al crear el entorno. Verifica si el módulo 'venv' está instalado. Asegúrate de que el intérprete de Python seleccionado sea válido.",
+    "delete_env": "Eliminar entorno",
+    "confirm_delete_env": "¿Estás seguro de que quieres eliminar el entorno",
+    "about_title": "Acerca de Python Venv Gui",
+    "about_content": "Python Venv Gui v1.2.0\n\nDesarrollado por krafairus\n\nMás información en:\nhttps://github.com/krafairus/py-venv-gui",
+    "about_tooltip": "Ver información de la app",
+    "close": "Cerrar",
+    "restart_for_changes": "Los cambios de idioma requieren reiniciar la aplicación",
+    "terminal_error": "No se pudo abrir la terminal",
+    "select_interpreter": "Seleccionar intérprete de Python",
+    "base_env_directory": "Directorio base de entornos virtuales",
+    "change_button": "Cambiar",
+    "browse_env_dir_title": "Seleccionar Directorio Base para Entornos",
+    "import_envs_button": "Importar entornos existentes",
+    "select_scan_directory": "Seleccionar Directorio para Escanear Entornos",
+    "no_new_envs_found": "No se encontraron nuevos entornos virtuales en el directorio seleccionado.",
+    "added_new_envs": "Se añadieron %d nuevos entornos a la lista.",
+    "invalid_env_dir": "La ruta seleccionada para el directorio de entornos no es válida.",
+    "add_custom_terminal_button": "Añadir Terminal Personalizada",
+    "terminal_added_successfully": "Terminal personalizada añadida correctamente",
+    "select_terminal_executable": "Seleccionar ejecutable de Terminal",
+    "provide_all_custom_terminal_fields": "Por favor, proporciona el nombre, la ruta y el comando de la terminal personalizada.",
+    "import_dialog_explanation": "Selecciona el directorio que deseas escanear. La aplicación buscará subcarpetas que contengan una estructura de entorno virtual (por ejemplo, 'bin/activate') y los añadirá a tu lista.",
+    "select_and_search_button": "Seleccionar directorio y buscar",
+    "diff_envs_title": "Comparar entornos",
+    "compare_button": "Comparar",
+    "matrix_runner_title": "Ejecutar comando en varios entornos",
+    "matrix_missing_fields": "Escribe un comando y marca al menos un entorno.",
+    "run_button": "Ejecutar",
+    "stop_button": "Detener",
+    "console_title": "Consola de entornos",
+    "open_console": "Abrir consola integrada",
+    "clear_button": "Limpiar",
+    "fastest_terminal": "más rápida",
+    "reuse_terminal_instance": "Reutilizar la terminal ya abierta cuando sea posible",
+    "open_terminal_tooltip": "Abrir terminal (Mayús para elegir otra terminal)",
+    "general_tab": "General",
+    "language": "Idioma",
+    "custom_terminals": "Terminales personalizadas",
+    "delete_selected_terminal": "Eliminar seleccionada",
+    "env_info_tooltip": "Información del entorno",
+    "env_info_title": "Información del Entorno",
+    "basic_tab": "Básica",
+    "libraries_tab": "Librerías",
+    "basic_info_header": "Información Básica del Entorno Virtual",
+    "name_label": "Nombre",
+    "path_label": "Ruta",
+    "directory_info": "Información del Directorio",
+    "created_label": "Creado",
+    "modified_label": "Modificado",
+    "size_label": "Tamaño",
+    "python_version_label": "Versión de Python",
+    "platform_label": "Plataforma",
+    "implementation_label": "Implementación",
+    "python_info_error": "Error al obtener información de Python",
+    "installed_libraries": "Librerías Instaladas",
+    "no_libraries_found": "No se encontraron librerías instaladas.",
+    "libraries_list_error": "Error al obtener la lista de librerías",
+    "pip_run_error": "Error al ejecutar pip",
+    "pip_not_found": "No se pudo encontrar el ejecutable de pip en el entorno virtual.",
+    "export_env_title": "Exportar entorno",
+    "export_destination": "Archivo de destino",
+    "skip_pycache": "Omitir directorios __pycache__",
+    "export_error": "No se pudo exportar el entorno",
+    "export_done": "Entorno exportado en",
+    "import_from_archive_button": "Importar desde archivo (.tar.zst / .tar.xz)",
+    "import_error": "No se pudo importar el entorno",
+    "import_done": "Entorno importado en",
+    "import_missing_interpreter": "Aviso: el intérprete base del entorno no existe en este equipo. Instálalo o recrea el entorno. Ruta original:",
+    "browse": "Buscar",
+    "relocate_env_title": "Mover o renombrar entorno",
+    "relocate_target_exists": "El destino ya existe",
+    "relocate_error": "No se pudo mover el entorno",
+    "relocate_done": "Entorno movido a",
+    "disk_tab": "Espacio",
+    "package_column": "Paquete",
+    "version_column": "Versión",
+    "environment_column": "Entorno",
+    "largest_packages_title": "Paquetes más grandes en todos los entornos",
+    "cleanup_title": "Limpieza de entornos",
+    "cleanup_unused_days": "Sin uso durante (días):",
+    "cleanup_size_budget": "Tamaño máximo total:",
+    "cleanup_evaluate": "Evaluar",
+    "cleanup_last_used": "Último uso",
+    "cleanup_reason": "Motivo",
+    "cleanup_reason_unused": "Sin uso",
+    "cleanup_reason_budget": "Supera el límite de tamaño",
+    "cleanup_delete_checked": "Eliminar marcados",
+    "cleanup_confirm": "¿Eliminar los entornos marcados?",
+    "env_deleted": "Entorno eliminado correctamente",
+    "env_delete_error": "No se pudo eliminar el entorno",
+    "optimize_env_title": "Optimizar bytecode",
+    "optimize_precompile": "Precompilar site-packages (todos los núcleos)",
+    "optimize_prune_pycache": "Eliminar .pyc huérfanos o de otras versiones de Python",
+    "optimize_strip_tests": "Eliminar directorios de tests y documentación",
+    "optimize_measure_imports": "Medir el tiempo de importación antes y después",
+    "optimize_done": "Optimización completada",
+    "optimize_error": "No se pudo optimizar el entorno",
+    "optimize_size": "Tamaño",
+    "optimize_import_time": "Importación de paquetes",
+    "optimize_pyc_removed": ".pyc eliminados",
+    "precompile_after_create": "Precompilar bytecode al crear o importar un entorno",
+    "startup_tab": "Arranque",
+    "startup_modules_placeholder": "Paquetes a importar (vacío = python -c pass)",
+    "startup_run": "Medir",
+    "startup_running": "Midiendo...",
+    "startup_module": "Módulo",
+    "startup_self_ms": "Propio (ms)",
+    "startup_cumulative_ms": "Acumulado (ms)",
+    "startup_date": "Fecha",
+    "startup_target": "Objetivo",
+    "startup_median": "Mediana",
+    "startup_changes": "Cambios desde la anterior",
+    "in_use_by": "En uso por",
+    "processes_label": "procesos",
+    "env_in_use_warning": "Hay procesos usando este entorno. ¿Eliminarlo de todos modos?",
+    "discover_tools_button": "Descubrir entornos de herramientas (pyenv, poetry, conda...)",
+    "auto_discover_envs": "Descubrir entornos de herramientas al iniciar",
+    "project_roots_label": "Carpetas de proyectos donde buscar .venv (separadas por ':')",
+    "discovered_envs": "Entornos descubiertos y añadidos: %d",
+    "source_label": "Origen",
+    "rpc_service_enabled": "Servicio JSON-RPC local para editores y scripts",
+    "required_by_column": "Requerido por",
+    "status_column": "Estado",
+    "filter_all": "Todos",
+    "filter_orphans": "Sin dependientes",
+    "filter_problems": "Requisitos no satisfechos",
+    "orphans_label": "sin dependientes",
+    "unsatisfied_label": "requisitos no satisfechos",
+    "dependency_missing": "No instalado",
+    "dependency_wrong_version": "Versión incompatible",
+    "orphan_status": "Sin dependientes",
+    "advisories_title": "Avisos de seguridad",
+    "advisories_import": "Importar volcado OSV...",
+    "advisories_db": "Avisos en la base local",
+    "advisories_no_db": "No hay una base de avisos importada",
+    "advisory_column": "Aviso",
+    "fixed_in_column": "Corregido en",
+    "advisories_imported": "Avisos importados",
+    "advisories_badge": "avisos",
+    "layer_menu_tooltip": "Capas: entorno base compartido",
+    "mark_base_layer": "Marcar como capa base (solo lectura)",
+    "unmark_base_layer": "Quitar capa base",
+    "create_child_env": "Crear entorno hijo",
+    "child_env_name": "Nombre del entorno hijo de",
+    "base_layer_badge": "capa base",
+    "layer_has_children": "La capa base tiene entornos hijos que dependen de ella",
+    "layer_column": "Capa",
+    "rebuild_title": "Reconstruir entornos sobre otro intérprete",
+    "rebuild_target": "Intérprete destino:",
+    "rebuild_offline": "Solo caché local de wheels (sin conexión)",
+    "rebuild_jobs": "Trabajos en paralelo:",
+    "rebuild_checked": "Reconstruir marcados",
+    "rebuild_broken": "Intérprete base no encontrado",
+    "rebuild_confirm": "Se reconstruirán los entornos marcados con",
+    "rebuild_packages": "paquetes reinstalados",
+    "verify_title": "Verificar integridad de archivos",
+    "verify_hint": "Compara cada archivo instalado con el hash de su RECORD; los archivos sin cambios desde la última verificación no se vuelven a leer.",
+    "verify_env": "Verificar",
+    "verify_all": "Verificar todos",
+    "verify_modified": "modificado",
+    "verify_missing": "falta",
+    "verify_extra": "extra",
+    "verify_files": "archivos",
+    "verify_read": "leídos",
+    "verify_packages_with_issues": "paquetes con incidencias",
+    "packages_short": "paq.",
+    "env_health_roto": "intérprete no encontrado",
+    "env_health_sin_pyvenv": "sin pyvenv.cfg",
+    "palette_placeholder": "Buscar entornos y acciones (p. ej. «terminal web», «info», «crear»)",
+    "palette_action_terminal": "Abrir terminal",
+    "version_a_column": "Versión A",
+    "version_b_column": "Versión B",
+    "diff_only_a": "Solo en A",
+    "diff_only_b": "Solo en B",
+    "diff_version_changed": "Versión distinta",
+    "diff_equal": "Iguales",
+    "diff_package_in_one_env": "El paquete solo está instalado en uno de los entornos.",
+    "diff_record_missing": "No se encontró el archivo RECORD en alguno de los entornos.",
+    "diff_files_of": "Archivos de %s (%s ⇄ %s)",
+    "diff_files_identical": "Los archivos son idénticos según los hashes del RECORD.",
+    "matrix_workers_label": "Trabajadores",
+    "code_column": "Código",
+    "time_seconds_column": "Tiempo (s)",
+    "matrix_queued": "En cola",
+    "matrix_running": "Ejecutando",
+    "matrix_ok": "OK",
+    "matrix_failed": "Falló",
+    "matrix_error": "Error",
+    "matrix_interrupted": "Interrumpido",
+    "matrix_cancelled": "Cancelado",
+    "measurement_unavailable": "no disponible (la importación superó el tiempo límite)",
+    "precompile_running_title": "Precompilación en curso",
+    "precompile_running_wait": "Se están precompilando entornos en segundo plano. ¿Esperar a que terminen?\n\nNo: salir ahora e interrumpir la precompilación (se puede repetir con Optimizar).",
+    "advisories_import_file": "Archivo ZIP...",
+    "advisories_import_dir": "Directorio con JSON...",
+    "relink_child_error": "No se pudo volver a enlazar el entorno hijo",
+    "rebuild_children_missing": "Una capa base solo se puede reconstruir junto con sus entornos hijos. Márcalos también",
+    "rebuild_child_version_mismatch": "Estos entornos hijo deben usar la misma versión de Python que su capa base",
+    "measuring_sizes": "Calculando tamaños...",
+    "working_directory_label": "Directorio de trabajo",
+    "matrix_workdir_missing": "El directorio de trabajo no existe",
+    "relocate_source_remove_error": "El entorno se movió pero no se pudo borrar la copia original en",
+    "env_already_exists": "Ya existe un entorno en la ruta",
+    "invalid_env_name": "El nombre del entorno no puede contener '/' ni '|'",
+}
+
+# Traducciones incluidas en la aplicación; un archivo .qm instalado tiene prioridad sobre ellas
+TRADUCCIONES = {
+    "en": {
+        "app_title": "Virtual Environments (py)",
+        "create_env": "Create environment",
+        "env_name_placeholder": "Environment name",
+        "delete_selected": "Delete selected",
+        "open_directory": "Open directory",
+        "open_terminal": "Open terminal",
+        "config_title": "Settings",
+        "warning": "Warning",
+        "success": "Success",
+        "select_terminal": "Select Terminal",
+        "choose_terminal": "Choose a terminal:",
+        "custom_terminal": "Custom Terminal",
+        "terminal_name": "Name for this terminal:",
+        "terminal_path": "Executable path:",
+        "custom_command": "Custom command (use {script} for the script):",
+        "custom_command_full": "Custom terminal command (use {script} for the activation script):",
+        "executable_not_found": "Executable not found",
+        "continue_anyway": "The path does not exist. Do you want to continue anyway?",
+        "missing_fields": "Missing fields",
+        "provide_name": "Please provide a name for the environment.",
+        "env_created": "Environment created successfully.",
+        "venv_error": "Error creating the environment. Check that the 'venv' module is installed and that the selected Python interpreter is valid.",
+        "delete_env": "Delete environment",
+        "confirm_delete_env": "Are you sure you want to delete the environment",
+        "about_title": "About Python Venv Gui",
+        "about_content": "Python Venv Gui v1.2.0\n\nDeveloped by krafairus\n\nMore information at:\nhttps://github.com/krafairus/py-venv-gui",
+        "about_tooltip": "Show app information",
+        "close": "Close",
+        "restart_for_changes": "Language changes require restarting the application",
+        "terminal_error": "Could not open the terminal",
+        "select_interpreter": "Select Python interpreter",
+        "base_env_directory": "Base directory for virtual environments",
+        "change_button": "Change",
+        "browse_env_dir_title": "Select Base Directory for Environments",
+        "import_envs_button": "Import existing environments",
+        "select_scan_directory": "Select Directory to Scan for Environments",
+        "no_new_envs_found": "No new virtual environments were found in the selected directory.",
+        "added_new_envs": "%d new environments were added to the list.",
+        "invalid_env_dir": "The selected environments directory is not valid.",
+        "add_custom_terminal_button": "Add Custom Terminal",
+        "terminal_added_successfully": "Custom terminal added successfully",
+        "select_terminal_executable": "Select Terminal executable",
+        "provide_all_custom_terminal_fields": "Please provide the name, path and command of the custom terminal.",
+        "import_dialog_explanation": "Select the directory you want to scan. The application will look for subfolders with a virtual environment structure (for example, 'bin/activate') and add them to your list.",
+        "select_and_search_button": "Select directory and search",
+        "diff_envs_title": "Compare environments",
+        "compare_button": "Compare",
+        "matrix_runner_title": "Run command in several environments",
+        "matrix_missing_fields": "Enter a command and check at least one environment.",
+        "run_button": "Run",
+        "stop_button": "Stop",
+        "console_title": "Environment console",
+        "open_console": "Open embedded console",
+        "clear_button": "Clear",
+        "fastest_terminal": "fastest",
+        "reuse_terminal_instance": "Reuse the already open terminal when possible",
+        "open_terminal_tooltip": "Open terminal (Shift to choose another terminal)",
+        "general_tab": "General",
+        "language": "Language",
+        "custom_terminals": "Custom terminals",
+        "delete_selected_terminal": "Delete selected",
+        "env_info_tooltip": "Environment information",
+        "env_info_title": "Environment Information",
+        "basic_tab": "Basic",
+        "libraries_tab": "Libraries",
+        "basic_info_header": "Virtual Environment Basic Information",
+        "name_label": "Name",
+        "path_label": "Path",
+        "directory_info": "Directory Information",
+        "created_label": "Created",
+        "modified_label": "Modified",
+        "size_label": "Size",
+        "python_version_label": "Python version",
+        "platform_label": "Platform",
+        "implementation_label": "Implementation",
+        "python_info_error": "Error getting Python information",
+        "installed_libraries": "Installed Libraries",
+        "no_libraries_found": "No installed libraries were found.",
+        "libraries_list_error": "Error getting the list of libraries",
+        "pip_run_error": "Error running pip",
+        "pip_not_found": "The pip executable could not be found in the virtual environment.",
+        "export_env_title": "Export environment",
+        "export_destination": "Destination file",
+        "skip_pycache": "Skip __pycache__ directories",
+        "export_error": "Could not export the environment",
+        "export_done": "Environment exported to",
+        "import_from_archive_button": "Import from archive (.tar.zst / .tar.xz)",
+        "import_error": "Could not import the environment",
+        "import_done": "Environment imported to",
+        "import_missing_interpreter": "Warning: the environment's base interpreter does not exist on this machine. Install it or recreate the environment. Original path:",
+        "browse": "Browse",
+        "relocate_env_title": "Move or rename environment",
+        "relocate_target_exists": "The destination already exists",
+        "relocate_error": "Could not move the environment",
+        "relocate_done": "Environment moved to",
+        "disk_tab": "Disk usage",
+        "package_column": "Package",
+        "version_column": "Version",
+        "environment_column": "Environment",
+        "largest_packages_title": "Largest packages across all environments",
+        "cleanup_title": "Environment cleanup",
+        "cleanup_unused_days": "Unused for (days):",
+        "cleanup_size_budget": "Maximum total size:",
+        "cleanup_evaluate": "Evaluate",
+        "cleanup_last_used": "Last used",
+        "cleanup_reason": "Reason",
+        "cleanup_reason_unused": "Unused",
+        "cleanup_reason_budget": "Over the size budget",
+        "cleanup_delete_checked": "Delete checked",
+        "cleanup_confirm": "Delete the checked environments?",
+        "env_deleted": "Environment deleted successfully",
+        "env_delete_error": "Could not delete the environment",
+        "optimize_env_title": "Optimize bytecode",
+        "optimize_precompile": "Precompile site-packages (all cores)",
+        "optimize_prune_pycache": "Remove orphan or foreign-version .pyc files",
+        "optimize_strip_tests": "Remove tests and docs directories",
+        "optimize_measure_imports": "Measure import time before and after",
+        "optimize_done": "Optimization finished",
+        "optimize_error": "Could not optimize the environment",
+        "optimize_size": "Size",
+        "optimize_import_time": "Package imports",
+        "optimize_pyc_removed": ".pyc files removed",
+        "precompile_after_create": "Precompile bytecode after creating or importing an environment",
+        "startup_tab": "Startup",
+        "startup_modules_placeholder": "Packages to import (empty = python -c pass)",
+        "startup_run": "Measure",
+        "startup_running": "Measuring...",
+        "startup_module": "Module",
+        "startup_self_ms": "Self (ms)",
+        "startup_cumulative_ms": "Cumulative (ms)",
+        "startup_date": "Date",
+        "startup_target": "Target",
+        "startup_median": "Median",
+        "startup_changes": "Changes since previous",
+        "in_use_by": "In use by",
+        "processes_label": "processes",
+        "env_in_use_warning": "Some processes are using this environment. Delete it anyway?",
+        "discover_tools_button": "Discover tool-managed environments (pyenv, poetry, conda...)",
+        "auto_discover_envs": "Discover tool-managed environments at startup",
+        "project_roots_label": "Project folders to search for .venv (separated by ':')",
+        "discovered_envs": "Environments discovered and added: %d",
+        "source_label": "Source",
+        "rpc_service_enabled": "Local JSON-RPC service for editors and scripts",
+        "required_by_column": "Required by",
+        "status_column": "Status",
+        "filter_all": "All",
+        "filter_orphans": "No dependents",
+        "filter_problems": "Unsatisfied requirements",
+        "orphans_label": "without dependents",
+        "unsatisfied_label": "unsatisfied requirements",
+        "dependency_missing": "Not installed",
+        "dependency_wrong_version": "Incompatible version",
+        "orphan_status": "No dependents",
+        "advisories_title": "Security advisories",
+        "advisories_import": "Import OSV dump...",
+        "advisories_db": "Advisories in the local database",
+        "advisories_no_db": "No advisory database has been imported",
+        "advisory_column": "Advisory",
+        "fixed_in_column": "Fixed in",
+        "advisories_imported": "Advisories imported",
+        "advisories_badge": "advisories",
+        "layer_menu_tooltip": "Layers: shared base environment",
+        "mark_base_layer": "Mark as base layer (read-only)",
+        "unmark_base_layer": "Remove base layer",
+        "create_child_env": "Create child environment",
+        "child_env_name": "Name of the child environment of",
+        "base_layer_badge": "base layer",
+        "layer_has_children": "The base layer has child environments that depend on it",
+        "layer_column": "Layer",
+        "rebuild_title": "Rebuild environments onto another interpreter",
+        "rebuild_target": "Target interpreter:",
+        "rebuild_offline": "Local wheel cache only (offline)",
+        "rebuild_jobs": "Parallel jobs:",
+        "rebuild_checked": "Rebuild checked",
+        "rebuild_broken": "Base interpreter not found",
+        "rebuild_confirm": "The checked environments will be rebuilt with",
+        "rebuild_packages": "packages reinstalled",
+        "verify_title": "Verify file integrity",
+        "verify_hint": "Compares each installed file against its RECORD hash; files unchanged since the last verification are not read again.",
+        "verify_env": "Verify",
+        "verify_all": "Verify all",
+        "verify_modified": "modified",
+        "verify_missing": "missing",
+        "verify_extra": "extra",
+        "verify_files": "files",
+        "verify_read": "read",
+        "verify_packages_with_issues": "packages with issues",
+        "packages_short": "pkgs",
+        "env_health_roto": "interpreter not found",
+        "env_health_sin_pyvenv": "no pyvenv.cfg",
+        "palette_placeholder": "Search environments and actions (e.g. \"terminal web\", \"info\", \"create\")",
+        "palette_action_terminal": "Open terminal",
+        "version_a_column": "Version A",
+        "version_b_column": "Version B",
+        "diff_only_a": "Only in A",
+        "diff_only_b": "Only in B",
+        "diff_version_changed": "Different version",
+        "diff_equal": "Equal",
+        "diff_package_in_one_env": "The package is only installed in one of the environments.",
+        "diff_record_missing": "The RECORD file was not found in one of the environments.",
+        "diff_files_of": "Files of %s (%s ⇄ %s)",
+        "diff_files_identical": "The files are identical according to the RECORD hashes.",
+        "matrix_workers_label": "Workers",
+        "code_column": "Code",
+        "time_seconds_column": "Time (s)",
+        "matrix_queued": "Queued",
+        "matrix_running": "Running",
+        "matrix_ok": "OK",
+        "matrix_failed": "Failed",
+        "matrix_error": "Error",
+        "matrix_interrupted": "Interrupted",
+        "matrix_cancelled": "Cancelled",
+        "measurement_unavailable": "unavailable (the import timed out)",
+        "precompile_running_title": "Precompilation in progress",
+        "precompile_running_wait": "Environments are being precompiled in the background. Wait for them to finish?\n\nNo: quit now and interrupt the precompilation (it can be repeated with Optimize).",
+        "advisories_import_file": "ZIP file...",
+        "advisories_import_dir": "Directory with JSON files...",
+        "relink_child_error": "Could not relink the child environment",
+        "rebuild_children_missing": "A base layer can only be rebuilt together with its child environments. Check them too",
+        "rebuild_child_version_mismatch": "These child environments must use the same Python version as their base layer",
+        "measuring_sizes": "Measuring sizes...",
+        "working_directory_label": "Working directory",
+        "matrix_workdir_missing": "The working directory does not exist",
+        "relocate_source_remove_error": "The environment was moved but the original copy could not be removed at",
+        "env_already_exists": "An environment already exists at",
+        "invalid_env_name": "The environment name cannot contain '/' or '|'",
+    },
+    "pt": {
+        "app_title": "Ambientes Virtuais (py)",
+        "create_env": "Criar ambiente",
+        "env_name_placeholder": "Nome do ambiente",
+        "delete_selected": "Excluir selecionado",
+        "open_directory": "Abrir diretório",
+        "open_terminal": "Abrir terminal",
+        "config_title": "Configurações",
+        "warning": "Aviso",
+        "success": "Sucesso",
+        "select_terminal": "Selecionar Terminal",
+        "choose_terminal": "Escolha um terminal:",
+        "custom_terminal": "Terminal Personalizado",
+        "terminal_name": "Nome para este terminal:",
+        "terminal_path": "Caminho do executável:",
+        "custom_command": "Comando personalizado (use {script} para o script):",
+        "custom_command_full": "Comando personalizado do terminal (use {script} para o script de ativação):",
+        "executable_not_found": "Executável não encontrado",
+        "continue_anyway": "O caminho não existe. Deseja continuar mesmo assim?",
+        "missing_fields": "Campos ausentes",
+        "provide_name": "Por favor, informe um nome para o ambiente.",
+        "env_created": "Ambiente criado com sucesso.",
+        "error": "Erro",
+        "venv_error": "Erro ao criar o ambiente. Verifique se o módulo 'venv' está instalado e se o interpretador Python selecionado é válido.",
+        "delete_env": "Excluir ambiente",
+        "confirm_delete_env": "Tem certeza de que deseja excluir o ambiente",
+        "about_title": "Sobre o Python Venv Gui",
+        "about_content": "Python Venv Gui v1.2.0\n\nDesenvolvido por krafairus\n\nMais informações em:\nhttps://github.com/krafairus/py-venv-gui",
+        "about_tooltip": "Ver informações do aplicativo",
+        "close": "Fechar",
+        "restart_for_changes": "As mudanças de idioma exigem reiniciar o aplicativo",
+        "terminal_error": "Não foi possível abrir o terminal",
+        "select_interpreter": "Selecionar interpretador Python",
+        "base_env_directory": "Diretório base dos ambientes virtuais",
+        "change_button": "Alterar",
+        "browse_env_dir_title": "Selecionar Diretório Base para Ambientes",
+        "import_envs_button": "Importar ambientes existentes",
+        "select_scan_directory": "Selecionar Diretório para Procurar Ambientes",
+        "no_new_envs_found": "Nenhum novo ambiente virtual foi encontrado no diretório selecionado.",
+        "added_new_envs": "%d novos ambientes foram adicionados à lista.",
+        "invalid_env_dir": "O diretório de ambientes selecionado não é válido.",
+        "add_custom_terminal_button": "Adicionar Terminal Personalizado",
+        "terminal_added_successfully": "Terminal personalizado adicionado com sucesso",
+        "select_terminal_executable": "Selecionar executável do Terminal",
+        "provide_all_custom_terminal_fields": "Por favor, informe o nome, o caminho e o comando do terminal personalizado.",
+        "import_dialog_explanation": "Selecione o diretório que deseja verificar. O aplicativo procurará subpastas com estrutura de ambiente virtual (por exemplo, 'bin/activate') e as adicionará à sua lista.",
+        "select_and_search_button": "Selecionar diretório e procurar",
+        "diff_envs_title": "Comparar ambientes",
+        "compare_button": "Comparar",
+        "matrix_runner_title": "Executar comando em vários ambientes",
+        "matrix_missing_fields": "Digite um comando e marque pelo menos um ambiente.",
+        "run_button": "Executar",
+        "stop_button": "Parar",
+        "console_title": "Console de ambientes",
+        "open_console": "Abrir console integrado",
+        "clear_button": "Limpar",
+        "fastest_terminal": "mais rápido",
+        "reuse_terminal_instance": "Reutilizar o terminal já aberto quando possível",
+        "open_terminal_tooltip": "Abrir terminal (Shift para escolher outro terminal)",
+        "general_tab": "Geral",
+        "language": "Idioma",
+        "custom_terminals": "Terminais personalizados",
+        "delete_selected_terminal": "Excluir selecionado",
+        "env_info_tooltip": "Informações do ambiente",
+        "env_info_title": "Informações do Ambiente",
+        "basic_tab": "Básico",
+        "libraries_tab": "Bibliotecas",
+        "basic_info_header": "Informações Básicas do Ambiente Virtual",
+        "name_label": "Nome",
+        "path_label": "Caminho",
+        "directory_info": "Informações do Diretório",
+        "created_label": "Criado",
+        "modified_label": "Modificado",
+        "size_label": "Tamanho",
+        "python_version_label": "Versão do Python",
+        "platform_label": "Plataforma",
+        "implementation_label": "Implementação",
+        "python_info_error": "Erro ao obter informações do Python",
+        "installed_libraries": "Bibliotecas Instaladas",
+        "no_libraries_found": "Nenhuma biblioteca instalada foi encontrada.",
+        "libraries_list_error": "Erro ao obter a lista de bibliotecas",
+        "pip_run_error": "Erro ao executar o pip",
+        "pip_not_found": "Não foi possível encontrar o executável do pip no ambiente virtual.",
+        "export_env_title": "Exportar ambiente",
+        "export_destination": "Arquivo de destino",
+        "skip_pycache": "Ignorar diretórios __pycache__",
+        "export_error": "Não foi possível exportar o ambiente",
+        "export_done": "Ambiente exportado em",
+        "import_from_archive_button": "Importar de arquivo (.tar.zst / .tar.xz)",
+        "import_error": "Não foi possível importar o ambiente",
+        "import_done": "Ambiente importado em",
+        "import_missing_interpreter": "Aviso: o interpretador base do ambiente não existe nesta máquina. Instale-o ou recrie o ambiente. Caminho original:",
+        "browse": "Procurar",
+        "relocate_env_title": "Mover ou renomear ambiente",
+        "relocate_target_exists": "O destino já existe",
+        "relocate_error": "Não foi possível mover o ambiente",
+        "relocate_done": "Ambiente movido para",
+        "disk_tab": "Espaço",
+        "package_column": "Pacote",
+        "version_column": "Versão",
+        "environment_column": "Ambiente",
+        "largest_packages_title": "Maiores pacotes em todos os ambientes",
+        "cleanup_title": "Limpeza de ambientes",
+        "cleanup_unused_days": "Sem uso há (dias):",
+        "cleanup_size_budget": "Tamanho máximo total:",
+        "cleanup_evaluate": "Avaliar",
+        "cleanup_last_used": "Último uso",
+        "cleanup_reason": "Motivo",
+        "cleanup_reason_unused": "Sem uso",
+        "cleanup_reason_budget": "Excede o limite de tamanho",
+        "cleanup_delete_checked": "Excluir marcados",
+        "cleanup_confirm": "Excluir os ambientes marcados?",
+        "env_deleted": "Ambiente excluído com sucesso",
+        "env_delete_error": "Não foi possível excluir o ambiente",
+        "optimize_env_title": "Otimizar bytecode",
+        "optimize_precompile": "Pré-compilar site-packages (todos os núcleos)",
+        "optimize_prune_pycache": "Remover .pyc órfãos ou de outras versões do Python",
+        "optimize_strip_tests": "Remover diretórios de testes e documentação",
+        "optimize_measure_imports": "Medir o tempo de importação antes e depois",
+        "optimize_done": "Otimização concluída",
+        "optimize_error": "Não foi possível otimizar o ambiente",
+        "optimize_size": "Tamanho",
+        "optimize_import_time": "Importação de pacotes",
+        "optimize_pyc_removed": ".pyc removidos",
+        "precompile_after_create": "Pré-compilar bytecode ao criar ou importar um ambiente",
+        "startup_tab": "Inicialização",
+        "startup_modules_placeholder": "Pacotes a importar (vazio = python -c pass)",
+        "startup_run": "Medir",
+        "startup_running": "Medindo...",
+        "startup_module": "Módulo",
+        "startup_self_ms": "Próprio (ms)",
+        "startup_cumulative_ms": "Acumulado (ms)",
+        "startup_date": "Data",
+        "startup_target": "Alvo",
+        "startup_median": "Mediana",
+        "startup_changes": "Mudanças desde a anterior",
+        "in_use_by": "Em uso por",
+        "processes_label": "processos",
+        "env_in_use_warning": "Há processos usando este ambiente. Excluí-lo mesmo assim?",
+        "discover_tools_button": "Descobrir ambientes de ferramentas (pyenv, poetry, conda...)",
+        "auto_discover_envs": "Descobrir ambientes de ferramentas ao iniciar",
+        "project_roots_label": "Pastas de projetos onde procurar .venv (separadas por ':')",
+        "discovered_envs": "Ambientes descobertos e adicionados: %d",
+        "source_label": "Origem",
+        "rpc_service_enabled": "Serviço JSON-RPC local para editores e scripts",
+        "required_by_column": "Requerido por",
+        "status_column": "Estado",
+        "filter_all": "Todos",
+        "filter_orphans": "Sem dependentes",
+        "filter_problems": "Requisitos não satisfeitos",
+        "orphans_label": "sem dependentes",
+        "unsatisfied_label": "requisitos não satisfeitos",
+        "dependency_missing": "Não instalado",
+        "dependency_wrong_version": "Versão incompatível",
+        "orphan_status": "Sem dependentes",
+        "advisories_title": "Avisos de segurança",
+        "advisories_import": "Importar dump OSV...",
+        "advisories_db": "Avisos na base local",
+        "advisories_no_db": "Nenhuma base de avisos foi importada",
+        "advisory_column": "Aviso",
+        "fixed_in_column": "Corrigido em",
+        "advisories_imported": "Avisos importados",
+        "advisories_badge": "avisos",
+        "layer_menu_tooltip": "Camadas: ambiente base compartilhado",
+        "mark_base_layer": "Marcar como camada base (somente leitura)",
+        "unmark_base_layer": "Remover camada base",
+        "create_child_env": "Criar ambiente filho",
+        "child_env_name": "Nome do ambiente filho de",
+        "base_layer_badge": "camada base",
+        "layer_has_children": "A camada base tem ambientes filhos que dependem dela",
+        "layer_column": "Camada",
+        "rebuild_title": "Reconstruir ambientes sobre outro interpretador",
+        "rebuild_target": "Interpretador de destino:",
+        "rebuild_offline": "Somente cache local de wheels (offline)",
+        "rebuild_jobs": "Trabalhos em paralelo:",
+        "rebuild_checked": "Reconstruir marcados",
+        "rebuild_broken": "Interpretador base não encontrado",
+        "rebuild_confirm": "Os ambientes marcados serão reconstruídos com",
+        "rebuild_packages": "pacotes reinstalados",
+        "verify_title": "Verificar integridade dos arquivos",
+        "verify_hint": "Compara cada arquivo instalado com o hash do seu RECORD; arquivos sem alterações desde a última verificação não são lidos novamente.",
+        "verify_env": "Verificar",
+        "verify_all": "Verificar todos",
+        "verify_modified": "modificado",
+        "verify_missing": "ausente",
+        "verify_extra": "extra",
+        "verify_files": "arquivos",
+        "verify_read": "lidos",
+        "verify_packages_with_issues": "pacotes com problemas",
+        "packages_short": "pct.",
+        "env_health_roto": "interpretador não encontrado",
+        "env_health_sin_pyvenv": "sem pyvenv.cfg",
+        "palette_placeholder": "Buscar ambientes e ações (ex.: «terminal web», «info», «criar»)",
+        "palette_action_terminal": "Abrir terminal",
+        "version_a_column": "Versão A",
+        "version_b_column": "Versão B",
+        "diff_only_a": "Só em A",
+        "diff_only_b": "Só em B",
+        "diff_version_changed": "Versão diferente",
+        "diff_equal": "Iguais",
+        "diff_package_in_one_env": "O pacote só está instalado em um dos ambientes.",
+        "diff_record_missing": "O arquivo RECORD não foi encontrado em um dos ambientes.",
+        "diff_files_of": "Arquivos de %s (%s ⇄ %s)",
+        "diff_files_identical": "Os arquivos são idênticos segundo os hashes do RECORD.",
+        "matrix_workers_label": "Trabalhadores",
+        "code_column": "Código",
+        "time_seconds_column": "Tempo (s)",
+        "matrix_queued": "Na fila",
+        "matrix_running": "Executando",
+        "matrix_ok": "OK",
+        "matrix_failed": "Falhou",
+        "matrix_error": "Erro",
+        "matrix_interrupted": "Interrompido",
+        "matrix_cancelled": "Cancelado",
+        "measurement_unavailable": "indisponível (a importação excedeu o tempo limite)",
+        "precompile_running_title": "Pré-compilação em andamento",
+        "precompile_running_wait": "Ambientes estão sendo pré-compilados em segundo plano. Esperar que terminem?\n\nNão: sair agora e interromper a pré-compilação (pode ser repetida com Otimizar).",
+        "advisories_import_file": "Arquivo ZIP...",
+        "advisories_import_dir": "Diretório com JSON...",
+        "relink_child_error": "Não foi possível religar o ambiente filho",
+        "rebuild_children_missing": "Uma camada base só pode ser reconstruída junto com seus ambientes filhos. Marque-os também",
+        "rebuild_child_version_mismatch": "Estes ambientes filhos devem usar a mesma versão do Python que sua camada base",
+        "measuring_sizes": "Calculando tamanhos...",
+        "working_directory_label": "Diretório de trabalho",
+        "matrix_workdir_missing": "O diretório de trabalho não existe",
+        "relocate_source_remove_error": "O ambiente foi movido, mas não foi possível remover a cópia original em",
+        "env_already_exists": "Já existe um ambiente no caminho",
+        "invalid_env_name": "O nome do ambiente não pode conter '/' nem '|'",
+    },
+}
+
 # Clase que maneja la carga y aplicación de traducciones
 class TranslationManager(QObject):
+    """Carga el idioma y mantiene un catálogo de cadenas ya traducidas por idioma.
+
+    El catálogo se construye una sola vez por idioma; al cambiar de idioma se
+    emite idioma_cambiado y los widgets abiertos se vuelven a traducir.
+    """
+    idioma_cambiado = Signal(str)
+
     def __init__(self, app, parent=None):
         super().__init__(parent)
         self.app = app
         self.translator = QTranslator(self)
         self.fallback_translator = QTranslator(self)
+        self.idioma = None
+        self.catalogos = {}
+        self.catalogo = dict(CADENAS_FUENTE)
 
     def load_language(self, lang_code, base_dir):
         QCoreApplication.removeTranslator(self.translator)
@@ -207,361 +984,5355 @@ class TranslationManager(QObject):
         translations_dir = os.path.join(base_dir, 'translations')
         qm_path = os.path.join(translations_dir, qm_file)
         
-        if self.translator.load(qm_path):
+        tiene_qm = os.path.exists(qm_path) and self.translator.load(qm_path)
+        if tiene_qm:
              QCoreApplication.installTranslator(self.translator)
              print(f"Cargado traductor: {qm_path}")
+
+        cambio = lang_code != self.idioma
+        self.idioma = lang_code
+        self.catalogo = self.construir_catalogo(lang_code, tiene_qm)
+        if cambio:
+            self.idioma_cambiado.emit(lang_code)
+
+    def construir_catalogo(self, lang_code, tiene_qm):
+        """Traduce todas las cadenas del idioma una sola vez y guarda el resultado"""
+        if lang_code in self.catalogos:
+            return self.catalogos[lang_code]
+
+        traducciones = TRADUCCIONES.get(lang_code, {})
+        catalogo = {}
+        for clave, fuente in CADENAS_FUENTE.items():
+            traducida = QCoreApplication.translate("CreadorEntornos", fuente) if tiene_qm else fuente
+            if traducida == fuente:
+                traducida = traducciones.get(clave, fuente)
+            catalogo[clave] = traducida
+        self.catalogos[lang_code] = catalogo
+        return catalogo
+
+    def cadena(self, clave):
+        return self.catalogo.get(clave, clave)
+
+    def retraducir_widgets(self):
+        """Vuelve a traducir los widgets abiertos que lo soportan, sin reconstruirlos"""
+        for widget in QApplication.allWidgets():
+            if hasattr(widget, 'retraducir_ui'):
+                widget.retraducir_ui()
+
+# --- Almacén de Configuración (atómico, con bloqueo y escritura diferida) ---
+
+def escribir_json_atomico(ruta, datos, indent=None):
+    """Escribe un JSON en un archivo temporal del mismo directorio y lo renombra sobre el destino"""
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    fd, ruta_temporal = tempfile.mkstemp(prefix='.' + os.path.basename(ruta) + '.', suffix='.tmp', dir=directorio)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(datos, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+
+
+class AlmacenConfig(QObject):
+    """Configuración compartida entre instancias de la aplicación.
+
+    - Escritura atómica (temporal + rename) protegida con fcntl sobre un archivo .lock.
+    - Los guardados se agrupan con un temporizador para no reescribir el archivo en cada cambio.
+    - Solo se escriben las claves modificadas localmente sobre el contenido actual del disco,
+      así dos instancias no se pisan los cambios entre sí.
+    - Se vigila el directorio para recargar los cambios hechos por otras instancias.
+    """
+    cambiado = Signal(set)
+
+    RETARDO_GUARDADO_MS = 500
+
+    def __init__(self, archivo_config, valores_por_defecto, parent=None):
+        super().__init__(parent)
+        self.archivo_config = archivo_config
+        self.archivo_lock = archivo_config + '.lock'
+        self.valores_por_defecto = valores_por_defecto
+        self.datos = dict(valores_por_defecto)
+        self.sincronizado = {}
+        self.firma_disco = None
+
+        self.temporizador_guardado = QTimer(self)
+        self.temporizador_guardado.setSingleShot(True)
+        self.temporizador_guardado.setInterval(self.RETARDO_GUARDADO_MS)
+        self.temporizador_guardado.timeout.connect(self.guardar_ahora)
+
+        self.cargar()
+
+        os.makedirs(os.path.dirname(archivo_config), exist_ok=True)
+        # Se vigila el directorio: el rename atómico sustituye el inodo del archivo
+        self.vigilante = QFileSystemWatcher([os.path.dirname(archivo_config)], self)
+        self.vigilante.directoryChanged.connect(self.revisar_cambios_externos)
+
+    def bloqueo(self, exclusivo):
+        os.makedirs(os.path.dirname(self.archivo_lock), exist_ok=True)
+        f = open(self.archivo_lock, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        return f
+
+    def obtener_firma_disco(self):
+        try:
+            stat_info = os.stat(self.archivo_config)
+            return (stat_info.st_ino, stat_info.st_mtime_ns, stat_info.st_size)
+        except OSError:
+            return None
+
+    def leer_disco(self):
+        """Lee el archivo de configuración (debe llamarse con el bloqueo tomado)"""
+        if not os.path.exists(self.archivo_config):
+            return {}
+        try:
+            with open(self.archivo_config, 'r') as f:
+                datos = json.load(f)
+            if not isinstance(datos, dict):
+                raise ValueError("La configuración no es un objeto JSON")
+            return datos
+        except (OSError, ValueError) as e:
+            # Se conserva el archivo dañado en lugar de sobrescribirlo con los valores por defecto
+            respaldo = self.archivo_config + '.corrupto'
+            print(f"Configuración inválida ({e}). Copia guardada en: {respaldo}")
+            try:
+                shutil.copy2(self.archivo_config, respaldo)
+            except OSError:
+                pass
+            return {}
+
+    def cargar(self):
+        with self.bloqueo(exclusivo=False):
+            en_disco = self.leer_disco()
+            self.firma_disco = self.obtener_firma_disco()
+        if 'theme' in en_disco: del en_disco['theme']
+        self.datos.clear()
+        self.datos.update({**self.valores_por_defecto, **en_disco})
+        self.sincronizado = copy.deepcopy(self.datos)
+
+    def claves_modificadas(self):
+        claves = {k for k, v in self.datos.items() if k not in self.sincronizado or self.sincronizado[k] != v}
+        claves |= {k for k in self.sincronizado if k not in self.datos}
+        return claves
+
+    def guardar(self):
+        """Programa un guardado diferido; varias llamadas seguidas se agrupan en una escritura"""
+        self.temporizador_guardado.start()
+
+    def guardar_ahora(self):
+        self.temporizador_guardado.stop()
+        modificadas = self.claves_modificadas()
+        if not modificadas:
+            return
+
+        with self.bloqueo(exclusivo=True):
+            en_disco = self.leer_disco()
+            for clave in modificadas:
+                if clave in self.datos:
+                    en_disco[clave] = self.datos[clave]
+                else:
+                    en_disco.pop(clave, None)
+            escribir_json_atomico(self.archivo_config, en_disco, indent=4)
+            self.firma_disco = self.obtener_firma_disco()
+
+        externas = self.aplicar_disco(en_disco, modificadas)
+        if externas:
+            self.cambiado.emit(externas)
+
+    def aplicar_disco(self, en_disco, excluir=()):
+        """Aplica en self.datos los valores del disco (salvo las claves excluidas).
+        Devuelve las claves cuyo valor cambió."""
+        cambiadas = set()
+        for clave, valor in {**self.valores_por_defecto, **en_disco}.items():
+            if clave in excluir or clave == 'theme':
+                continue
+            if self.datos.get(clave) != valor:
+                self.datos[clave] = valor
+                cambiadas.add(clave)
+        self.sincronizado = copy.deepcopy(self.datos)
+        return cambiadas
+
+    def revisar_cambios_externos(self, _directorio=None):
+        if self.obtener_firma_disco() == self.firma_disco:
+            return
+        with self.bloqueo(exclusivo=False):
+            en_disco = self.leer_disco()
+            self.firma_disco = self.obtener_firma_disco()
+        # Los cambios locales pendientes de guardar tienen prioridad
+        cambiadas = self.aplicar_disco(en_disco, excluir=self.claves_modificadas())
+        if cambiadas:
+            self.cambiado.emit(cambiadas)
+
+# --- Instancia Única (IPC con QLocalServer) ---
+
+def analizar_argumentos(argv):
+    """Analiza los argumentos de línea de comandos de la aplicación"""
+    parser = argparse.ArgumentParser(prog='python-venv-gui', add_help=False)
+    parser.add_argument('--abrir', metavar='ENTORNO', help="Selecciona un entorno por nombre o ruta")
+    parser.add_argument('--crear-desde', metavar='DIRECTORIO', help="Prepara la creación de un entorno para un directorio")
+    parser.add_argument('--nueva-instancia', action='store_true', help="No reutiliza la instancia en ejecución")
+    parser.add_argument('--servicio', action='store_true', help="Activa el servicio JSON-RPC local")
+    parser.add_argument('--sin-ventana', action='store_true', help="Ejecuta solo el servicio JSON-RPC, sin interfaz")
+    parser.add_argument('ruta', nargs='?', help="Ruta de un entorno a abrir")
+    args, _desconocidos = parser.parse_known_args(argv)
+    return args
+
+def resolver_rutas_argumentos(argv, cwd):
+    """Convierte en absolutas las rutas de los argumentos respecto a cwd.
+    --crear-desde siempre es una ruta; --abrir y la posicional solo si contienen un separador
+    (sin él son el nombre de un entorno)."""
+    def absoluta(valor, siempre):
+        if not siempre and os.sep not in valor:
+            return valor
+        return os.path.normpath(os.path.join(cwd, os.path.expanduser(valor)))
+
+    resueltos = []
+    opcion_pendiente = None
+    for arg in argv:
+        if opcion_pendiente:
+            resueltos.append(absoluta(arg, opcion_pendiente == '--crear-desde'))
+            opcion_pendiente = None
+        elif arg in ('--crear-desde', '--abrir'):
+            resueltos.append(arg)
+            opcion_pendiente = arg
+        elif arg.startswith(('--crear-desde=', '--abrir=')):
+            opcion, valor = arg.split('=', 1)
+            resueltos.append(f"{opcion}={absoluta(valor, opcion == '--crear-desde')}")
+        elif arg.startswith('-'):
+            resueltos.append(arg)
         else:
-             print(f"Error al cargar traductor en: {qm_path}. Usando idioma fuente.")
-             QCoreApplication.removeTranslator(self.translator)
+            resueltos.append(absoluta(arg, False))
+    return resueltos
 
-# --- Diálogo de Información del Entorno ---
 
-class EntornoInfoDialog(QDialog):
-    def __init__(self, parent=None, entorno_path="", entorno_name=""):
+class InstanciaUnica(QObject):
+    """Servidor local que recibe los argumentos de lanzamientos posteriores de la aplicación"""
+    argumentos_recibidos = Signal(list)
+
+    NOMBRE_SERVIDOR = f"python-venv-gui-{os.getuid()}"
+    TIEMPO_ESPERA_MS = 500
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.entorno_path = entorno_path
-        self.entorno_name = entorno_name
-        self.setWindowTitle(f"Información del Entorno: {entorno_name}")
-        self.setFixedSize(600, 500)
-        self.setup_ui()
-        self.cargar_informacion()
+        self.servidor = QLocalServer(self)
+        self.servidor.setSocketOptions(QLocalServer.UserAccessOption)
+        self.servidor.newConnection.connect(self.nueva_conexion)
+
+    @classmethod
+    def enviar_a_instancia_existente(cls, argv):
+        """Envía los argumentos a la instancia en ejecución. Devuelve True si la hay."""
+        socket = QLocalSocket()
+        socket.connectToServer(cls.NOMBRE_SERVIDOR)
+        if not socket.waitForConnected(cls.TIEMPO_ESPERA_MS):
+            return False
+        # Las rutas relativas se resuelven aquí, la otra instancia tiene otro directorio de trabajo
+        mensaje = json.dumps({'cwd': os.getcwd(), 'argv': resolver_rutas_argumentos(argv, os.getcwd())}) + '\n'
+        socket.write(mensaje.encode('utf-8'))
+        socket.flush()
+        socket.waitForBytesWritten(cls.TIEMPO_ESPERA_MS)
+        socket.disconnectFromServer()
+        return True
+
+    def iniciar_servidor(self):
+        if not self.servidor.listen(self.NOMBRE_SERVIDOR):
+            # Socket huérfano de una instancia que terminó de forma abrupta
+            QLocalServer.removeServer(self.NOMBRE_SERVIDOR)
+            if not self.servidor.listen(self.NOMBRE_SERVIDOR):
+                print(f"No se pudo iniciar el servidor de instancia única: {self.servidor.errorString()}")
+                return False
+        return True
+
+    def nueva_conexion(self):
+        while self.servidor.hasPendingConnections():
+            socket = self.servidor.nextPendingConnection()
+            socket.setProperty('buffer', b'')
+            socket.readyRead.connect(lambda s=socket: self.leer_mensaje(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def leer_mensaje(self, socket):
+        buffer = socket.property('buffer') + bytes(socket.readAll())
+        while b'\n' in buffer:
+            linea, buffer = buffer.split(b'\n', 1)
+            try:
+                mensaje = json.loads(linea.decode('utf-8'))
+            except ValueError:
+                continue
+            # Por si el emisor es una versión anterior que enviaba las rutas sin resolver
+            argv = resolver_rutas_argumentos(mensaje.get('argv', []), mensaje.get('cwd', os.getcwd()))
+            self.argumentos_recibidos.emit(argv)
+        socket.setProperty('buffer', buffer)
 
-    def setup_ui(self):
-        layout = QVBoxLayout(self)
+# --- Servicio JSON-RPC Local (socket Unix) ---
 
-        # Crear widget de pestañas
-        self.tab_widget = QTabWidget()
-        
-        # Pestaña Básica
-        self.basica_tab = QWidget()
-        self.setup_basica_tab()
-        self.tab_widget.addTab(self.basica_tab, "Básica")
-        
-        # Pestaña Librerías
-        self.librerias_tab = QWidget()
-        self.setup_librerias_tab()
-        self.tab_widget.addTab(self.librerias_tab, "Librerías")
-        
-        layout.addWidget(self.tab_widget)
+def ruta_socket_rpc():
+    """Socket del servicio: en XDG_RUNTIME_DIR si existe (solo accesible por el usuario)"""
+    directorio = os.environ.get('XDG_RUNTIME_DIR') or CONFIG_BASE_DIR
+    return os.path.join(directorio, f"python-venv-gui-{os.getuid()}.sock")
 
-        # Botón de cerrar
-        self.btn_cerrar = QPushButton("Cerrar")
-        self.btn_cerrar.clicked.connect(self.close)
-        layout.addWidget(self.btn_cerrar)
 
-    def setup_basica_tab(self):
-        layout = QVBoxLayout(self.basica_tab)
-        
-        # Área de scroll para la información básica
-        scroll_area = QScrollArea()
-        scroll_widget = QWidget()
-        scroll_layout = QVBoxLayout(scroll_widget)
-        
-        self.info_basica_text = QTextEdit()
-        self.info_basica_text.setReadOnly(True)
-        self.info_basica_text.setStyleSheet("background-color: #2e2e2e; color: white; border: none;")
-        scroll_layout.addWidget(self.info_basica_text)
-        
-        scroll_area.setWidget(scroll_widget)
-        scroll_area.setWidgetResizable(True)
-        layout.addWidget(scroll_area)
+class ErrorRPC(Exception):
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.codigo = codigo
 
-    def setup_librerias_tab(self):
-        layout = QVBoxLayout(self.librerias_tab)
-        
-        # Área de scroll para las librerías
-        scroll_area = QScrollArea()
-        scroll_widget = QWidget()
-        scroll_layout = QVBoxLayout(scroll_widget)
-        
-        self.librerias_text = QTextEdit()
-        self.librerias_text.setReadOnly(True)
-        self.librerias_text.setStyleSheet("background-color: #2e2e2e; color: white; border: none;")
-        scroll_layout.addWidget(self.librerias_text)
-        
-        scroll_area.setWidget(scroll_widget)
-        scroll_area.setWidgetResizable(True)
-        layout.addWidget(scroll_area)
 
-    def cargar_informacion(self):
-        self.cargar_info_basica()
-        self.cargar_librerias()
+class ServicioRPC(QObject):
+    """Servidor JSON-RPC 2.0 (un mensaje por línea) sobre un socket Unix.
 
-    def cargar_info_basica(self):
-        info_text = f"""Información Básica del Entorno Virtual
+    Responde desde el registro y la caché de metadatos en memoria de la ventana principal.
+    Métodos: list, info, create, delete, activate, subscribe, unsubscribe.
+    Los suscriptores reciben notificaciones 'changed' con {'event': ..., ...}.
+    """
 
-Nombre: {self.entorno_name}
-Ruta: {self.entorno_path}
+    ERROR_PARSEO = -32700
+    ERROR_PETICION = -32600
+    ERROR_METODO = -32601
+    ERROR_PARAMETROS = -32602
+    ERROR_APLICACION = -32000
 
-"""
-        # Información del directorio
-        if os.path.exists(self.entorno_path):
-            stat_info = os.stat(self.entorno_path)
-            from datetime import datetime
-            fecha_creacion = datetime.fromtimestamp(stat_info.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
-            fecha_modificacion = datetime.fromtimestamp(stat_info.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            
-            info_text += f"""Información del Directorio:
-- Creado: {fecha_creacion}
-- Modificado: {fecha_modificacion}
-- Tamaño: {self.calcular_tamaño_directorio(self.entorno_path)}
+    # Marca de los métodos que responden más tarde (p.ej. create)
+    RESPUESTA_DIFERIDA = object()
 
-"""
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.ruta = ruta_socket_rpc()
+        self.servidor = QLocalServer(self)
+        self.servidor.setSocketOptions(QLocalServer.UserAccessOption)
+        self.servidor.newConnection.connect(self.nueva_conexion)
+        self.suscriptores = set()
+        self.entornos = []
+        self.firma_registro = None
+
+        self.metodos = {
+            'list': self.rpc_list,
+            'info': self.rpc_info,
+            'create': self.rpc_create,
+            'delete': self.rpc_delete,
+            'activate': self.rpc_activate,
+            'subscribe': self.rpc_subscribe,
+            'unsubscribe': self.rpc_unsubscribe,
+        }
 
-        # Información de Python del entorno
-        python_path = self.obtener_python_del_entorno()
-        if python_path and os.path.exists(python_path):
-            try:
-                result = subprocess.run([python_path, '--version'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    info_text += f"Versión de Python: {result.stdout.strip()}\n"
-                
-                # Información de la plataforma
-                result = subprocess.run([python_path, '-c', 'import sys; print(f"Plataforma: {sys.platform}")'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    info_text += f"{result.stdout.strip()}\n"
-                
-                # Información de implementación
-                result = subprocess.run([python_path, '-c', 'import sys; print(f"Implementación: {sys.implementation.name}")'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    info_text += f"{result.stdout.strip()}\n"
-                    
-            except Exception as e:
-                info_text += f"Error al obtener información de Python: {str(e)}\n"
+        # Cambios del registro hechos por la propia aplicación o desde fuera
+        self.vigilante = QFileSystemWatcher(self)
+        self.vigilante.addPath(os.path.dirname(ARCHIVO_REGISTRO))
+        self.vigilante.directoryChanged.connect(lambda _d: self.revisar_registro())
+
+    def iniciar(self):
+        if self.servidor.isListening():
+            return True
+        if not self.servidor.listen(self.ruta):
+            QLocalServer.removeServer(self.ruta)
+            if not self.servidor.listen(self.ruta):
+                print(f"No se pudo iniciar el servicio JSON-RPC: {self.servidor.errorString()}")
+                return False
+        self.revisar_registro(notificar=False)
+        return True
+
+    def detener(self):
+        for socket in list(self.suscriptores):
+            socket.disconnectFromServer()
+        self.suscriptores.clear()
+        self.servidor.close()
+
+    # --- Registro en memoria ---
+
+    def revisar_registro(self, notificar=True):
+        """Relee el registro solo si cambió su mtime; notifica altas y bajas a los suscriptores"""
+        try:
+            firma = os.stat(ARCHIVO_REGISTRO).st_mtime_ns
+        except OSError:
+            firma = None
+        if firma == self.firma_registro:
+            return
+        self.firma_registro = firma
+        anteriores = {ruta for _nombre, ruta in self.entornos}
+        self.entornos = self.main_window.obtener_entornos_registrados()
+        actuales = {ruta for _nombre, ruta in self.entornos}
+        if notificar and anteriores != actuales:
+            self.notificar('registry', added=sorted(actuales - anteriores), removed=sorted(anteriores - actuales))
+
+    def resolver_entorno(self, params):
+        """Acepta {'path': ...} o {'name': ...}; devuelve (nombre, ruta)"""
+        self.revisar_registro()
+        ruta = params.get('path')
+        nombre = params.get('name')
+        if not ruta and not nombre:
+            raise ErrorRPC(self.ERROR_PARAMETROS, "Se requiere 'path' o 'name'")
+        for nombre_entorno, ruta_entorno in self.entornos:
+            if (ruta and os.path.normpath(ruta) == ruta_entorno) or (not ruta and nombre == nombre_entorno):
+                return nombre_entorno, ruta_entorno
+        raise ErrorRPC(self.ERROR_APLICACION, f"Entorno no registrado: {ruta or nombre}")
+
+    def resumen_entorno(self, nombre, ruta):
+        return {
+            'name': nombre,
+            'path': ruta,
+            'python': os.path.join(ruta, 'bin', 'python'),
+            'source': self.main_window.origenes_entornos.get(ruta),
+            'in_use': len(self.main_window.procesos_entornos.get(ruta, [])),
+        }
 
-        self.info_basica_text.setPlainText(info_text)
+    # --- Métodos ---
+
+    def rpc_list(self, _socket, params):
+        self.revisar_registro()
+        return [self.resumen_entorno(nombre, ruta) for nombre, ruta in self.entornos]
+
+    def rpc_info(self, _socket, params):
+        nombre, ruta = self.resolver_entorno(params)
+        info = self.resumen_entorno(nombre, ruta)
+        pyvenv = leer_pyvenv_cfg(ruta)
+        info['python_version'] = pyvenv.get('version') or pyvenv.get('version_info')
+        info['home'] = pyvenv.get('home')
+        info['last_used'] = self.main_window.registro_uso.ultimo_uso(ruta)
+        info['processes'] = [{'pid': pid, 'cmdline': cmd} for pid, cmd in self.main_window.procesos_entornos.get(ruta, [])]
+        info['packages'] = {
+            datos['nombre']: datos['version']
+            for datos in self.main_window.cache_metadatos.obtener_paquetes(ruta).values()
+        }
+        return info
+
+    def rpc_activate(self, _socket, params):
+        nombre, ruta = self.resolver_entorno(params)
+        self.main_window.registro_uso.registrar(ruta)
+        bin_dir = os.path.join(ruta, 'bin')
+        activate = os.path.join(bin_dir, 'activate')
+        return {
+            'python': os.path.join(bin_dir, 'python'),
+            # Los entornos conda no tienen bin/activate; basta con 'env'
+            'activate': activate if os.path.exists(activate) else None,
+            'env': {
+                'VIRTUAL_ENV': ruta,
+                'PATH': bin_dir + os.pathsep + os.environ.get('PATH', ''),
+            },
+        }
 
-    def cargar_librerias(self):
-        librerias_text = "Librerias Instaladas\n\n"
-        
-        pip_path = self.obtener_pip_del_entorno()
-        if pip_path and os.path.exists(pip_path):
+    def rpc_delete(self, _socket, params):
+        nombre, ruta = self.resolver_entorno(params)
+        if not params.get('force'):
+            en_uso = escanear_procesos([ruta]).get(ruta)
+            if en_uso:
+                raise ErrorRPC(self.ERROR_APLICACION, f"Entorno en uso por los procesos {[pid for pid, _ in en_uso]}")
+        self.main_window.borrar_entorno(ruta)
+        self.main_window.cargar_entornos_desde_registro()
+        self.revisar_registro()
+        return {'deleted': ruta}
+
+    def rpc_create(self, socket, params):
+        """Crea el entorno con un QProcess; la respuesta se envía al terminar"""
+        nombre = params.get('name')
+        if not nombre or os.sep in nombre or '|' in nombre:
+            raise ErrorRPC(self.ERROR_PARAMETROS, "Nombre de entorno no válido")
+        # El registro guarda rutas absolutas; una base relativa quedaría ligada al cwd del servicio
+        base_dir = os.path.abspath(os.path.expanduser(params.get('base') or self.main_window.config['directorio_base_env']))
+        ruta = os.path.join(base_dir, nombre)
+        if os.path.exists(ruta):
+            raise ErrorRPC(self.ERROR_APLICACION, f"Ya existe: {ruta}")
+        python = params.get('python') or self.main_window.config.get('current_python_interpreter', sys.executable)
+
+        proceso = QProcess(self)
+        proceso.setProcessChannelMode(QProcess.MergedChannels)
+        identificador = socket.property('id_actual')
+
+        def terminado(codigo, _estado):
+            salida = bytes(proceso.readAll()).decode(errors='replace')
+            if codigo == 0:
+                self.main_window.agregar_entorno_a_registro(nombre, base_dir)
+                self.main_window.precompilar_en_segundo_plano(ruta)
+                self.revisar_registro()
+                self.responder(socket, identificador, resultado=self.resumen_entorno(nombre, ruta))
+            else:
+                self.responder(socket, identificador, error=(self.ERROR_APLICACION, salida.strip() or f"venv terminó con código {codigo}"))
+            proceso.deleteLater()
+
+        def error(tipo):
+            # FailedToStart (p.ej. intérprete inexistente) no emite finished: sin esto el cliente esperaría siempre
+            if tipo == QProcess.FailedToStart:
+                self.responder(socket, identificador, error=(self.ERROR_APLICACION, f"{python}: {proceso.errorString()}"))
+                proceso.deleteLater()
+
+        proceso.finished.connect(terminado)
+        proceso.errorOccurred.connect(error)
+        proceso.start(python, ['-m', 'venv', ruta])
+        return ServicioRPC.RESPUESTA_DIFERIDA
+
+    def rpc_subscribe(self, socket, params):
+        self.suscriptores.add(socket)
+        return True
+
+    def rpc_unsubscribe(self, socket, params):
+        self.suscriptores.discard(socket)
+        return True
+
+    # --- Transporte ---
+
+    def nueva_conexion(self):
+        while self.servidor.hasPendingConnections():
+            socket = self.servidor.nextPendingConnection()
+            socket.setProperty('buffer', b'')
+            socket.readyRead.connect(lambda s=socket: self.leer_peticiones(s))
+            socket.disconnected.connect(lambda s=socket: self.suscriptores.discard(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def leer_peticiones(self, socket):
+        buffer = socket.property('buffer') + bytes(socket.readAll())
+        while b'\n' in buffer:
+            linea, buffer = buffer.split(b'\n', 1)
+            if linea.strip():
+                self.atender(socket, linea)
+        socket.setProperty('buffer', buffer)
+
+    def atender(self, socket, linea):
+        try:
+            peticion = json.loads(linea.decode('utf-8'))
+        except ValueError:
+            self.responder(socket, None, error=(self.ERROR_PARSEO, "JSON no válido"))
+            return
+        if not isinstance(peticion, dict) or not isinstance(peticion.get('method'), str):
+            self.responder(socket, None, error=(self.ERROR_PETICION, "Petición no válida"))
+            return
+
+        identificador = peticion.get('id')
+        metodo = self.metodos.get(peticion['method'])
+        params = peticion.get('params') or {}
+        if metodo is None:
+            self.responder(socket, identificador, error=(self.ERROR_METODO, f"Método desconocido: {peticion['method']}"))
+            return
+        if not isinstance(params, dict):
+            self.responder(socket, identificador, error=(self.ERROR_PARAMETROS, "'params' debe ser un objeto"))
+            return
+
+        socket.setProperty('id_actual', identificador)
+        try:
+            resultado = metodo(socket, params)
+        except ErrorRPC as e:
+            self.responder(socket, identificador, error=(e.codigo, str(e)))
+            return
+        except Exception as e:
+            self.responder(socket, identificador, error=(self.ERROR_APLICACION, str(e)))
+            return
+        if resultado is not ServicioRPC.RESPUESTA_DIFERIDA:
+            self.responder(socket, identificador, resultado=resultado)
+
+    def responder(self, socket, identificador, resultado=None, error=None):
+        # Las notificaciones (sin 'id') no llevan respuesta salvo errores de parseo
+        if identificador is None and error is None:
+            return
+        mensaje = {'jsonrpc': '2.0', 'id': identificador}
+        if error:
+            mensaje['error'] = {'code': error[0], 'message': error[1]}
+        else:
+            mensaje['result'] = resultado
+        self.enviar(socket, mensaje)
+
+    def enviar(self, socket, mensaje):
+        if socket.state() == QLocalSocket.ConnectedState:
+            socket.write((json.dumps(mensaje) + '\n').encode('utf-8'))
+            socket.flush()
+
+    def notificar(self, evento, **datos):
+        mensaje = {'jsonrpc': '2.0', 'method': 'changed', 'params': {'event': evento, **datos}}
+        for socket in list(self.suscriptores):
+            self.enviar(socket, mensaje)
+
+# --- Descubrimiento de Terminales ($PATH y archivos .desktop) ---
+
+def directorios_busqueda_terminales():
+    """Directorios de binarios donde buscar terminales: $PATH más Flatpak, Nix, Snap y ~/.local/bin"""
+    usuario = os.environ.get('USER', '')
+    candidatos = os.environ.get('PATH', os.defpath).split(os.pathsep) + [
+        os.path.expanduser('~/.local/bin'),
+        os.path.expanduser('~/.nix-profile/bin'),
+        f'/etc/profiles/per-user/{usuario}/bin',
+        '/run/current-system/sw/bin',
+        '/nix/var/nix/profiles/default/bin',
+        os.path.expanduser('~/.local/share/flatpak/exports/bin'),
+        '/var/lib/flatpak/exports/bin',
+        '/snap/bin',
+        '/usr/local/bin',
+        '/usr/bin',
+    ]
+    directorios = []
+    for directorio in candidatos:
+        if directorio and directorio not in directorios and os.path.isdir(directorio):
+            directorios.append(directorio)
+    return directorios
+
+def directorios_desktop():
+    """Directorios XDG 'applications' con archivos .desktop"""
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    data_dirs = (os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share').split(':')
+    candidatos = [data_home] + data_dirs + [
+        os.path.expanduser('~/.local/share/flatpak/exports/share'),
+        '/var/lib/flatpak/exports/share',
+        os.path.expanduser('~/.nix-profile/share'),
+        '/run/current-system/sw/share',
+    ]
+    directorios = []
+    for base in candidatos:
+        directorio = os.path.join(base, 'applications')
+        if base and directorio not in directorios and os.path.isdir(directorio):
+            directorios.append(directorio)
+    return directorios
+
+def leer_entrada_desktop(ruta):
+    """Lee las claves de la sección [Desktop Entry] de un archivo .desktop"""
+    claves = {}
+    en_seccion = False
+    try:
+        with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+            for linea in f:
+                linea = linea.strip()
+                if linea.startswith('['):
+                    en_seccion = linea == '[Desktop Entry]'
+                    continue
+                if en_seccion and '=' in linea and not linea.startswith('#'):
+                    clave, valor = linea.split('=', 1)
+                    claves.setdefault(clave.strip(), valor.strip())
+    except OSError:
+        pass
+    return claves
+
+
+def quitar_envoltorios_exec(tokens):
+    """Salta los envoltorios habituales de una línea Exec: `env VAR=valor ...` y `sh -c 'comando'`"""
+    while tokens:
+        binario = os.path.basename(tokens[0])
+        if binario == 'env':
+            tokens = tokens[1:]
+            while tokens and (tokens[0].startswith('-') or '=' in tokens[0]):
+                # -u y -C llevan su valor en el siguiente token
+                tokens = tokens[2:] if tokens[0] in ('-u', '-C', '--unset', '--chdir') else tokens[1:]
+        elif binario == 'exec':
+            tokens = tokens[1:]
+        elif binario in ('sh', 'bash', 'dash') and len(tokens) > 2 and tokens[1] == '-c':
             try:
-                result = subprocess.run([pip_path, 'list', '--format=freeze'], capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    librerias = result.stdout.strip().split('\n')
-                    if librerias and librerias[0]:
-                        for libreria in sorted(librerias):
-                            librerias_text += f"{libreria}\n"
-                    else:
-                        librerias_text += "No se encontraron librerías instaladas.\n"
-                else:
-                    librerias_text += f"Error al obtener la lista de librerías: {result.stderr}\n"
-            except Exception as e:
-                librerias_text += f"Error al ejecutar pip: {str(e)}\n"
+                tokens = shlex.split(tokens[2])
+            except ValueError:
+                return []
         else:
-            librerias_text += "No se pudo encontrar el ejecutable de pip en el entorno virtual.\n"
+            return tokens
+    return tokens
 
-        self.librerias_text.setPlainText(librerias_text)
+class DescubridorTerminales(QObject):
+    """Índice de terminales instaladas con caché persistente.
 
-    def obtener_python_del_entorno(self):
-        # Buscar el ejecutable de Python en el entorno virtual
-        posibles_rutas = [
-            os.path.join(self.entorno_path, 'bin', 'python'),
-            os.path.join(self.entorno_path, 'bin', 'python3'),
-            os.path.join(self.entorno_path, 'Scripts', 'python.exe') if sys.platform == 'win32' else ''
-        ]
-        
-        for ruta in posibles_rutas:
-            if os.path.exists(ruta):
-                return ruta
-        return None
+    La caché se invalida con el mtime de los directorios de binarios y de .desktop
+    (cambia al instalar o desinstalar programas), y se revalida en segundo plano.
+    """
+    actualizado = Signal()
 
-    def obtener_pip_del_entorno(self):
-        # Buscar el ejecutable de pip en el entorno virtual
-        posibles_rutas = [
-            os.path.join(self.entorno_path, 'bin', 'pip'),
-            os.path.join(self.entorno_path, 'bin', 'pip3'),
-            os.path.join(self.entorno_path, 'Scripts', 'pip.exe') if sys.platform == 'win32' else ''
-        ]
-        
-        for ruta in posibles_rutas:
-            if os.path.exists(ruta):
-                return ruta
-        return None
+    VERSION_CACHE = 1
 
-    def calcular_tamaño_directorio(self, path):
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                if os.path.exists(filepath):
-                    total_size += os.path.getsize(filepath)
-        
-        # Convertir a formato legible
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if total_size < 1024.0:
-                return f"{total_size:.1f} {unit}"
-            total_size /= 1024.0
-        return f"{total_size:.1f} TB"
+    def __init__(self, archivo_cache, parent=None):
+        super().__init__(parent)
+        self.archivo_cache = archivo_cache
+        self.terminales = []
+        self.firma = {}
+        self.refrescando = False
+        # Protege índice y archivo de caché entre el refresco síncrono y el del hilo
+        self.bloqueo = threading.Lock()
+        self.cargar_cache()
+
+    def cargar_cache(self):
+        if os.path.exists(self.archivo_cache):
+            try:
+                with open(self.archivo_cache, 'r') as f:
+                    datos = json.load(f)
+                if datos.get('version') == self.VERSION_CACHE:
+                    self.terminales = datos.get('terminales', [])
+                    self.firma = datos.get('firma', {})
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def calcular_firma():
+        firma = {}
+        for directorio in directorios_busqueda_terminales() + directorios_desktop():
+            try:
+                firma[directorio] = os.stat(directorio).st_mtime_ns
+            except OSError:
+                pass
+        return firma
+
+    @staticmethod
+    def escanear():
+        """Busca las terminales conocidas en los directorios de binarios y en los .desktop"""
+        ejecutables = {}
+        for directorio in directorios_busqueda_terminales():
+            try:
+                nombres = os.listdir(directorio)
+            except OSError:
+                continue
+            for nombre in nombres:
+                ejecutables.setdefault(nombre, os.path.join(directorio, nombre))
+
+        encontradas = {}
+        for terminal, binarios in terminal_ejecutables.items():
+            for binario in binarios:
+                ruta = ejecutables.get(binario)
+                if ruta and os.access(ruta, os.X_OK):
+                    encontradas[terminal] = ruta
+                    break
 
-# --- Diálogo para Selección de Python ---
+        # Terminales registradas en .desktop (Flatpak o fuera del PATH)
+        binario_a_terminal = {b: t for t, binarios in terminal_ejecutables.items() for b in binarios}
+        for directorio in directorios_desktop():
+            try:
+                archivos = [a for a in os.listdir(directorio) if a.endswith('.desktop')]
+            except OSError:
+                continue
+            for archivo in archivos:
+                entrada = leer_entrada_desktop(os.path.join(directorio, archivo))
+                if 'TerminalEmulator' not in entrada.get('Categories', '').split(';'):
+                    continue
+                if entrada.get('Hidden') == 'true' or not entrada.get('Exec'):
+                    continue
+                try:
+                    tokens = [t for t in shlex.split(entrada['Exec']) if not t.startswith('%')]
+                except ValueError:
+                    continue
+                tokens = quitar_envoltorios_exec(tokens)
+                if not tokens:
+                    continue
 
-class SeleccionadorPythonDialog(QDialog):
-    def __init__(self, parent=None, initial_path=None):
-        super().__init__(parent)
-        self.parent = parent
-        self.selected_path = initial_path
-        self.setWindowTitle(self.tr("Seleccionar intérprete de Python"))
-        self.setup_ui()
-        self.setFixedSize(500, 450)
+                if os.path.basename(tokens[0]) == 'flatpak' and 'run' in tokens:
+                    app_id = [t for t in tokens[tokens.index('run') + 1:] if not t.startswith('-')]
+                    app_id = app_id[0] if app_id else ''
+                    terminal = terminal_flatpak.get(app_id, entrada.get('Name', app_id))
+                    ruta = ejecutables.get(app_id)
+                else:
+                    binario = os.path.basename(tokens[0])
+                    terminal = binario_a_terminal.get(binario, entrada.get('Name', binario))
+                    ruta = tokens[0] if os.path.isabs(tokens[0]) else ejecutables.get(binario)
 
-    def tr(self, text):
-        return QCoreApplication.translate("SeleccionadorPythonDialog", text)
-        
-    def setup_ui(self):
-        layout = QVBoxLayout(self)
+                if terminal in encontradas or not ruta or not os.access(ruta, os.X_OK):
+                    continue
+                encontradas[terminal] = ruta
+
+        terminales = []
+        for terminal, ruta in encontradas.items():
+            # Las terminales desconocidas encontradas por su .desktop usan la convención -e
+            comando = terminal_commands.get(terminal, "-e '{command}'")
+            terminales.append({'nombre': terminal, 'tipo': 'sistema', 'ruta': ruta, 'comando': comando})
+        return terminales
+
+    def obtener_terminales(self):
+        """Devuelve las terminales del índice; solo escanea de forma síncrona si no hay caché"""
+        if not self.firma:
+            self.refrescar()
+        with self.bloqueo:
+            return list(self.terminales)
+
+    def refrescar(self):
+        # El escaneo va fuera del cerrojo: obtener_terminales se llama desde el hilo de la GUI
+        firma = self.calcular_firma()
+        with self.bloqueo:
+            if firma == self.firma:
+                return False
+        terminales = self.escanear()
+        with self.bloqueo:
+            self.terminales = terminales
+            self.firma = firma
+            try:
+                escribir_json_atomico(self.archivo_cache, {
+                    'version': self.VERSION_CACHE, 'firma': self.firma, 'terminales': self.terminales
+                })
+            except OSError as e:
+                print(f"No se pudo guardar la caché de terminales: {e}")
+            return True
+
+    def refrescar_en_segundo_plano(self):
+        if self.refrescando:
+            return
+        self.refrescando = True
 
-        explanation_label = QLabel(self.tr("Elige la ruta del ejecutable de Python para crear los entornos virtuales:"))
-        layout.addWidget(explanation_label)
-        
-        self.path_input = QLineEdit() 
-        self.path_input.setPlaceholderText(self.tr("Ruta del ejecutable"))
-        if self.selected_path:
-            self.path_input.setText(self.selected_path)
+        def tarea():
+            try:
+                if self.refrescar():
+                    self.actualizado.emit()
+            finally:
+                self.refrescando = False
+
+        threading.Thread(target=tarea, daemon=True).start()
+
+# --- Descubrimiento de Entornos de Herramientas (pyenv, poetry, pipenv, conda, uv...) ---
+
+MARCADORES_PROYECTO = ('pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'Pipfile')
+DIRECTORIOS_IGNORADOS = {'node_modules', '.git', '.cache', '.local', 'site-packages', '__pycache__'}
+VERSION_CACHE_DESCUBRIMIENTO = 1
+CADUCIDAD_DESCUBRIMIENTO_PROYECTOS = 6 * 60 * 60
+
+def es_entorno_python(path):
+    """Un venv (pyvenv.cfg) o un entorno conda (conda-meta) con intérprete en bin/"""
+    return (
+        os.path.isdir(path)
+        and (os.path.exists(os.path.join(path, 'pyvenv.cfg')) or os.path.isdir(os.path.join(path, 'conda-meta')))
+        and os.path.exists(os.path.join(path, 'bin', 'python'))
+    )
+
+def script_activacion_shell(entorno_path):
+    """Líneas de bash que activan el entorno. Los entornos conda (salvo base) no tienen bin/activate:
+    se usa 'conda activate' si se encuentra conda, o se reproduce lo esencial a mano."""
+    activate = os.path.join(entorno_path, 'bin', 'activate')
+    if os.path.exists(activate) or not os.path.isdir(os.path.join(entorno_path, 'conda-meta')):
+        return f'source "{activate}"\n'
+
+    # <instalación>/envs/<nombre> -> <instalación>/condabin/conda
+    instalacion = os.path.dirname(os.path.dirname(entorno_path))
+    candidatos = [
+        os.environ.get('CONDA_EXE'), os.path.join(instalacion, 'condabin', 'conda'),
+        os.path.join(instalacion, 'bin', 'conda'), shutil.which('conda'),
+    ]
+    conda = next((c for c in candidatos if c and os.access(c, os.X_OK)), None)
+    if conda:
+        return f'eval "$("{conda}" shell.bash hook)"\nconda activate "{entorno_path}"\n'
+    return (
+        f'export CONDA_PREFIX="{entorno_path}" CONDA_DEFAULT_ENV="{os.path.basename(entorno_path)}"\n'
+        f'export PATH="{entorno_path}/bin:$PATH"\n'
+        f'for s in "{entorno_path}"/etc/conda/activate.d/*.sh; do [ -f "$s" ] && . "$s"; done\n'
+    )
+
+def entornos_en_directorio(directorio):
+    """Entornos que son subdirectorios directos de 'directorio'"""
+    if not os.path.isdir(directorio):
+        return []
+    return [
+        os.path.join(directorio, nombre) for nombre in sorted(os.listdir(directorio))
+        if es_entorno_python(os.path.join(directorio, nombre))
+    ]
+
+def directorio_datos_usuario(variable, relativo):
+    return os.environ.get(variable) or os.path.join(QDir.homePath(), relativo)
+
+def descubrir_pyenv():
+    raiz = os.environ.get('PYENV_ROOT') or os.path.join(QDir.homePath(), '.pyenv')
+    versiones = os.path.join(raiz, 'versions')
+    entornos = []
+    if os.path.isdir(versiones):
+        for version in os.listdir(versiones):
+            entornos.extend(entornos_en_directorio(os.path.join(versiones, version, 'envs')))
+    return entornos
+
+def descubrir_poetry():
+    directorio = os.environ.get('POETRY_VIRTUALENVS_PATH') or os.path.join(
+        directorio_datos_usuario('XDG_CACHE_HOME', '.cache'), 'pypoetry', 'virtualenvs')
+    return entornos_en_directorio(directorio)
+
+def descubrir_pipenv():
+    return entornos_en_directorio(os.path.join(directorio_datos_usuario('XDG_DATA_HOME', os.path.join('.local', 'share')), 'virtualenvs'))
+
+def descubrir_virtualenvwrapper():
+    return entornos_en_directorio(os.environ.get('WORKON_HOME') or os.path.join(QDir.homePath(), '.virtualenvs'))
+
+def descubrir_conda():
+    entornos = []
+    # conda anota cada entorno que crea en ~/.conda/environments.txt
+    registro = os.path.join(QDir.homePath(), '.conda', 'environments.txt')
+    if os.path.exists(registro):
+        with open(registro, 'r', encoding='utf-8', errors='replace') as f:
+            entornos.extend(l.strip() for l in f if l.strip() and es_entorno_python(l.strip()))
+    for instalacion in ('miniconda3', 'anaconda3', 'miniforge3', 'mambaforge', '.conda'):
+        entornos.extend(entornos_en_directorio(os.path.join(QDir.homePath(), instalacion, 'envs')))
+    return entornos
+
+def descubrir_uv():
+    return entornos_en_directorio(os.path.join(directorio_datos_usuario('XDG_DATA_HOME', os.path.join('.local', 'share')), 'uv', 'tools'))
+
+def descubrir_proyectos(raices, profundidad=3):
+    """Entornos .venv (o venv) junto a marcadores de proyecto bajo las raíces indicadas"""
+    entornos = []
+    for raiz in raices:
+        raiz = os.path.expanduser(raiz)
+        nivel_raiz = raiz.rstrip(os.sep).count(os.sep)
+        for dirpath, dirnames, filenames in os.walk(raiz):
+            if any(m in filenames for m in MARCADORES_PROYECTO):
+                for nombre in ('.venv', 'venv'):
+                    if nombre in dirnames and es_entorno_python(os.path.join(dirpath, nombre)):
+                        entornos.append(os.path.join(dirpath, nombre))
+            if dirpath.count(os.sep) - nivel_raiz >= profundidad:
+                dirnames[:] = []
+            else:
+                dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in DIRECTORIOS_IGNORADOS and d != 'venv']
+    return entornos
+
+ADAPTADORES_DESCUBRIMIENTO = {
+    'pyenv': descubrir_pyenv,
+    'poetry': descubrir_poetry,
+    'pipenv': descubrir_pipenv,
+    'virtualenvwrapper': descubrir_virtualenvwrapper,
+    'conda': descubrir_conda,
+    'uv': descubrir_uv,
+}
 
-        self.list_widget = QListWidget()
-        self.list_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.list_widget.setSelectionMode(QListWidget.SingleSelection)
-        self.list_widget.itemSelectionChanged.connect(self.update_path_from_list)
-        layout.addWidget(self.list_widget)
-        
-        self.cargar_opciones_python() 
 
-        path_layout = QHBoxLayout()
-        path_layout.addWidget(self.path_input) 
-        
-        self.btn_browse = QPushButton(self.tr("Buscar"))
-        self.btn_browse.clicked.connect(self.browse_for_python)
-        path_layout.addWidget(self.btn_browse)
-        layout.addLayout(path_layout)
-        
-        buttons_layout = QHBoxLayout()
-        buttons_layout.addStretch()
-        
-        self.btn_cancel = QPushButton(self.tr("Cancelar"))
-        self.btn_cancel.clicked.connect(self.reject)
-        buttons_layout.addWidget(self.btn_cancel)
-        
-        self.btn_save = QPushButton(self.tr("Aceptar"))
-        self.btn_save.clicked.connect(self.accept_selection)
-        buttons_layout.addWidget(self.btn_save)
-        
-        layout.addLayout(buttons_layout)
+def descubrir_entornos(raices_proyectos, archivo_cache, forzar=False, progreso=None):
+    """Ejecuta todos los adaptadores en paralelo y devuelve {ruta_entorno: origen}.
+    Los resultados se guardan en caché: pyenv y conda se reutilizan mientras no cambie el mtime
+    de sus ubicaciones y el recorrido de proyectos (el más caro) mientras no caduque."""
+    cache = {}
+    if os.path.exists(archivo_cache):
+        try:
+            with open(archivo_cache, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') != VERSION_CACHE_DESCUBRIMIENTO:
+                cache = {}
+        except (OSError, ValueError):
+            cache = {}
+    adaptadores_cache = {} if forzar else cache.get('adaptadores', {})
+
+    def firma(origen):
+        if origen == 'proyecto':
+            return [sorted(raices_proyectos), int(time.time() // CADUCIDAD_DESCUBRIMIENTO_PROYECTOS)]
+        ubicaciones = {
+            'pyenv': [os.path.join(os.environ.get('PYENV_ROOT') or os.path.join(QDir.homePath(), '.pyenv'), 'versions')],
+            'conda': [os.path.join(QDir.homePath(), '.conda', 'environments.txt')],
+        }.get(origen)
+        if ubicaciones is None:
+            # El resto de adaptadores solo lista un directorio: no merece la pena cachearlos
+            return None
+        return [os.stat(u).st_mtime if os.path.exists(u) else None for u in ubicaciones]
+
+    def ejecutar(origen, funcion):
+        try:
+            return origen, funcion()
+        except OSError as e:
+            print(f"Error en el descubrimiento '{origen}': {e}")
+            return origen, []
+
+    tareas = dict(ADAPTADORES_DESCUBRIMIENTO)
+    tareas['proyecto'] = lambda: descubrir_proyectos(raices_proyectos)
+
+    resultados = {}
+    hechos = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tareas)) as ejecutor:
+        futuros = []
+        for origen, funcion in tareas.items():
+            anterior = adaptadores_cache.get(origen)
+            firma_actual = firma(origen)
+            if anterior and firma_actual is not None and anterior.get('firma') == firma_actual:
+                resultados[origen] = [r for r in anterior['rutas'] if os.path.isdir(r)]
+                continue
+            futuros.append(ejecutor.submit(ejecutar, origen, funcion))
+        for futuro in concurrent.futures.as_completed(futuros):
+            origen, rutas = futuro.result()
+            resultados[origen] = rutas
+            hechos += 1
+            if progreso:
+                progreso(hechos, len(futuros))
+
+    escribir_json_atomico(archivo_cache, {
+        'version': VERSION_CACHE_DESCUBRIMIENTO,
+        'adaptadores': {o: {'firma': firma(o), 'rutas': r} for o, r in resultados.items()},
+    })
+
+    encontrados = {}
+    for origen in list(tareas):
+        for ruta in resultados.get(origen, []):
+            encontrados.setdefault(os.path.normpath(ruta), origen)
+    return encontrados
+
+# --- Versiones, Requisitos y Marcadores (PEP 440 / PEP 508) ---
+
+PATRON_VERSION = re.compile(
+    r'^\s*v?(?:(?P<epoch>\d+)!)?(?P<release>\d+(?:\.\d+)*)'
+    r'(?:[-_.]?(?P<pre_l>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_n>\d+)?)?'
+    r'(?:-(?P<post_n1>\d+)|[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>\d+)?)?'
+    r'(?P<dev>[-_.]?dev[-_.]?(?P<dev_n>\d+)?)?'
+    r'(?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?\s*$',
+    re.IGNORECASE
+)
+ORDEN_PRERELEASE = {'a': 0, 'alpha': 0, 'b': 1, 'beta': 1, 'c': 2, 'rc': 2, 'pre': 2, 'preview': 2}
+
+@functools.lru_cache(maxsize=None)
+def clave_version(version):
+    """Clave ordenable de una versión PEP 440, o None si no es válida.
+    dev < pre-release < final < post-release; los ceros finales del release no cuentan."""
+    coincidencia = PATRON_VERSION.match(version or '')
+    if not coincidencia:
+        return None
+    g = coincidencia.groupdict()
+    release = tuple(int(p) for p in g['release'].split('.'))
+    release_normalizado = release
+    while len(release_normalizado) > 1 and release_normalizado[-1] == 0:
+        release_normalizado = release_normalizado[:-1]
+    post = g['post_n1'] or g['post_n2'] or ('0' if g['post_l'] else None)
+    dev = g['dev_n'] or ('0' if g['dev'] else None)
+    if g['pre_l']:
+        pre = (1, ORDEN_PRERELEASE[g['pre_l'].lower()], int(g['pre_n'] or 0))
+    elif dev is not None and post is None:
+        pre = (0,)
+    else:
+        pre = (2,)
+    return (
+        int(g['epoch'] or 0),
+        release_normalizado,
+        pre,
+        (int(post),) if post is not None else (-1,),
+        (0, int(dev)) if dev is not None else (1,),
+    ), release
+
+def _comparador(operador, objetivo):
+    """Compila una cláusula (p.ej. '>=', '1.2') a una función (version, clave_version(version)) -> bool"""
+    if operador == '===':
+        return lambda version, clave: version == objetivo
+    if objetivo.endswith('.*') and operador in ('==', '!='):
+        prefijo = tuple(int(p) for p in objetivo[:-2].split('.') if p.isdigit())
+        def coincide_prefijo(version, clave):
+            if clave is None:
+                return False
+            release = clave[1]
+            return (release + (0,) * len(prefijo))[:len(prefijo)] == prefijo
+        if operador == '==':
+            return coincide_prefijo
+        return lambda version, clave: clave is not None and not coincide_prefijo(version, clave)
+
+    datos_objetivo = clave_version(objetivo)
+    if datos_objetivo is None:
+        return lambda version, clave: False
+    clave_objetivo = datos_objetivo[0]
+    if operador == '~=':
+        partes = datos_objetivo[1]
+        prefijo = partes[:-1] if len(partes) > 1 else partes
+        igual_prefijo = _comparador('==', '.'.join(str(p) for p in prefijo) + '.*')
+        return lambda version, clave: clave is not None and clave[0] >= clave_objetivo and igual_prefijo(version, clave)
+    comparaciones = {
+        '==': lambda c: c == clave_objetivo,
+        '!=': lambda c: c != clave_objetivo,
+        '>=': lambda c: c >= clave_objetivo,
+        '<=': lambda c: c <= clave_objetivo,
+        '>': lambda c: c > clave_objetivo,
+        '<': lambda c: c < clave_objetivo,
+    }
+    comparar = comparaciones.get(operador)
+    if comparar is None:
+        return lambda version, clave: False
+
+    # PEP 440: '<V' excluye las pre-releases de V salvo que V lo sea (<2.0 no admite 2.0rc1 ni 2.0.dev0)
+    # y '>V' excluye las post-releases de V salvo que V sea post o dev (>1.0 no admite 1.0.post1)
+    epoca, release, pre, post, dev = clave_objetivo
+    if operador == '<' and pre[0] == 2 and dev == (1,):
+        # V.dev0 es la primera pre-release de V: es el límite real (sin post, dev ordena como pre (0,))
+        limite = (epoca, release, (0,) if post == (-1,) else pre, post, (0, 0))
+        return lambda version, clave: clave is not None and clave[0] < limite
+    if operador == '>' and post == (-1,) and dev == (1,):
+        return lambda version, clave: (
+            clave is not None and comparar(clave[0])
+            and not (clave[0][:3] == clave_objetivo[:3] and clave[0][3] != (-1,))
+        )
+    return lambda version, clave: clave is not None and comparar(clave[0])
+
+PATRON_CLAUSULA = re.compile(r'\s*(===|~=|==|!=|<=|>=|<|>)\s*([^\s,;]+)\s*')
+
+@functools.lru_cache(maxsize=None)
+def compilar_especificador(especificador):
+    """Compila '>=1.0,<2,!=1.5.*' a una función version -> bool (vacío = cualquier versión).
+    Las cláusulas se compilan una sola vez y se reutilizan en todas las comprobaciones."""
+    clausulas = []
+    for parte in (especificador or '').split(','):
+        if not parte.strip():
+            continue
+        coincidencia = PATRON_CLAUSULA.fullmatch(parte)
+        if not coincidencia:
+            return lambda version: False
+        clausulas.append(_comparador(*coincidencia.groups()))
+    if not clausulas:
+        return lambda version: True
+    def cumple(version):
+        datos = clave_version(version)
+        return all(c(version, datos) for c in clausulas)
+    return cumple
+
+PATRON_REQUISITO = re.compile(
+    r'^\s*(?P<nombre>[A-Za-z0-9][A-Za-z0-9._-]*)\s*'
+    r'(?:\[(?P<extras>[^\]]*)\])?\s*'
+    r'(?:@\s*(?P<url>[^;\s]+)\s*|\(?(?P<especificador>[^;()]*)\)?\s*)'
+    r'(?:;\s*(?P<marcador>.+))?$'
+)
 
-    def get_python_version_and_path(self, path):
+def parsear_requisito(linea):
+    """Requires-Dist -> [nombre_normalizado, extras, especificador, marcador] o None"""
+    coincidencia = PATRON_REQUISITO.match(linea)
+    if not coincidencia:
+        return None
+    g = coincidencia.groupdict()
+    extras = sorted(normalizar_nombre_paquete(e) for e in (g['extras'] or '').split(',') if e.strip())
+    especificador = ','.join(p.strip() for p in (g['especificador'] or '').split(',') if p.strip())
+    return [normalizar_nombre_paquete(g['nombre']), extras, especificador, (g['marcador'] or '').strip()]
+
+PATRON_TOKEN_MARCADOR = re.compile(r'\s*(\(|\)|===|==|!=|~=|<=|>=|<|>|not\s+in\b|in\b|and\b|or\b|\'[^\']*\'|"[^"]*"|[A-Za-z_.]+)')
+VARIABLES_VERSION_MARCADOR = {'python_version', 'python_full_version', 'implementation_version'}
+
+@functools.lru_cache(maxsize=None)
+def compilar_marcador(marcador):
+    """Compila un marcador PEP 508 a una función entorno -> bool"""
+    tokens = []
+    posicion = 0
+    while posicion < len(marcador):
+        coincidencia = PATRON_TOKEN_MARCADOR.match(marcador, posicion)
+        if not coincidencia:
+            if marcador[posicion:].strip():
+                raise ValueError(f"Marcador no válido: {marcador}")
+            break
+        tokens.append(re.sub(r'\s+', ' ', coincidencia.group(1)))
+        posicion = coincidencia.end()
+
+    indice = 0
+    def siguiente():
+        nonlocal indice
+        token = tokens[indice] if indice < len(tokens) else None
+        indice += 1
+        return token
+
+    def valor(token):
+        if token[0] in '\'"':
+            return lambda entorno: token[1:-1]
+        return lambda entorno: entorno.get(token, '')
+
+    def comparacion():
+        token = siguiente()
+        if token == '(':
+            resultado = expresion_or()
+            siguiente()  # ')'
+            return resultado
+        izquierda, operador, derecha = token, siguiente(), siguiente()
+        if None in (operador, derecha):
+            raise ValueError(f"Marcador no válido: {marcador}")
+        obtener_izq, obtener_der = valor(izquierda), valor(derecha)
+        es_version = izquierda in VARIABLES_VERSION_MARCADOR or derecha in VARIABLES_VERSION_MARCADOR
+        def evaluar(entorno):
+            a, b = obtener_izq(entorno), obtener_der(entorno)
+            if izquierda == 'extra' or derecha == 'extra':
+                a, b = normalizar_nombre_paquete(a), normalizar_nombre_paquete(b)
+            if operador == 'in':
+                return a in b
+            if operador == 'not in':
+                return a not in b
+            if es_version and operador not in ('===',) and clave_version(a) and clave_version(b):
+                return compilar_especificador(f"{operador}{b}")(a)
+            return {'==': a == b, '!=': a != b, '===': a == b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}.get(operador, False)
+        return evaluar
+
+    def expresion_and():
+        partes = [comparacion()]
+        while indice < len(tokens) and tokens[indice] == 'and':
+            siguiente()
+            partes.append(comparacion())
+        return partes[0] if len(partes) == 1 else (lambda entorno: all(p(entorno) for p in partes))
+
+    def expresion_or():
+        partes = [expresion_and()]
+        while indice < len(tokens) and tokens[indice] == 'or':
+            siguiente()
+            partes.append(expresion_and())
+        return partes[0] if len(partes) == 1 else (lambda entorno: any(p(entorno) for p in partes))
+
+    return expresion_or()
+
+def entorno_marcadores(entorno_path):
+    """Variables de marcador del intérprete del entorno, sin ejecutarlo (pyvenv.cfg + plataforma actual)"""
+    pyvenv = leer_pyvenv_cfg(entorno_path)
+    version = pyvenv.get('version') or pyvenv.get('version_info') or platform.python_version()
+    version = '.'.join(version.split('.')[:3])
+    implementacion = pyvenv.get('implementation', 'CPython')
+    return {
+        'python_version': '.'.join(version.split('.')[:2]),
+        'python_full_version': version,
+        'implementation_name': implementacion.lower(),
+        'implementation_version': version,
+        'platform_python_implementation': implementacion,
+        'sys_platform': sys.platform,
+        'platform_system': platform.system(),
+        'platform_machine': platform.machine(),
+        'platform_release': platform.release(),
+        'os_name': os.name,
+        'extra': '',
+    }
+
+def evaluar_marcador(marcador, entorno):
+    if not marcador:
+        return True
+    try:
+        return compilar_marcador(marcador)(entorno)
+    except (ValueError, IndexError):
+        # Un marcador que no entendemos no debe ocultar la dependencia
+        return True
+
+# --- Caché de Metadatos de Paquetes (site-packages) ---
+
+def normalizar_nombre_paquete(nombre):
+    """Normaliza el nombre de un paquete según PEP 503"""
+    return re.sub(r"[-_.]+", "-", nombre).lower()
+
+def buscar_site_packages(entorno_path):
+    """Devuelve los directorios site-packages de un entorno virtual"""
+    rutas = []
+    for lib_dir in ('lib', 'lib64'):
+        base = os.path.join(entorno_path, lib_dir)
+        if not os.path.isdir(base):
+            continue
+        for nombre in os.listdir(base):
+            site_packages = os.path.join(base, nombre, 'site-packages')
+            if nombre.startswith('python') and os.path.isdir(site_packages):
+                real = os.path.realpath(site_packages)
+                if real not in [os.path.realpath(r) for r in rutas]:
+                    rutas.append(site_packages)
+    return rutas
+
+def abrir_sin_atime(ruta):
+    """Abre para lectura sin actualizar el atime: RegistroUso.ultimo_uso usa el de pyvenv.cfg
+    como señal de uso y leerlo desde la aplicación no debe contar como uso.
+    O_NOATIME solo se permite al propietario; si no, se abre normalmente."""
+    try:
+        descriptor = os.open(ruta, os.O_RDONLY | getattr(os, 'O_NOATIME', 0))
+    except PermissionError:
+        descriptor = os.open(ruta, os.O_RDONLY)
+    return open(descriptor, 'r', encoding='utf-8', errors='replace')
+
+def leer_pyvenv_cfg(entorno_path):
+    """Lee las claves de pyvenv.cfg de un entorno"""
+    claves = {}
+    ruta = os.path.join(entorno_path, 'pyvenv.cfg')
+    if os.path.exists(ruta):
+        with abrir_sin_atime(ruta) as f:
+            for linea in f:
+                if '=' in linea:
+                    clave, valor = linea.split('=', 1)
+                    claves[clave.strip()] = valor.strip()
+    return claves
+
+def leer_metadatos_dist_info(dist_info_path):
+    """Lee nombre y versión de las cabeceras del METADATA (o PKG-INFO) de un dist-info"""
+    nombre, version = None, None
+    for archivo in ('METADATA', 'PKG-INFO'):
+        ruta = os.path.join(dist_info_path, archivo)
+        if not os.path.exists(ruta):
+            continue
+        with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+            for linea in f:
+                if not linea.strip():
+                    # Fin de las cabeceras, el resto es la descripción
+                    break
+                if linea.startswith('Name:'):
+                    nombre = linea[5:].strip()
+                elif linea.startswith('Version:'):
+                    version = linea[8:].strip()
+        break
+
+    if not nombre or not version:
+        # Fallback: obtener del nombre del directorio (nombre-version.dist-info)
+        base = os.path.basename(dist_info_path).rsplit('.', 1)[0]
+        partes = base.split('-')
+        nombre = nombre or partes[0]
+        version = version or (partes[1] if len(partes) > 1 else "Desconocida")
+    return nombre, version
+
+def leer_requires_dist(dist_info_path):
+    """Requisitos declarados por un paquete, ya parseados: [[nombre, extras, especificador, marcador]]"""
+    requisitos = []
+    if dist_info_path.endswith('.egg-info'):
+        # requires.txt: secciones [extra], [:marcador] o [extra:marcador]
+        ruta = os.path.join(dist_info_path, 'requires.txt')
+        if os.path.exists(ruta):
+            marcador_seccion = ''
+            with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+                for linea in f:
+                    linea = linea.strip()
+                    if not linea or linea.startswith('#'):
+                        continue
+                    if linea.startswith('['):
+                        extra, _, marcador = linea[1:-1].partition(':')
+                        partes = [f'extra == "{extra}"'] if extra else []
+                        partes += [f'({marcador})'] if marcador else []
+                        marcador_seccion = ' and '.join(partes)
+                        continue
+                    requisito = parsear_requisito(linea + (f'; {marcador_seccion}' if marcador_seccion else ''))
+                    if requisito:
+                        requisitos.append(requisito)
+        return requisitos
+
+    ruta = os.path.join(dist_info_path, 'METADATA')
+    if os.path.exists(ruta):
+        with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+            for linea in f:
+                if not linea.strip():
+                    break
+                if linea.startswith('Requires-Dist:'):
+                    requisito = parsear_requisito(linea[len('Requires-Dist:'):].strip())
+                    if requisito:
+                        requisitos.append(requisito)
+    return requisitos
+
+def leer_record(dist_info_path):
+    """Lee el archivo RECORD de un dist-info y devuelve {ruta_relativa: (hash, tamaño)}"""
+    archivos = {}
+    ruta_record = os.path.join(dist_info_path, 'RECORD')
+    if not os.path.exists(ruta_record):
+        return archivos
+    with open(ruta_record, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        for fila in csv.reader(f):
+            if not fila:
+                continue
+            ruta = fila[0]
+            hash_archivo = fila[1] if len(fila) > 1 else ''
+            tamaño = fila[2] if len(fila) > 2 else ''
+            archivos[ruta] = (hash_archivo, int(tamaño) if tamaño.isdigit() else None)
+    return archivos
+
+def formatear_tamaño(total_size):
+    """Convierte un tamaño en bytes a formato legible"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if total_size < 1024.0:
+            return f"{total_size:.1f} {unit}"
+        total_size /= 1024.0
+    return f"{total_size:.1f} TB"
+
+def calcular_tamaño_paquete(dist_info_path):
+    """Suma la columna de tamaño del RECORD; las entradas sin tamaño (.pyc, RECORD) se consultan con stat"""
+    site_packages = os.path.dirname(dist_info_path)
+    record = leer_record(dist_info_path)
+    if not record:
+        # Sin RECORD (egg-info o instalación manual): solo se cuenta el propio directorio de metadatos
+        return sum(
+            os.path.getsize(os.path.join(dist_info_path, n))
+            for n in os.listdir(dist_info_path)
+            if os.path.isfile(os.path.join(dist_info_path, n))
+        )
+    total = 0
+    for ruta, (_hash, tamaño) in record.items():
+        if tamaño is None:
+            try:
+                tamaño = os.stat(os.path.join(site_packages, ruta)).st_size
+            except OSError:
+                tamaño = 0
+        total += tamaño
+    return total
+
+def construir_grafo_dependencias(paquetes, variables):
+    """Grafo de dependencias de un entorno a partir de los requisitos cacheados.
+
+    Evalúa los marcadores para el intérprete del entorno y expande los extras pedidos por
+    otros paquetes. Devuelve {'dependencias': {pkg: [(dep, especificador, estado)]},
+    'inversas': {pkg: set}, 'huerfanos': [...], 'insatisfechos': [(pkg, dep, especificador, estado)]}.
+    estado: 'ok', 'falta' o 'version'.
+    """
+    aristas = {nombre: [] for nombre in paquetes}
+    extras_expandidos = {nombre: set() for nombre in paquetes}
+    cola = collections.deque((nombre, '') for nombre in paquetes)
+    while cola:
+        nombre, extra = cola.popleft()
+        variables_extra = {**variables, 'extra': extra} if extra else variables
+        for dep, dep_extras, especificador, marcador in paquetes[nombre].get('requiere', []):
+            # En la pasada de un extra solo cuentan los requisitos condicionados a extras
+            if extra and 'extra' not in marcador:
+                continue
+            if not evaluar_marcador(marcador, variables_extra) or dep == nombre:
+                continue
+            aristas[nombre].append((dep, especificador))
+            if dep in paquetes:
+                for e in dep_extras:
+                    if e not in extras_expandidos[dep]:
+                        extras_expandidos[dep].add(e)
+                        cola.append((dep, e))
+
+    dependencias = {}
+    inversas = {nombre: set() for nombre in paquetes}
+    insatisfechos = []
+    for nombre, lista in aristas.items():
+        dependencias[nombre] = []
+        for dep, especificador in lista:
+            if dep not in paquetes:
+                estado = 'falta'
+            elif not compilar_especificador(especificador)(paquetes[dep]['version']):
+                estado = 'version'
+            else:
+                estado = 'ok'
+            if dep in inversas:
+                inversas[dep].add(nombre)
+            dependencias[nombre].append((dep, especificador, estado))
+            if estado != 'ok':
+                insatisfechos.append((nombre, dep, especificador, estado))
+
+    return {
+        'dependencias': dependencias,
+        'inversas': inversas,
+        'huerfanos': sorted(n for n in paquetes if not inversas[n]),
+        'insatisfechos': insatisfechos,
+    }
+
+def diferenciar_paquetes(paquetes_a, paquetes_b):
+    """Compara dos índices de paquetes {nombre_normalizado: datos} en tiempo lineal.
+    Devuelve (añadidos, eliminados, cambiados) respecto a paquetes_a."""
+    añadidos = [paquetes_b[n] for n in paquetes_b if n not in paquetes_a]
+    eliminados = [paquetes_a[n] for n in paquetes_a if n not in paquetes_b]
+    cambiados = [
+        (paquetes_a[n], paquetes_b[n]) for n in paquetes_a
+        if n in paquetes_b and paquetes_a[n]['version'] != paquetes_b[n]['version']
+    ]
+    return añadidos, eliminados, cambiados
+
+def diferenciar_record(record_a, record_b):
+    """Compara dos RECORD y devuelve (añadidos, eliminados, modificados) por ruta de archivo"""
+    añadidos = sorted(r for r in record_b if r not in record_a)
+    eliminados = sorted(r for r in record_a if r not in record_b)
+    modificados = sorted(
+        r for r in record_a
+        if r in record_b and record_a[r][0] and record_a[r][0] != record_b[r][0]
+    )
+    return añadidos, eliminados, modificados
+
+
+class CacheMetadatos:
+    """Índice persistente de los paquetes instalados en cada entorno.
+
+    Cada entrada se invalida comparando el mtime de los directorios site-packages,
+    que cambia cuando se instala o desinstala un paquete (se crea o borra su dist-info).
+    Al revalidar solo se leen los dist-info nuevos: el nombre del directorio incluye la versión.
+    Los cambios se guardan como mucho una vez cada INTERVALO_GUARDADO_S; quien recorre muchos
+    entornos llama a guardar() al terminar y la ventana lo hace al cerrarse.
+    """
+    VERSION_CACHE = 2
+    INTERVALO_GUARDADO_S = 5
+
+    def __init__(self, archivo_cache):
+        self.archivo_cache = archivo_cache
+        self.entornos = {}
+        self.modificado = False
+        self.ultimo_guardado = 0.0
+        # Se consulta desde la interfaz y desde tareas en segundo plano (análisis de avisos)
+        self.bloqueo = threading.RLock()
+        self.cargar()
+
+    def cargar(self):
+        if os.path.exists(self.archivo_cache):
+            try:
+                with open(self.archivo_cache, 'r') as f:
+                    datos = json.load(f)
+                if datos.get('version') == self.VERSION_CACHE:
+                    self.entornos = datos.get('entornos', {})
+            except (OSError, ValueError):
+                self.entornos = {}
+
+    def guardar(self):
+        with self.bloqueo:
+            if not self.modificado:
+                return
+            escribir_json_atomico(self.archivo_cache, {'version': self.VERSION_CACHE, 'entornos': self.entornos})
+            self.modificado = False
+            self.ultimo_guardado = time.monotonic()
+
+    def marcar_modificado(self):
+        """Anota un cambio; solo se escribe si el último guardado es antiguo"""
+        self.modificado = True
+        if time.monotonic() - self.ultimo_guardado >= self.INTERVALO_GUARDADO_S:
+            self.guardar()
+
+    def obtener_firma(self, entorno_path):
+        """Firma de invalidación: {site_packages: mtime_ns}"""
+        firma = {}
+        for site_packages in buscar_site_packages(entorno_path):
+            try:
+                firma[site_packages] = os.stat(site_packages).st_mtime_ns
+            except OSError:
+                pass
+        return firma
+
+    def obtener_paquetes(self, entorno_path):
+        """Devuelve {nombre_normalizado: {'nombre', 'version', 'dist_info', 'requiere'}} del entorno"""
+        with self.bloqueo:
+            return self._obtener_paquetes(entorno_path)
+
+    def _obtener_paquetes(self, entorno_path):
+        firma = self.obtener_firma(entorno_path)
+        entrada = self.entornos.get(entorno_path)
+        if entrada and entrada.get('firma') == firma:
+            return entrada['paquetes']
+
+        anteriores = {datos['dist_info']: datos for datos in (entrada['paquetes'].values() if entrada else [])}
+        paquetes = {}
+        for site_packages in firma:
+            for nombre_dir in os.listdir(site_packages):
+                if not nombre_dir.endswith(('.dist-info', '.egg-info')):
+                    continue
+                dist_info = os.path.join(site_packages, nombre_dir)
+                if dist_info in anteriores:
+                    datos = anteriores[dist_info]
+                    paquetes[normalizar_nombre_paquete(datos['nombre'])] = datos
+                    continue
+                if not os.path.isdir(dist_info):
+                    continue
+                nombre, version = leer_metadatos_dist_info(dist_info)
+                paquetes[normalizar_nombre_paquete(nombre)] = {
+                    'nombre': nombre,
+                    'version': version,
+                    'dist_info': dist_info,
+                    'requiere': leer_requires_dist(dist_info),
+                }
+
+        self.entornos[entorno_path] = {'firma': firma, 'paquetes': paquetes}
+        self.marcar_modificado()
+        return paquetes
+
+    def obtener_tamaños(self, entorno_path):
+        """Devuelve los paquetes del entorno con su tamaño ('tamaño'), calculándolo solo si falta"""
+        with self.bloqueo:
+            paquetes = self.obtener_paquetes(entorno_path)
+            faltantes = [datos for datos in paquetes.values() if 'tamaño' not in datos]
+            for datos in faltantes:
+                datos['tamaño'] = calcular_tamaño_paquete(datos['dist_info'])
+            if faltantes:
+                self.marcar_modificado()
+            return paquetes
+
+    def invalidar(self, entorno_path):
+        with self.bloqueo:
+            if self.entornos.pop(entorno_path, None) is not None:
+                self.marcar_modificado()
+
+# --- Entornos por Capas (base de solo lectura + hijos enlazados con .pth) ---
+
+ARCHIVO_MARCA_CAPA = '.env-creator-capa.json'
+ARCHIVO_PTH_CAPA = '_env_creator_capa.pth'
+PATRON_PTH_CAPA = re.compile(r"site\.addsitedir\((['\"])(.+?)\1\)")
+
+def es_capa_base(entorno_path):
+    return os.path.exists(os.path.join(entorno_path, ARCHIVO_MARCA_CAPA))
+
+def capa_base_de(entorno_path):
+    """Entorno base enlazado desde el .pth del entorno, o None"""
+    for site_packages in buscar_site_packages(entorno_path):
         try:
-            result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                version_match = re.search(r'Python (\d+\.\d+(\.\d+)?)', result.stdout.strip())
-                if version_match:
-                    version = version_match.group(1)
-                    return version, path
-        except Exception:
-            pass 
-        return "Desconocida", path
+            with open(os.path.join(site_packages, ARCHIVO_PTH_CAPA), 'r') as f:
+                coincidencia = PATRON_PTH_CAPA.search(f.read())
+        except OSError:
+            continue
+        if coincidencia:
+            # <base>/lib/pythonX.Y/site-packages; realpath para compararla con rutas del registro
+            return os.path.realpath(os.path.dirname(os.path.dirname(os.path.dirname(coincidencia.group(2)))))
+    return None
+
+def cadena_de_capas(entorno_path):
+    """[entorno, base, base de la base, ...] sin repetir entornos"""
+    cadena = [entorno_path]
+    base = capa_base_de(entorno_path)
+    while base and base not in cadena:
+        cadena.append(base)
+        base = capa_base_de(base)
+    return cadena
+
+def proteger_directorios(raiz, solo_lectura):
+    """Quita o restaura el permiso de escritura de los directorios bajo raiz.
+    Basta con los directorios para que pip no pueda instalar ni desinstalar en la capa."""
+    for dirpath, _dirnames, _filenames in os.walk(raiz):
+        modo = os.stat(dirpath).st_mode
+        os.chmod(dirpath, modo & ~0o222 if solo_lectura else modo | 0o200)
+
+def marcar_capa_base(entorno_path, progreso=None):
+    """Convierte un entorno en capa base: precompila su bytecode (los hijos no podrán escribirlo)
+    y deja site-packages en solo lectura"""
+    python_path = os.path.join(entorno_path, 'bin', 'python')
+    pyvenv = leer_pyvenv_cfg(entorno_path)
+    sites = buscar_site_packages(entorno_path)
+    for i, site_packages in enumerate(sites):
+        precompilar_site_packages(python_path, site_packages)
+        proteger_directorios(site_packages, True)
+        if progreso:
+            progreso(i + 1, len(sites))
+    escribir_json_atomico(os.path.join(entorno_path, ARCHIVO_MARCA_CAPA), {
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'version': pyvenv.get('version') or pyvenv.get('version_info'),
+    }, indent=4)
+
+def desmarcar_capa_base(entorno_path):
+    for site_packages in buscar_site_packages(entorno_path):
+        proteger_directorios(site_packages, False)
+    try:
+        os.remove(os.path.join(entorno_path, ARCHIVO_MARCA_CAPA))
+    except FileNotFoundError:
+        pass
+
+def crear_entorno_en_capa(base_path, ruta_entorno, progreso=None):
+    """Crea un entorno hijo con el intérprete de la base y un .pth que añade los site-packages
+    de la base detrás de los suyos: lo que se instale en el hijo oculta a la base.
+    Se usa site.addsitedir para que también se procesen los .pth de la base (y de sus bases)."""
+    python_base = os.path.join(base_path, 'bin', 'python')
+    result = subprocess.run([python_base, '-m', 'venv', ruta_entorno], capture_output=True, text=True)
+    if result.returncode != 0:
+        shutil.rmtree(ruta_entorno, ignore_errors=True)
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    enlazar_con_capa_base(ruta_entorno, base_path)
+    return ruta_entorno
+
+def enlazar_con_capa_base(ruta_entorno, base_path):
+    """(Re)escribe el .pth del hijo con los site-packages actuales de la base.
+    Se usa al crear el hijo y cuando la base cambia de ruta o de intérprete."""
+    lineas = "".join(
+        f"import site; site.addsitedir({os.path.realpath(site_packages)!r})\n"
+        for site_packages in buscar_site_packages(base_path)
+    )
+    for site_packages in buscar_site_packages(ruta_entorno):
+        # El hijo puede ser a su vez una capa base con site-packages en solo lectura
+        modo = os.stat(site_packages).st_mode
+        os.chmod(site_packages, modo | 0o200)
+        try:
+            with open(os.path.join(site_packages, ARCHIVO_PTH_CAPA), 'w') as f:
+                f.write(lineas)
+        finally:
+            os.chmod(site_packages, modo)
+
+def paquetes_por_capas(cache, entorno_path):
+    """Paquetes visibles desde el entorno; la capa más cercana oculta a sus bases.
+    Cada entrada es una copia con 'capa' (entorno que la aporta) y, si oculta otra, 'oculta' = (capa, versión)."""
+    visibles = {}
+    for capa in cadena_de_capas(entorno_path):
+        for nombre, datos in cache.obtener_paquetes(capa).items():
+            if nombre in visibles:
+                visibles[nombre].setdefault('oculta', (capa, datos['version']))
+            else:
+                visibles[nombre] = dict(datos, capa=capa)
+    return visibles
 
-    def cargar_opciones_python(self):
-        self.list_widget.clear()
-        
-        potential_paths = set(COMMON_PYTHON_PATHS)
-        
-        for i in range(7, 13):
-            potential_paths.add(f'/usr/bin/python3.{i}')
-            potential_paths.add(f'/usr/local/bin/python3.{i}')
+# --- Seguimiento de Uso y Políticas de Limpieza ---
 
-        valid_paths = [p for p in potential_paths if os.path.exists(p) and os.access(p, os.X_OK)]
-        valid_paths = list(set(valid_paths)) 
+def calcular_tamaño_bytes(path):
+    """Tamaño total en bytes de un directorio (sin seguir enlaces simbólicos)"""
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for nombre in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, nombre)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class RegistroUso:
+    """Último uso de cada entorno: activaciones desde la aplicación y accesos al intérprete.
+    También guarda cuándo la propia aplicación ejecutó el intérprete (información, optimización,
+    verificación...), para que esos accesos no cuenten como uso."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.usos = {}
+        self.propias = {}
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    datos = json.load(f)
+                # Formato anterior: solo el diccionario de usos
+                if isinstance(datos.get('usos'), dict):
+                    self.usos = datos['usos']
+                    self.propias = datos.get('propias', {})
+                else:
+                    self.usos = datos
+            except (OSError, ValueError, AttributeError):
+                self.usos = {}
+
+    def guardar(self):
+        try:
+            escribir_json_atomico(self.archivo, {'usos': self.usos, 'propias': self.propias})
+        except OSError as e:
+            print(f"No se pudo guardar el registro de uso: {e}")
+
+    def registrar(self, entorno_path):
+        self.usos[entorno_path] = time.time()
+        self.guardar()
+
+    def registrar_ejecucion_propia(self, entorno_path):
+        """Llamar después de que la aplicación ejecute el intérprete del entorno"""
+        self.propias[entorno_path] = time.time()
+        self.guardar()
+
+    def olvidar(self, entorno_path):
+        if self.usos.pop(entorno_path, None) is not None or self.propias.pop(entorno_path, None) is not None:
+            self.guardar()
+
+    def mover(self, ruta_antigua, ruta_nueva):
+        if ruta_antigua in self.usos or ruta_antigua in self.propias:
+            for tabla in (self.usos, self.propias):
+                if ruta_antigua in tabla:
+                    tabla[ruta_nueva] = tabla.pop(ruta_antigua)
+            self.guardar()
+
+    def ultimo_uso(self, entorno_path):
+        """Máximo entre la última activación registrada y el atime del intérprete.
+        Si bin/python es un enlace al intérprete base se usa pyvenv.cfg, que Python lee al arrancar.
+        Un atime anterior a la última ejecución propia se ignora: puede deberse a ella."""
+        candidatos = [self.usos.get(entorno_path, 0)]
+        python_path = os.path.join(entorno_path, 'bin', 'python')
+        ruta_acceso = python_path if os.path.isfile(python_path) and not os.path.islink(python_path) else os.path.join(entorno_path, 'pyvenv.cfg')
+        try:
+            atime = os.stat(ruta_acceso).st_atime
+            if atime > self.propias.get(entorno_path, 0):
+                candidatos.append(atime)
+        except OSError:
+            pass
+        return max(candidatos)
+
+
+def evaluar_politicas_limpieza(entornos, registro_uso, dias_sin_uso, limite_bytes, progreso=None):
+    """Genera la propuesta de limpieza ordenada por uso (LRU, el menos usado primero).
+
+    entornos: lista de (nombre, ruta). Se proponen los entornos sin uso en más de
+    dias_sin_uso días y, si el total supera limite_bytes, los menos usados hasta bajar del límite.
+    """
+    datos = []
+    for i, (nombre, ruta) in enumerate(entornos):
+        datos.append({
+            'nombre': nombre,
+            'ruta': ruta,
+            'ultimo_uso': registro_uso.ultimo_uso(ruta),
+            'tamaño': calcular_tamaño_bytes(ruta),
+        })
+        if progreso:
+            progreso(i + 1, len(entornos))
+    datos.sort(key=lambda d: d['ultimo_uso'])
+
+    propuesta = []
+    ahora = time.time()
+    if dias_sin_uso > 0:
+        for d in datos:
+            if ahora - d['ultimo_uso'] > dias_sin_uso * 86400:
+                d['motivo'] = 'sin_uso'
+                propuesta.append(d)
+
+    if limite_bytes > 0:
+        restante = sum(d['tamaño'] for d in datos) - sum(d['tamaño'] for d in propuesta)
+        for d in datos:
+            if restante <= limite_bytes:
+                break
+            if d in propuesta:
+                continue
+            d['motivo'] = 'limite'
+            propuesta.append(d)
+            restante -= d['tamaño']
+
+    propuesta.sort(key=lambda d: d['ultimo_uso'])
+    return propuesta
+
+# --- Optimización de Bytecode ---
+
+DIRECTORIOS_TESTS_DOCS = {'tests', 'test', 'testing_data', 'docs', 'doc', 'examples'}
+
+def obtener_cache_tag(python_path):
+    """Etiqueta de caché del intérprete (p.ej. 'cpython-312'), usada en los nombres de los .pyc"""
+    result = subprocess.run(
+        [python_path, '-c', 'import sys; print(sys.implementation.cache_tag)'],
+        capture_output=True, text=True, timeout=10
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout.strip()
+
+def podar_pycache(site_packages, cache_tag):
+    """Elimina los .pyc de otras versiones de Python y los huérfanos (sin su .py).
+    Devuelve (archivos eliminados, bytes liberados)."""
+    eliminados, liberados = 0, 0
+    for dirpath, dirnames, filenames in os.walk(site_packages, topdown=False):
+        if os.path.basename(dirpath) != '__pycache__':
+            continue
+        directorio_fuente = os.path.dirname(dirpath)
+        for nombre in filenames:
+            if not nombre.endswith('.pyc'):
+                continue
+            # modulo.cpython-312.pyc o modulo.cpython-312.opt-1.pyc
+            partes = nombre[:-len('.pyc')].split('.')
+            modulo = partes[0]
+            tag = partes[1] if len(partes) > 1 else None
+            huerfano = not os.path.exists(os.path.join(directorio_fuente, modulo + '.py'))
+            if tag == cache_tag and not huerfano:
+                continue
+            ruta = os.path.join(dirpath, nombre)
+            try:
+                liberados += os.lstat(ruta).st_size
+                os.remove(ruta)
+                eliminados += 1
+            except OSError:
+                pass
+        try:
+            os.rmdir(dirpath)  # Solo si ha quedado vacío
+        except OSError:
+            pass
+    return eliminados, liberados
+
+def quitar_tests_docs(site_packages):
+    """Elimina directorios de tests y documentación dentro de los paquetes instalados.
+    Los directorios del primer nivel de site-packages se respetan por si son paquetes importables."""
+    liberados = 0
+    eliminados = []
+    for nombre in os.listdir(site_packages):
+        paquete = os.path.join(site_packages, nombre)
+        if not os.path.isdir(paquete) or os.path.islink(paquete) or nombre.endswith(('.dist-info', '.egg-info')):
+            continue
+        for dirpath, dirnames, _filenames in os.walk(paquete):
+            for subdir in list(dirnames):
+                if subdir.lower() in DIRECTORIOS_TESTS_DOCS:
+                    ruta = os.path.join(dirpath, subdir)
+                    liberados += calcular_tamaño_bytes(ruta)
+                    shutil.rmtree(ruta, ignore_errors=True)
+                    dirnames.remove(subdir)
+                    eliminados.append(ruta)
+    if eliminados:
+        quitar_filas_record(site_packages, eliminados)
+    return liberados
+
+def quitar_filas_record(site_packages, directorios):
+    """Quita de los RECORD las filas de los archivos bajo los directorios eliminados,
+    para que la verificación de integridad no los dé por desaparecidos"""
+    prefijos = tuple(os.path.normpath(d) + os.sep for d in directorios)
+    for nombre in os.listdir(site_packages):
+        ruta_record = os.path.join(site_packages, nombre, 'RECORD')
+        if not nombre.endswith('.dist-info') or not os.path.exists(ruta_record):
+            continue
+        with open(ruta_record, 'r', encoding='utf-8', newline='') as f:
+            filas = list(csv.reader(f))
+        conservadas = [
+            fila for fila in filas
+            if not fila or not os.path.normpath(os.path.join(site_packages, fila[0])).startswith(prefijos)
+        ]
+        if len(conservadas) != len(filas):
+            salida = io.StringIO()
+            csv.writer(salida, lineterminator='\n').writerows(conservadas)
+            fd, ruta_temporal = tempfile.mkstemp(dir=os.path.dirname(ruta_record))
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(salida.getvalue())
+            os.replace(ruta_temporal, ruta_record)
+
+def precompilar_site_packages(python_path, site_packages, cancelar=None):
+    """Compila a bytecode con el propio intérprete del entorno, usando todos los núcleos.
+    Si se activa el evento cancelar se mata compileall (cada .pyc se escribe de forma atómica)
+    y devuelve False."""
+    proceso = subprocess.Popen(
+        [python_path, '-m', 'compileall', '-q', '-j', '0', site_packages],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    while True:
+        try:
+            salida, errores = proceso.communicate(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            if cancelar and cancelar.is_set():
+                proceso.kill()
+                proceso.communicate()
+                return False
+    # compileall devuelve 1 si algún archivo tiene errores de sintaxis (p.ej. plantillas); no es fatal
+    if proceso.returncode not in (0, 1):
+        raise RuntimeError(errores.strip() or salida.strip())
+    return True
+
+def modulos_de_nivel_superior(site_packages):
+    """Módulos importables declarados en top_level.txt de cada paquete instalado"""
+    modulos = set()
+    for nombre in os.listdir(site_packages):
+        if not nombre.endswith('.dist-info'):
+            continue
+        ruta = os.path.join(site_packages, nombre, 'top_level.txt')
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
+                modulos.update(l.strip() for l in f if l.strip() and not l.startswith('_'))
+    return sorted(modulos)
+
+def medir_importaciones(python_path, modulos, timeout=120):
+    """Tiempo total (s) de arrancar el intérprete e importar los módulos indicados en un proceso nuevo"""
+    codigo = (
+        "import importlib, sys\n"
+        "for m in sys.argv[1:]:\n"
+        "    try: importlib.import_module(m)\n"
+        "    except BaseException: pass\n"
+    )
+    inicio = time.perf_counter()
+    try:
+        subprocess.run([python_path, '-c', codigo, *modulos], capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        # Una importación que se cuelga no debe hacer fallar la optimización: la medida no está disponible
+        return None
+    return time.perf_counter() - inicio
+
+def optimizar_entorno(entorno_path, precompilar=True, podar=True, quitar_tests=False, medir=True, cancelar=None, progreso=None):
+    """Poda/precompila el bytecode de un entorno y mide tamaño e importaciones antes y después"""
+    python_path = os.path.join(entorno_path, 'bin', 'python')
+    site_packages = buscar_site_packages(entorno_path)
+    pasos = 2 + len(site_packages) * 3
+    paso = 0
+    def avanzar():
+        nonlocal paso
+        paso += 1
+        if progreso:
+            progreso(paso, pasos)
+
+    modulos = [m for sp in site_packages for m in modulos_de_nivel_superior(sp)]
+    resultado = {'tamaño_antes': calcular_tamaño_bytes(entorno_path), 'pyc_eliminados': 0}
+    if medir:
+        resultado['importacion_antes'] = medir_importaciones(python_path, modulos)
+    avanzar()
+
+    cache_tag = obtener_cache_tag(python_path) if podar else None
+    for sp in site_packages:
+        if quitar_tests:
+            quitar_tests_docs(sp)
+        avanzar()
+        if podar:
+            resultado['pyc_eliminados'] += podar_pycache(sp, cache_tag)[0]
+        avanzar()
+        if precompilar and not precompilar_site_packages(python_path, sp, cancelar):
+            break
+        avanzar()
+
+    resultado['tamaño_despues'] = calcular_tamaño_bytes(entorno_path)
+    if medir:
+        resultado['importacion_despues'] = medir_importaciones(python_path, modulos)
+    avanzar()
+    return resultado
+
+# --- Medición de Arranque e Importaciones ---
+
+PATRON_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+MAX_MEDICIONES_ARRANQUE = 20
+
+def analizar_importtime(salida):
+    """Interpreta la salida de -X importtime: lista de (modulo, propio_us, acumulado_us, nivel)"""
+    modulos = []
+    for linea in salida.splitlines():
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, modulo = coincidencia.groups()
+            modulos.append((modulo, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return modulos
+
+def medir_arranque(python_path, modulos=(), repeticiones=5, progreso=None):
+    """Ejecuta el intérprete con -X importtime varias veces.
+    Devuelve la mediana del tiempo de arranque (s) y la mediana por módulo importado."""
+    codigo = f"import {', '.join(modulos)}" if modulos else "pass"
+    tiempos = []
+    por_modulo = collections.defaultdict(lambda: ([], []))
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        result = subprocess.run([python_path, '-X', 'importtime', '-c', codigo], capture_output=True, text=True, timeout=120)
+        tiempos.append(time.perf_counter() - inicio)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else codigo)
+        for modulo, propio, acumulado, _nivel in analizar_importtime(result.stderr):
+            por_modulo[modulo][0].append(propio)
+            por_modulo[modulo][1].append(acumulado)
+        if progreso:
+            progreso(i + 1, repeticiones)
+
+    filas = [
+        (modulo, statistics.median(propios), statistics.median(acumulados))
+        for modulo, (propios, acumulados) in por_modulo.items()
+    ]
+    filas.sort(key=lambda f: f[2], reverse=True)
+    return {
+        'objetivo': codigo,
+        'mediana': statistics.median(tiempos),
+        'minimo': min(tiempos),
+        'repeticiones': repeticiones,
+        'modulos': filas,
+    }
+
+
+class HistorialArranque:
+    """Mediciones de arranque guardadas por entorno, para comparar tendencias entre actualizaciones"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.mediciones = {}
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    self.mediciones = json.load(f)
+            except (OSError, ValueError):
+                self.mediciones = {}
+
+    def obtener(self, entorno_path):
+        return self.mediciones.get(entorno_path, [])
+
+    def agregar(self, entorno_path, resultado, paquetes):
+        """Guarda la medición junto con las versiones instaladas para detectar qué cambió entre ejecuciones"""
+        entrada = {
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'objetivo': resultado['objetivo'],
+            'mediana': resultado['mediana'],
+            'python_version': leer_pyvenv_cfg(entorno_path).get('version') or leer_pyvenv_cfg(entorno_path).get('version_info'),
+            'paquetes': {n: d['version'] for n, d in paquetes.items()},
+            'mas_lentos': [list(f) for f in resultado['modulos'][:10]],
+        }
+        historial = self.mediciones.setdefault(entorno_path, [])
+        historial.append(entrada)
+        del historial[:-MAX_MEDICIONES_ARRANQUE]
+        escribir_json_atomico(self.archivo, self.mediciones)
+        return entrada
+
+    def cambios_desde_anterior(self, entorno_path, indice):
+        """Paquetes añadidos, eliminados o actualizados respecto a la medición anterior del mismo objetivo"""
+        historial = self.obtener(entorno_path)
+        actual = historial[indice]
+        anteriores = [m for m in historial[:indice] if m['objetivo'] == actual['objetivo']]
+        if not anteriores:
+            return []
+        previos, nuevos = anteriores[-1]['paquetes'], actual['paquetes']
+        cambios = [f"+{n}" for n in nuevos if n not in previos]
+        cambios += [f"-{n}" for n in previos if n not in nuevos]
+        cambios += [f"{n} {previos[n]}→{nuevos[n]}" for n in nuevos if n in previos and previos[n] != nuevos[n]]
+        if anteriores[-1].get('python_version') != actual.get('python_version'):
+            cambios.insert(0, f"python {anteriores[-1].get('python_version')}→{actual.get('python_version')}")
+        return cambios
+
+# --- Procesos que Usan un Entorno ---
+
+class IndicePrefijos:
+    """Índice de rutas de entornos: resuelve a qué entorno pertenece una ruta
+    recorriendo sus directorios padre (coste proporcional a la profundidad, no al número de entornos)"""
+
+    def __init__(self, rutas):
+        self.rutas = {os.path.realpath(r).rstrip(os.sep): r for r in rutas}
+        # Bases de todos los entornos, para descartar rápido un /proc/<pid>/maps sin coincidencias
+        self.bases = {os.path.dirname(r).encode() for r in self.rutas}
+
+    def buscar(self, ruta):
+        ruta = ruta.rstrip(os.sep)
+        while ruta and ruta != os.sep:
+            if ruta in self.rutas:
+                return self.rutas[ruta]
+            ruta = os.path.dirname(ruta)
+        return None
+
+    def contiene_alguna_base(self, datos):
+        return any(base in datos for base in self.bases)
+
+
+def leer_proc(pid, nombre):
+    with open(f'/proc/{pid}/{nombre}', 'rb') as f:
+        return f.read()
+
+def escanear_procesos(rutas_entornos, progreso=None):
+    """Recorre /proc una sola vez y devuelve {ruta_entorno: [(pid, línea de comandos)]}
+    según el ejecutable, argv, la variable VIRTUAL_ENV y las bibliotecas mapeadas de cada proceso."""
+    indice = IndicePrefijos(rutas_entornos)
+    en_uso = collections.defaultdict(list)
+    if not indice.rutas or not os.path.isdir('/proc'):
+        return {}
+
+    propio = os.getpid()
+    pids = [int(p) for p in os.listdir('/proc') if p.isdigit() and int(p) != propio]
+    for i, pid in enumerate(pids):
+        try:
+            entorno = None
+            try:
+                entorno = indice.buscar(os.readlink(f'/proc/{pid}/exe'))
+            except OSError:
+                pass
+            argumentos = leer_proc(pid, 'cmdline').split(b'\0')
+            if entorno is None:
+                # bin/python suele ser un enlace al intérprete base: se mira argv[0] y, solo si argv[0]
+                # es un intérprete, el script de argv[1] (p.ej. 'python3 /env/bin/pip' de un shebang)
+                candidatos = argumentos[:1]
+                if len(argumentos) > 1 and re.match(rb'python[0-9.]*$', os.path.basename(argumentos[0])):
+                    candidatos.append(argumentos[1])
+                for argumento in candidatos:
+                    if argumento.startswith(b'/'):
+                        # Las claves del índice son rutas reales; solo se resuelve el directorio,
+                        # porque resolver bin/python llevaría al intérprete base, fuera del entorno
+                        ruta = argumento.decode(errors='replace')
+                        entorno = indice.buscar(os.path.join(os.path.realpath(os.path.dirname(ruta)), os.path.basename(ruta)))
+                        if entorno:
+                            break
+            if entorno is None:
+                for variable in leer_proc(pid, 'environ').split(b'\0'):
+                    if variable.startswith(b'VIRTUAL_ENV='):
+                        entorno = indice.buscar(os.path.realpath(variable[len(b'VIRTUAL_ENV='):].decode(errors='replace')))
+                        break
+            if entorno is None:
+                mapas = leer_proc(pid, 'maps')
+                if indice.contiene_alguna_base(mapas):
+                    for ruta in {l.split(None, 5)[5] for l in mapas.decode(errors='replace').splitlines() if l.count(' ') >= 5 and '/' in l}:
+                        entorno = indice.buscar(ruta.strip())
+                        if entorno:
+                            break
+            if entorno:
+                en_uso[entorno].append((pid, b' '.join(argumentos).decode(errors='replace').strip()))
+        except (OSError, IndexError):
+            # El proceso terminó durante el escaneo o pertenece a otro usuario
+            continue
+        if progreso and i % 200 == 0:
+            progreso(i, len(pids))
+    return dict(en_uso)
+
+# --- Planificador de Metadatos de Entornos (columnas de la lista) ---
+
+def firma_entorno(entorno_path):
+    """mtime de pyvenv.cfg y de cada site-packages: cambia al recrear el entorno o instalar paquetes"""
+    firma = []
+    for ruta in [os.path.join(entorno_path, 'pyvenv.cfg')] + buscar_site_packages(entorno_path):
+        try:
+            firma.append(os.stat(ruta).st_mtime_ns)
+        except OSError:
+            firma.append(None)
+    return firma
+
+def calcular_metadatos_entorno(entorno_path, previos=None):
+    """Versión de Python, nº de paquetes, tamaño y salud de un entorno sin ejecutar su intérprete.
+    Si la firma no ha cambiado y los datos no han caducado se devuelven los previos."""
+    firma = firma_entorno(entorno_path)
+    if previos and previos.get('firma') == firma and time.time() - previos.get('fecha', 0) < PlanificadorMetadatos.CADUCIDAD_S:
+        return previos
+    pyvenv = leer_pyvenv_cfg(entorno_path)
+    python_path = os.path.join(entorno_path, 'bin', 'python')
+    if not pyvenv:
+        salud = 'sin_pyvenv'
+    elif not os.path.exists(python_path):
+        # exists() sigue el enlace: falla si el intérprete base ya no está
+        salud = 'roto'
+    else:
+        salud = 'ok'
+    paquetes = 0
+    for site_packages in buscar_site_packages(entorno_path):
+        paquetes += sum(1 for n in os.listdir(site_packages) if n.endswith(('.dist-info', '.egg-info')))
+    return {
+        'firma': firma,
+        'fecha': time.time(),
+        'version': pyvenv.get('version') or pyvenv.get('version_info'),
+        'paquetes': paquetes,
+        'tamaño': calcular_tamaño_bytes(entorno_path),
+        'salud': salud,
+    }
+
+
+class PlanificadorMetadatos(QObject):
+    """Rellena en segundo plano los metadatos de cada entorno de la lista.
+
+    Cola de prioridad (seleccionado, filas visibles, resto) servida por un pool acotado de hilos.
+    Mientras el usuario interactúa solo se despacha el entorno seleccionado; los resultados se
+    guardan en disco para que la lista los muestre al arrancar sin calcular nada."""
+    actualizado = Signal(str, object)
+    _terminado = Signal(str, object)
+
+    PRIORIDAD_SELECCION, PRIORIDAD_VISIBLE, PRIORIDAD_RESTO = 0, 1, 2
+    PAUSA_INTERACCION_S = 1.5
+    CADUCIDAD_S = 24 * 3600
+    INTERVALO_DESPACHO_MS = 200
+    RETARDO_GUARDADO_MS = 2000
+
+    def __init__(self, archivo, trabajadores=2, parent=None):
+        super().__init__(parent)
+        self.archivo = archivo
+        self.datos = {}
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    self.datos = json.load(f)
+            except (OSError, ValueError):
+                self.datos = {}
+        self.trabajadores = trabajadores
+        self.ejecutor = concurrent.futures.ThreadPoolExecutor(max_workers=trabajadores)
+        self.cola = []
+        self.prioridades = {}
+        self.en_curso = set()
+        self.contador = 0
+        self.ultima_interaccion = 0.0
+        self._terminado.connect(self.terminado)
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setInterval(self.INTERVALO_DESPACHO_MS)
+        self.temporizador.timeout.connect(self.despachar)
+        self.temporizador_guardado = QTimer(self)
+        self.temporizador_guardado.setSingleShot(True)
+        self.temporizador_guardado.setInterval(self.RETARDO_GUARDADO_MS)
+        self.temporizador_guardado.timeout.connect(self.guardar)
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.ultima_interaccion = time.monotonic()
+        return False
+
+    def obtener(self, ruta):
+        return self.datos.get(ruta)
+
+    def solicitar(self, ruta, prioridad):
+        """Encola o sube la prioridad de un entorno (las entradas antiguas del heap se descartan al salir)"""
+        if ruta in self.en_curso or self.prioridades.get(ruta, prioridad + 1) <= prioridad:
+            return
+        self.prioridades[ruta] = prioridad
+        self.contador += 1
+        heapq.heappush(self.cola, (prioridad, self.contador, ruta))
+        if not self.temporizador.isActive():
+            self.temporizador.start()
+
+    def olvidar(self, ruta):
+        self.prioridades.pop(ruta, None)
+        if self.datos.pop(ruta, None) is not None:
+            self.temporizador_guardado.start()
+
+    def despachar(self):
+        interactuando = time.monotonic() - self.ultima_interaccion < self.PAUSA_INTERACCION_S
+        while self.cola and len(self.en_curso) < self.trabajadores:
+            prioridad, _orden, ruta = self.cola[0]
+            if self.prioridades.get(ruta) != prioridad:
+                heapq.heappop(self.cola)
+                continue
+            if interactuando and prioridad > self.PRIORIDAD_SELECCION:
+                return
+            heapq.heappop(self.cola)
+            del self.prioridades[ruta]
+            self.en_curso.add(ruta)
+            futuro = self.ejecutor.submit(calcular_metadatos_entorno, ruta, self.datos.get(ruta))
+            futuro.add_done_callback(lambda f, ruta=ruta: self._terminado.emit(ruta, f))
+        if not self.cola and not self.en_curso:
+            self.temporizador.stop()
+
+    def terminado(self, ruta, futuro):
+        """Hilo de la interfaz: la señal cruza desde el hilo del pool"""
+        self.en_curso.discard(ruta)
+        try:
+            datos = futuro.result()
+        except OSError:
+            return
+        if datos is self.datos.get(ruta) or not os.path.isdir(ruta):
+            return
+        self.datos[ruta] = datos
+        self.temporizador_guardado.start()
+        self.actualizado.emit(ruta, datos)
+
+    def guardar(self):
+        escribir_json_atomico(self.archivo, self.datos)
+
+    def detener(self):
+        self.temporizador.stop()
+        self.cola.clear()
+        self.prioridades.clear()
+        self.ejecutor.shutdown(wait=True, cancel_futures=True)
+        if self.temporizador_guardado.isActive():
+            self.temporizador_guardado.stop()
+            self.guardar()
+
+# --- Base de Avisos de Seguridad (OSV / PyPA advisory-database) ---
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+VERSION_BASE_AVISOS = 1
+
+def leer_aviso_osv(contenido, nombre_archivo):
+    """Interpreta un aviso OSV en JSON (o YAML del advisory-database de PyPA si hay PyYAML)"""
+    if nombre_archivo.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            return None
+        return yaml.safe_load(contenido)
+    return json.loads(contenido)
+
+def recorrer_volcado_avisos(ruta, progreso=None):
+    """Genera (nombre, contenido) de cada aviso de un volcado: un .zip (p.ej. PyPI/all.zip de OSV) o un directorio"""
+    extensiones = ('.json', '.yaml', '.yml')
+    if zipfile.is_zipfile(ruta):
+        with zipfile.ZipFile(ruta) as zf:
+            nombres = [n for n in zf.namelist() if n.endswith(extensiones)]
+            for i, nombre in enumerate(nombres):
+                yield nombre, zf.read(nombre)
+                if progreso:
+                    progreso(i + 1, len(nombres))
+    else:
+        rutas = [
+            os.path.join(dirpath, nombre)
+            for dirpath, _dirnames, filenames in os.walk(ruta) for nombre in filenames if nombre.endswith(extensiones)
+        ]
+        for i, ruta_aviso in enumerate(rutas):
+            with open(ruta_aviso, 'rb') as f:
+                yield os.path.basename(ruta_aviso), f.read()
+            if progreso:
+                progreso(i + 1, len(rutas))
+
+def importar_volcado_avisos(ruta, archivo_destino, progreso=None):
+    """Importa los avisos del ecosistema PyPI a un almacén indexado por nombre de paquete.
+    Devuelve el número de avisos importados."""
+    indice = collections.defaultdict(list)
+    importados = 0
+    for nombre, contenido in recorrer_volcado_avisos(ruta, progreso):
+        try:
+            aviso = leer_aviso_osv(contenido, nombre)
+        except ValueError:
+            continue
+        if not isinstance(aviso, dict) or aviso.get('withdrawn'):
+            continue
+        util = False
+        for afectado in aviso.get('affected', []):
+            paquete = afectado.get('package', {})
+            if paquete.get('ecosystem') != 'PyPI' or not paquete.get('name'):
+                continue
+            rangos = []
+            for rango in afectado.get('ranges', []):
+                if rango.get('type') not in ('ECOSYSTEM', 'SEMVER'):
+                    continue
+                rangos.append([
+                    {clave: str(valor) for clave, valor in evento.items()}
+                    for evento in rango.get('events', [])
+                ])
+            indice[normalizar_nombre_paquete(paquete['name'])].append({
+                'id': aviso.get('id'),
+                'alias': aviso.get('aliases', []),
+                'resumen': aviso.get('summary') or (aviso.get('details') or '')[:200],
+                'rangos': rangos,
+                'versiones': [str(v) for v in afectado.get('versions', [])],
+            })
+            util = True
+        importados += util
+
+    escribir_json_atomico(archivo_destino, {
+        'version': VERSION_BASE_AVISOS,
+        'origen': ruta,
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'avisos': indice,
+    })
+    return importados
+
+
+class BaseAvisos:
+    """Avisos importados con los rangos de versiones precompilados a intervalos de claves PEP 440"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.avisos = {}
+        self.fecha = None
+        self.compilados = {}
+        self.cargar()
+
+    def cargar(self):
+        self.avisos, self.fecha, self.compilados = {}, None, {}
+        if not os.path.exists(self.archivo):
+            return
+        try:
+            with open(self.archivo, 'r') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return
+        if datos.get('version') == VERSION_BASE_AVISOS:
+            self.avisos = datos.get('avisos', {})
+            self.fecha = datos.get('fecha')
+
+    def disponible(self):
+        return bool(self.avisos)
+
+    @staticmethod
+    def compilar_rango(eventos):
+        """Eventos OSV (introduced/fixed/last_affected) -> lista de (inicio, fin, fin_incluido, fixed)"""
+        intervalos = []
+        inicio = None
+        for evento in eventos:
+            if 'introduced' in evento:
+                inicio = None if evento['introduced'] == '0' else clave_version(evento['introduced'])
+                inicio = inicio[0] if inicio else None
+                intervalos.append([inicio, None, False, None])
+            elif intervalos and 'fixed' in evento:
+                fin = clave_version(evento['fixed'])
+                intervalos[-1][1:] = [fin[0] if fin else None, False, evento['fixed']]
+            elif intervalos and 'last_affected' in evento:
+                fin = clave_version(evento['last_affected'])
+                intervalos[-1][1:] = [fin[0] if fin else None, True, None]
+        return intervalos
+
+    def compilado(self, paquete):
+        """Compila (una vez por paquete) los avisos a intervalos comparables"""
+        if paquete not in self.compilados:
+            self.compilados[paquete] = [
+                (aviso, [i for eventos in aviso['rangos'] for i in self.compilar_rango(eventos)], set(aviso['versiones']))
+                for aviso in self.avisos.get(paquete, [])
+            ]
+        return self.compilados[paquete]
+
+    def avisos_version(self, paquete, version):
+        datos = clave_version(version)
+        clave = datos[0] if datos else None
+        encontrados = []
+        for aviso, intervalos, versiones in self.compilado(paquete):
+            afectado = version in versiones
+            if not afectado and clave is not None:
+                for inicio, fin, fin_incluido, _fixed in intervalos:
+                    if inicio is not None and clave < inicio:
+                        continue
+                    if fin is not None and (clave > fin if fin_incluido else clave >= fin):
+                        continue
+                    afectado = True
+                    break
+            if afectado:
+                corregido = [i[3] for i in intervalos if i[3]]
+                encontrados.append({'id': aviso['id'], 'alias': aviso['alias'], 'resumen': aviso['resumen'], 'corregido': corregido})
+        return encontrados
+
+    def analizar_entornos(self, paquetes_por_entorno, progreso=None):
+        """Cruza los paquetes de todos los entornos con la base en una sola pasada.
+        Cada (paquete, versión) distinto se evalúa una vez aunque aparezca en cientos de entornos.
+        Devuelve {ruta_entorno: [{'paquete', 'version', 'id', 'alias', 'resumen', 'corregido'}]}."""
+        ocurrencias = collections.defaultdict(list)
+        for ruta, paquetes in paquetes_por_entorno.items():
+            for nombre, datos in paquetes.items():
+                if nombre in self.avisos:
+                    ocurrencias[(nombre, datos['version'])].append((ruta, datos['nombre']))
+
+        resultado = collections.defaultdict(list)
+        for i, ((nombre, version), entornos) in enumerate(ocurrencias.items()):
+            for aviso in self.avisos_version(nombre, version):
+                for ruta, nombre_mostrado in entornos:
+                    resultado[ruta].append({'paquete': nombre_mostrado, 'version': version, **aviso})
+            if progreso:
+                progreso(i + 1, len(ocurrencias))
+        return dict(resultado)
+
+def analizar_avisos_entornos(base_avisos, cache, entornos, progreso=None):
+    """Reúne los paquetes de cada entorno (con sus capas) y los cruza con la base de avisos.
+    Pensada para ejecutarse entera en segundo plano: leer dist-info nuevos puede ser lento."""
+    paquetes_por_entorno = {ruta: paquetes_por_capas(cache, ruta) for ruta in entornos}
+    cache.guardar()
+    return base_avisos.analizar_entornos(paquetes_por_entorno, progreso=progreso)
+
+# --- Verificación de Integridad (hashes del RECORD) ---
+
+TAMAÑO_LECTURA_HASH = 1024 * 1024
+# A partir de este tamaño se proyecta el archivo con mmap en lugar de leerlo por bloques
+UMBRAL_MMAP_HASH = 16 * 1024 * 1024
+
+def hash_archivo_record(ruta, algoritmo='sha256'):
+    """Hash de un archivo en el formato del RECORD: '<algoritmo>=<base64 urlsafe sin relleno>'.
+    hashlib libera el GIL con bloques grandes, así que varios hilos hashean en paralelo."""
+    suma = hashlib.new(algoritmo)
+    with open(ruta, 'rb') as f:
+        tamaño = os.fstat(f.fileno()).st_size
+        if tamaño >= UMBRAL_MMAP_HASH:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as proyeccion:
+                suma.update(proyeccion)
+        else:
+            bloque = bytearray(TAMAÑO_LECTURA_HASH)
+            vista = memoryview(bloque)
+            while True:
+                leidos = f.readinto(bloque)
+                if not leidos:
+                    break
+                suma.update(vista[:leidos])
+    return f"{algoritmo}={base64.urlsafe_b64encode(suma.digest()).rstrip(b'=').decode()}"
+
+
+def actualizar_hashes_record(entorno_path, contenidos):
+    """Actualiza hash y tamaño en los RECORD de los archivos reescritos ({ruta: nuevos_bytes})"""
+    for site_packages in buscar_site_packages(entorno_path):
+        for nombre in os.listdir(site_packages):
+            ruta_record = os.path.join(site_packages, nombre, 'RECORD')
+            if not nombre.endswith('.dist-info') or not os.path.exists(ruta_record):
+                continue
+            with open(ruta_record, 'r', encoding='utf-8', newline='') as f:
+                filas = list(csv.reader(f))
+            cambiado = False
+            for fila in filas:
+                ruta = os.path.normpath(os.path.join(site_packages, fila[0])) if fila else None
+                if ruta in contenidos and len(fila) >= 3 and fila[1]:
+                    datos = contenidos[ruta]
+                    fila[1] = f"sha256={base64.urlsafe_b64encode(hashlib.sha256(datos).digest()).rstrip(b'=').decode()}"
+                    fila[2] = str(len(datos))
+                    cambiado = True
+            if cambiado:
+                salida = io.StringIO()
+                csv.writer(salida, lineterminator='\n').writerows(filas)
+                fd, ruta_temporal = tempfile.mkstemp(dir=os.path.dirname(ruta_record))
+                with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                    f.write(salida.getvalue())
+                os.replace(ruta_temporal, ruta_record)
+
+
+class CacheVerificacion:
+    """Tabla persistente ruta -> (tamaño, mtime_ns, hash): un archivo cuyo tamaño y mtime
+    no han cambiado desde la última verificación no se vuelve a leer"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.archivos = {}
+        self.modificado = False
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    self.archivos = json.load(f)
+            except (OSError, ValueError):
+                self.archivos = {}
+
+    def obtener(self, ruta, stat_archivo):
+        entrada = self.archivos.get(ruta)
+        if entrada and entrada[0] == stat_archivo.st_size and entrada[1] == stat_archivo.st_mtime_ns:
+            return entrada[2]
+        return None
+
+    def guardar_hash(self, ruta, stat_archivo, hash_archivo):
+        self.archivos[ruta] = [stat_archivo.st_size, stat_archivo.st_mtime_ns, hash_archivo]
+        self.modificado = True
+
+    def olvidar_entorno(self, entorno_path):
+        prefijo = entorno_path.rstrip(os.sep) + os.sep
+        for ruta in [r for r in self.archivos if r.startswith(prefijo)]:
+            del self.archivos[ruta]
+            self.modificado = True
+
+    def mover_entorno(self, ruta_antigua, ruta_nueva):
+        prefijo = ruta_antigua.rstrip(os.sep) + os.sep
+        nuevo_prefijo = ruta_nueva.rstrip(os.sep) + os.sep
+        for ruta in [r for r in self.archivos if r.startswith(prefijo)]:
+            self.archivos[nuevo_prefijo + ruta[len(prefijo):]] = self.archivos.pop(ruta)
+            self.modificado = True
+
+    def guardar(self):
+        if self.modificado:
+            escribir_json_atomico(self.archivo, self.archivos)
+            self.modificado = False
+
+
+def verificar_entorno(entorno_path, cache, progreso=None):
+    """Comprueba cada archivo listado en los RECORD del entorno contra su hash.
+
+    Devuelve {'paquetes': {nombre: {'modificados', 'faltantes', 'extra'}}, 'archivos', 'leidos'}
+    con solo los paquetes que tienen incidencias. 'extra' son archivos dentro de los directorios
+    de un paquete que ningún RECORD declara (se ignora el bytecode de __pycache__)."""
+    incidencias = {}
+    def anotar(paquete, tipo, ruta):
+        incidencias.setdefault(paquete, {'modificados': [], 'faltantes': [], 'extra': []})[tipo].append(ruta)
+
+    pendientes = []
+    declarados = set()
+    directorios_paquete = {}
+    total = 0
+    for site_packages in buscar_site_packages(entorno_path):
+        for nombre_dir in os.listdir(site_packages):
+            if not nombre_dir.endswith('.dist-info'):
+                continue
+            dist_info = os.path.join(site_packages, nombre_dir)
+            paquete = leer_metadatos_dist_info(dist_info)[0]
+            for relativa, (hash_record, tamaño) in leer_record(dist_info).items():
+                ruta = os.path.normpath(os.path.join(site_packages, relativa))
+                declarados.add(ruta)
+                directorio = os.path.dirname(ruta)
+                if directorio != site_packages and directorio.startswith(site_packages + os.sep):
+                    directorios_paquete.setdefault(directorio, paquete)
+                if '=' not in hash_record:
+                    continue
+                total += 1
+                try:
+                    stat_archivo = os.stat(ruta)
+                except OSError:
+                    anotar(paquete, 'faltantes', relativa)
+                    continue
+                if tamaño is not None and stat_archivo.st_size != tamaño:
+                    anotar(paquete, 'modificados', relativa)
+                    continue
+                cacheado = cache.obtener(ruta, stat_archivo)
+                if cacheado is not None:
+                    if cacheado != hash_record:
+                        anotar(paquete, 'modificados', relativa)
+                    continue
+                pendientes.append((paquete, relativa, ruta, stat_archivo, hash_record))
+
+    hechos = total - len(pendientes)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as ejecutor:
+        futuros = {
+            ejecutor.submit(hash_archivo_record, ruta, hash_record.split('=', 1)[0]): (paquete, relativa, ruta, stat_archivo, hash_record)
+            for paquete, relativa, ruta, stat_archivo, hash_record in pendientes
+        }
+        for futuro in concurrent.futures.as_completed(futuros):
+            paquete, relativa, ruta, stat_archivo, hash_record = futuros[futuro]
+            try:
+                calculado = futuro.result()
+            except (OSError, ValueError):
+                anotar(paquete, 'faltantes', relativa)
+            else:
+                cache.guardar_hash(ruta, stat_archivo, calculado)
+                if calculado != hash_record:
+                    anotar(paquete, 'modificados', relativa)
+            hechos += 1
+            if progreso and hechos % 256 == 0:
+                progreso(hechos, total)
+
+    # Archivos no declarados: se atribuyen al paquete dueño del directorio más cercano
+    raices = {d for d in directorios_paquete if os.path.dirname(d) not in directorios_paquete}
+    for raiz in raices:
+        for dirpath, dirnames, filenames in os.walk(raiz):
+            dirnames[:] = [d for d in dirnames if d != '__pycache__']
+            for nombre in filenames:
+                ruta = os.path.join(dirpath, nombre)
+                if ruta in declarados:
+                    continue
+                directorio = dirpath
+                while directorio not in directorios_paquete:
+                    directorio = os.path.dirname(directorio)
+                site_packages = os.path.dirname(raiz)
+                anotar(directorios_paquete[directorio], 'extra', os.path.relpath(ruta, site_packages))
+
+    if progreso:
+        progreso(total, total)
+    return {'paquetes': incidencias, 'archivos': total, 'leidos': len(pendientes)}
+
+def verificar_entornos(rutas, archivo_cache, progreso=None):
+    """Verifica varios entornos compartiendo la tabla de hashes; la guarda una sola vez al final"""
+    cache = CacheVerificacion(archivo_cache)
+    resultados = {}
+    try:
+        for i, ruta in enumerate(rutas):
+            def avance(hechos, total, i=i):
+                if progreso and total:
+                    progreso(i + hechos / total, len(rutas))
+            resultados[ruta] = verificar_entorno(ruta, cache, avance)
+    finally:
+        cache.guardar()
+    return resultados
+
+# --- Reescritura de Rutas Embebidas en un Entorno ---
+
+def es_archivo_binario(datos):
+    return b'\0' in datos[:8192]
+
+def reescribir_rutas_entorno(entorno_path, ruta_antigua, ruta_nueva):
+    """Sustituye la ruta antigua del entorno por la nueva en bin/, pyvenv.cfg y los RECORD.
+    Cada archivo se lee una sola vez y solo se reescribe (de forma atómica) si contiene la ruta.
+    Devuelve el número de archivos modificados."""
+    antigua = os.fsencode(ruta_antigua.rstrip(os.sep))
+    nueva = os.fsencode(ruta_nueva.rstrip(os.sep))
+    if antigua == nueva:
+        return 0
+
+    candidatos = [os.path.join(entorno_path, 'pyvenv.cfg')]
+    bin_dir = os.path.join(entorno_path, 'bin')
+    if os.path.isdir(bin_dir):
+        candidatos += [os.path.join(bin_dir, n) for n in os.listdir(bin_dir)]
+    for site_packages in buscar_site_packages(entorno_path):
+        for nombre in os.listdir(site_packages):
+            if nombre.endswith('.dist-info'):
+                candidatos.append(os.path.join(site_packages, nombre, 'RECORD'))
+
+    modificados = 0
+    reescritos = {}
+    for ruta in candidatos:
+        # Los enlaces simbólicos (bin/python) apuntan al intérprete base, no al entorno
+        if os.path.islink(ruta) or not os.path.isfile(ruta):
+            continue
+        with open(ruta, 'rb') as f:
+            datos = f.read()
+        if antigua not in datos or es_archivo_binario(datos):
+            continue
+        stat_info = os.stat(ruta)
+        fd, ruta_temporal = tempfile.mkstemp(dir=os.path.dirname(ruta))
+        nuevos = datos.replace(antigua, nueva)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(nuevos)
+        os.chmod(ruta_temporal, stat_info.st_mode & 0o7777)
+        os.replace(ruta_temporal, ruta)
+        reescritos[os.path.normpath(ruta)] = nuevos
+        modificados += 1
+
+    # Los scripts reescritos cambian de hash: se corrige su fila del RECORD
+    # para que la verificación de integridad no los marque como modificados
+    if reescritos:
+        actualizar_hashes_record(entorno_path, reescritos)
+    return modificados
+
+# --- Reubicación de Entornos (mover / renombrar) ---
+
+def reubicar_entorno(origen, destino, progreso=None):
+    """Mueve un entorno: rename si está en el mismo sistema de archivos, si no lo copia.
+    Después reescribe las rutas absolutas embebidas. Devuelve los archivos reescritos.
+    Tras una copia el origen se conserva: quien llama lo borra cuando el registro ya apunta al destino."""
+    if os.path.exists(destino):
+        raise FileExistsError(f"El destino ya existe: {destino}")
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    # Una capa base tiene site-packages en solo lectura: sin escritura no se puede borrar el
+    # origen tras copiar ni reescribir sus RECORD. Se desprotege y se vuelve a proteger al final.
+    capa = es_capa_base(origen)
+    if capa:
+        for site_packages in buscar_site_packages(origen):
+            proteger_directorios(site_packages, False)
+    try:
+        return _mover_y_reescribir(origen, destino, progreso)
+    finally:
+        if capa:
+            for site_packages in buscar_site_packages(destino if os.path.exists(destino) else origen):
+                proteger_directorios(site_packages, True)
+
+def _mover_y_reescribir(origen, destino, progreso=None):
+    if os.stat(origen).st_dev == os.stat(os.path.dirname(destino)).st_dev:
+        os.rename(origen, destino)
+    else:
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(origen):
+            for nombre in filenames:
+                ruta = os.path.join(dirpath, nombre)
+                if not os.path.islink(ruta):
+                    total += os.path.getsize(ruta)
+
+        copiado = 0
+        def copiar(src, dst):
+            nonlocal copiado
+            shutil.copy2(src, dst)
+            copiado += os.path.getsize(src)
+            if progreso:
+                progreso(copiado, total)
+
+        try:
+            shutil.copytree(origen, destino, symlinks=True, copy_function=copiar)
+            return reescribir_rutas_entorno(destino, origen, destino)
+        except BaseException:
+            shutil.rmtree(destino, ignore_errors=True)
+            raise
+
+    return reescribir_rutas_entorno(destino, origen, destino)
+
+# --- Reconstrucción de Entornos sobre Otro Intérprete ---
+
+# pip viene con el propio venv; fijarlo obligaría a tenerlo en la caché local
+PAQUETES_NO_REINSTALAR = {'pip'}
+
+def instantanea_paquetes(entorno_path):
+    """Líneas de requisitos que reproducen los paquetes del entorno (solo su propia capa).
+    Las instalaciones desde un directorio local (p.ej. editables) o una URL se conservan como tales.
+    También cuentan los .egg-info heredados: si se omitieran, el paquete se perdería en silencio."""
+    lineas = []
+    for site_packages in buscar_site_packages(entorno_path):
+        for nombre_dir in sorted(os.listdir(site_packages)):
+            if not nombre_dir.endswith(('.dist-info', '.egg-info')):
+                continue
+            dist_info = os.path.join(site_packages, nombre_dir)
+            nombre, version = leer_metadatos_dist_info(dist_info)
+            if normalizar_nombre_paquete(nombre) in PAQUETES_NO_REINSTALAR:
+                continue
+            origen = None
+            try:
+                with open(os.path.join(dist_info, 'direct_url.json'), 'r') as f:
+                    origen = json.load(f)
+            except (OSError, ValueError):
+                pass
+            if origen and origen.get('url', '').startswith('file://') and 'dir_info' in origen:
+                ruta = origen['url'][len('file://'):]
+                lineas.append(f"-e {ruta}" if origen['dir_info'].get('editable') else ruta)
+            elif origen and origen.get('vcs_info'):
+                # PEP 610: la URL va sin el esquema del VCS; se fija el commit instalado
+                vcs_info = origen['vcs_info']
+                url = f"{vcs_info['vcs']}+{origen['url']}"
+                if vcs_info.get('commit_id'):
+                    url += f"@{vcs_info['commit_id']}"
+                if origen.get('subdirectory'):
+                    url += f"#subdirectory={origen['subdirectory']}"
+                lineas.append(f"{nombre} @ {url}")
+            elif origen and origen.get('url'):
+                lineas.append(f"{nombre} @ {origen['url']}")
+            else:
+                lineas.append(f"{nombre}=={version}")
+    return lineas
+
+def versiones_instaladas(entorno_path):
+    versiones = {}
+    for site_packages in buscar_site_packages(entorno_path):
+        for nombre_dir in os.listdir(site_packages):
+            if nombre_dir.endswith(('.dist-info', '.egg-info')):
+                nombre, version = leer_metadatos_dist_info(os.path.join(site_packages, nombre_dir))
+                versiones[normalizar_nombre_paquete(nombre)] = version
+    return versiones
+
+def verificar_reconstruccion(entorno_path, instantanea):
+    """Comprueba que el intérprete arranca y que cada paquete fijado está con la misma versión.
+    Devuelve (errores, avisos); los avisos de 'pip check' no bloquean: el entorno original
+    podía tener ya dependencias rotas."""
+    python = os.path.join(entorno_path, 'bin', 'python')
+    result = subprocess.run([python, '-c', 'import sys'], capture_output=True, text=True)
+    if result.returncode != 0:
+        return [result.stderr.strip() or "El intérprete no arranca"], []
+    instaladas = versiones_instaladas(entorno_path)
+    errores = []
+    for linea in instantanea:
+        if '==' not in linea:
+            continue
+        nombre, version = linea.split('==', 1)
+        obtenida = instaladas.get(normalizar_nombre_paquete(nombre))
+        if obtenida != version:
+            errores.append(f"{nombre}: {version} -> {obtenida or '—'}")
+    result = subprocess.run(
+        [python, '-m', 'pip', 'check', '--disable-pip-version-check'], capture_output=True, text=True
+    )
+    avisos = result.stdout.strip().splitlines() if result.returncode != 0 else []
+    return errores, avisos
+
+def serie_python(entorno_path):
+    """Serie X.Y del intérprete del entorno según su pyvenv.cfg ('' si no se conoce)"""
+    pyvenv = leer_pyvenv_cfg(entorno_path)
+    return ".".join((pyvenv.get('version') or pyvenv.get('version_info') or "").split(".")[:2])
+
+def reconstruir_entorno(entorno_path, python_nuevo, directorio_wheels=DIRECTORIO_WHEELS, sin_conexion=False):
+    """Recrea el entorno con otro intérprete en un directorio temporal hermano, reinstala la
+    instantánea de paquetes (primero desde la caché local de wheels) y, si la verificación pasa,
+    intercambia los directorios. El entorno original no se toca hasta ese momento."""
+    entorno_path = entorno_path.rstrip(os.sep)
+    padre, nombre = os.path.split(entorno_path)
+    instantanea = instantanea_paquetes(entorno_path)
+    base = capa_base_de(entorno_path)
+    temporal = tempfile.mkdtemp(prefix=f'.{nombre}.rebuild-', dir=padre)
+    antiguo = None
+    try:
+        result = subprocess.run([python_nuevo, '-m', 'venv', '--clear', temporal], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+
+        # Un hijo carga los paquetes compilados de su base: ambos deben ser de la misma serie X.Y
+        if base:
+            serie_base = serie_python(base)
+            if serie_python(temporal) != serie_base:
+                raise RuntimeError(f"La capa base {os.path.basename(base)} usa Python {serie_base}")
+
+        if instantanea:
+            requisitos = os.path.join(temporal, '.requisitos-reconstruccion.txt')
+            with open(requisitos, 'w') as f:
+                f.write("\n".join(instantanea) + "\n")
+            comando = [os.path.join(temporal, 'bin', 'python'), '-m', 'pip', 'install',
+                       '--disable-pip-version-check', '--no-deps', '-r', requisitos]
+            if os.path.isdir(directorio_wheels):
+                comando += ['--find-links', directorio_wheels]
+            if sin_conexion:
+                comando.append('--no-index')
+            result = subprocess.run(comando, capture_output=True, text=True)
+            os.remove(requisitos)
+            if result.returncode != 0:
+                salida = (result.stderr.strip() or result.stdout.strip()).splitlines()
+                raise RuntimeError(salida[-1] if salida else f"pip terminó con código {result.returncode}")
+
+        # Un hijo se enlaza con los site-packages actuales de su base (pueden haber cambiado de pythonX.Y)
+        if base:
+            enlazar_con_capa_base(temporal, base)
+
+        errores, avisos = verificar_reconstruccion(temporal, instantanea)
+        if errores:
+            raise RuntimeError("; ".join(errores))
+
+        era_capa_base = es_capa_base(entorno_path)
+        reescribir_rutas_entorno(temporal, temporal, entorno_path)
+        # mkdtemp crea el directorio con 0700: el entorno debe seguir legible por los demás usuarios
+        os.chmod(temporal, os.stat(entorno_path).st_mode & 0o7777)
+        antiguo = tempfile.mkdtemp(prefix=f'.{nombre}.old-', dir=padre)
+        os.rmdir(antiguo)
+        os.rename(entorno_path, antiguo)
+        try:
+            os.rename(temporal, entorno_path)
+        except OSError:
+            os.rename(antiguo, entorno_path)
+            raise
+
+        # Se verifica otra vez en la ruta final (ya con las rutas reescritas); si falla se deshace el cambio
+        try:
+            errores, avisos = verificar_reconstruccion(entorno_path, instantanea)
+        except Exception as e:
+            errores = [str(e)]
+        if errores:
+            os.rename(entorno_path, temporal)
+            os.rename(antiguo, entorno_path)
+            raise RuntimeError("; ".join(errores))
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    if era_capa_base:
+        desmarcar_capa_base(antiguo)
+        marcar_capa_base(entorno_path)
+    shutil.rmtree(antiguo, ignore_errors=True)
+    return {'paquetes': len(instantanea), 'avisos': avisos}
+
+def reconstruir_entornos(rutas, python_nuevo, directorio_wheels=DIRECTORIO_WHEELS, sin_conexion=False,
+                         trabajos=2, progreso=None):
+    """Reconstruye varios entornos en paralelo. Devuelve {ruta: resultado o {'error': texto}}
+    Un hijo cuya base también está en el lote espera a que la base termine; si la base falla, no se toca."""
+    reales = {os.path.realpath(ruta): ruta for ruta in rutas}
+    base_en_lote = {}
+    for ruta in rutas:
+        base = capa_base_de(ruta)
+        if base in reales:
+            base_en_lote[ruta] = reales[base]
+
+    resultados = {}
+    hechos = 0
+    def anotar(ruta, resultado):
+        nonlocal hechos
+        resultados[ruta] = resultado
+        hechos += 1
+        if progreso:
+            progreso(hechos, len(rutas))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, trabajos)) as ejecutor:
+        def lanzar(ruta):
+            return ejecutor.submit(reconstruir_entorno, ruta, python_nuevo, directorio_wheels, sin_conexion)
+        futuros = {lanzar(ruta): ruta for ruta in rutas if ruta not in base_en_lote}
+        while futuros:
+            terminados, _ = concurrent.futures.wait(futuros, return_when=concurrent.futures.FIRST_COMPLETED)
+            for futuro in terminados:
+                ruta = futuros.pop(futuro)
+                try:
+                    anotar(ruta, futuro.result())
+                    fallo_base = None
+                except Exception as e:
+                    anotar(ruta, {'error': str(e)})
+                    fallo_base = ruta
+                # Los hijos de esta base (y, si falló, sus descendientes) ya pueden resolverse
+                pendientes = [hijo for hijo, base in base_en_lote.items() if base == ruta]
+                while pendientes:
+                    hijo = pendientes.pop()
+                    del base_en_lote[hijo]
+                    if fallo_base:
+                        anotar(hijo, {'error': f"No se reconstruyó la capa base {os.path.basename(fallo_base)}"})
+                        pendientes += [nieto for nieto, base in base_en_lote.items() if base == hijo]
+                    else:
+                        futuros[lanzar(hijo)] = hijo
+    # Solo quedan si las capas forman un ciclo
+    for ruta in base_en_lote:
+        anotar(ruta, {'error': "Ciclo de capas base"})
+    return resultados
+
+# --- Exportación e Importación de Entornos (.tar.zst / .tar.xz) ---
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVO_METADATOS_EXPORTACION = '.venv-gui-export.json'
+VERSION_EXPORTACION = 1
+TAMAÑO_BLOQUE_ARCHIVO = 1024 * 1024
+
+def formato_exportacion_disponible():
+    """Devuelve la extensión preferida: .tar.zst si hay soporte de zstd, si no .tar.xz"""
+    if zstandard is not None or shutil.which('zstd'):
+        return '.tar.zst'
+    return '.tar.xz'
+
+class FlujoComprimido:
+    """Flujo de escritura/lectura comprimido. Usa compresión multihilo cuando está disponible:
+    el módulo zstandard, o los binarios zstd/xz con -T0; en último caso el módulo lzma."""
+
+    def __init__(self, ruta, modo):
+        self.ruta = ruta
+        self.modo = modo
+        self.archivo = None
+        self.proceso = None
+        self.flujo = None
+        if ruta.endswith('.zst'):
+            self.abrir_zstd()
+        else:
+            self.abrir_xz()
+
+    def abrir_zstd(self):
+        if zstandard is not None:
+            self.archivo = open(self.ruta, self.modo + 'b')
+            if self.modo == 'w':
+                self.flujo = zstandard.ZstdCompressor(level=10, threads=-1).stream_writer(self.archivo)
+            else:
+                self.flujo = zstandard.ZstdDecompressor().stream_reader(self.archivo)
+        elif shutil.which('zstd'):
+            self.abrir_binario(['zstd', '-T0', '-10', '-q', '-c'], ['zstd', '-d', '-q', '-c'])
+        else:
+            raise OSError("No hay soporte para zstd (instala el módulo 'zstandard' o el programa 'zstd')")
+
+    def abrir_xz(self):
+        if shutil.which('xz'):
+            self.abrir_binario(['xz', '-T0', '-6', '-c'], ['xz', '-d', '-T0', '-c'])
+        else:
+            # Sobre el archivo abierto a mano, para poder medir el avance con tell()
+            self.archivo = open(self.ruta, self.modo + 'b')
+            self.flujo = lzma.open(self.archivo, self.modo + 'b')
+
+    def abrir_binario(self, comando_compresion, comando_descompresion):
+        if self.modo == 'w':
+            self.archivo = open(self.ruta, 'wb')
+            self.proceso = subprocess.Popen(comando_compresion, stdin=subprocess.PIPE, stdout=self.archivo)
+            self.flujo = self.proceso.stdin
+        else:
+            self.archivo = open(self.ruta, 'rb')
+            self.proceso = subprocess.Popen(comando_descompresion, stdin=self.archivo, stdout=subprocess.PIPE)
+            self.flujo = self.proceso.stdout
+
+    def write(self, datos):
+        return self.flujo.write(datos)
+
+    def read(self, tamaño=-1):
+        return self.flujo.read(tamaño)
+
+    def close(self):
+        self.flujo.close()
+        if self.proceso:
+            codigo = self.proceso.wait()
+            if codigo != 0 and self.modo == 'w':
+                raise OSError(f"El compresor terminó con código {codigo}")
+        if self.archivo:
+            self.archivo.close()
+
+
+class LectorConProgreso:
+    """Envuelve un archivo y notifica los bytes leídos"""
+    def __init__(self, archivo, callback):
+        self.archivo = archivo
+        self.callback = callback
+
+    def read(self, tamaño=-1):
+        datos = self.archivo.read(tamaño)
+        self.callback(len(datos))
+        return datos
+
+
+def exportar_entorno(entorno_path, ruta_archivo, omitir_pycache=True, progreso=None):
+    """Empaqueta un entorno en un tar comprimido en streaming, con metadatos de reubicación"""
+    archivos = []
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(entorno_path):
+        if omitir_pycache and '__pycache__' in dirnames:
+            dirnames.remove('__pycache__')
+        for nombre in dirnames + filenames:
+            ruta = os.path.join(dirpath, nombre)
+            archivos.append(ruta)
+            if nombre in filenames and not os.path.islink(ruta):
+                total += os.path.getsize(ruta)
+
+    pyvenv = leer_pyvenv_cfg(entorno_path)
+    metadatos = {
+        'version': VERSION_EXPORTACION,
+        'nombre': os.path.basename(entorno_path.rstrip(os.sep)),
+        'ruta_original': entorno_path,
+        'python_home': pyvenv.get('home'),
+        'python_version': pyvenv.get('version') or pyvenv.get('version_info'),
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'omitir_pycache': omitir_pycache,
+    }
+
+    procesado = 0
+    def avanzar(n):
+        nonlocal procesado
+        procesado += n
+        if progreso:
+            progreso(procesado, total)
+
+    flujo = FlujoComprimido(ruta_archivo, 'w')
+    try:
+        with tarfile.open(fileobj=flujo, mode='w|', bufsize=TAMAÑO_BLOQUE_ARCHIVO) as tar:
+            datos = json.dumps(metadatos, indent=4).encode('utf-8')
+            info = tarfile.TarInfo(ARCHIVO_METADATOS_EXPORTACION)
+            info.size = len(datos)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(datos))
+
+            for ruta in archivos:
+                info = tar.gettarinfo(ruta, arcname=os.path.relpath(ruta, entorno_path))
+                if info.isreg():
+                    with open(ruta, 'rb') as f:
+                        tar.addfile(info, LectorConProgreso(f, avanzar))
+                else:
+                    tar.addfile(info)
+        flujo.close()
+    except BaseException:
+        # Un error al cerrar no debe ocultar el original, y no se deja un archivo a medias
+        try:
+            flujo.close()
+        except Exception:
+            pass
+        try:
+            os.remove(ruta_archivo)
+        except OSError:
+            pass
+        raise
+    return metadatos
+
+
+def leer_metadatos_exportacion(ruta_archivo):
+    """Lee los metadatos de reubicación (primer miembro del archivo) sin descomprimir el resto"""
+    flujo = FlujoComprimido(ruta_archivo, 'r')
+    try:
+        with tarfile.open(fileobj=flujo, mode='r|') as tar:
+            for miembro in tar:
+                if miembro.name == ARCHIVO_METADATOS_EXPORTACION:
+                    return json.loads(tar.extractfile(miembro).read().decode('utf-8'))
+                break
+    finally:
+        if flujo.proceso:
+            flujo.proceso.kill()
+        flujo.close()
+    return {}
+
+
+def importar_entorno(ruta_archivo, destino, progreso=None):
+    """Descomprime un entorno exportado en destino y reescribe sus rutas embebidas"""
+    if os.path.exists(destino):
+        raise FileExistsError(f"El destino ya existe: {destino}")
+    total = os.path.getsize(ruta_archivo)
+    metadatos = {}
+
+    os.makedirs(destino)
+    flujo = FlujoComprimido(ruta_archivo, 'r')
+    try:
+        with tarfile.open(fileobj=flujo, mode='r|') as tar:
+            for miembro in tar:
+                if miembro.name == ARCHIVO_METADATOS_EXPORTACION:
+                    metadatos = json.loads(tar.extractfile(miembro).read().decode('utf-8'))
+                    continue
+                # El filtro 'tar' impide escribir fuera del destino pero conserva
+                # los enlaces absolutos de bin/python al intérprete base (solo existe desde 3.12/3.11.4)
+                if hasattr(tarfile, 'data_filter'):
+                    tar.extract(miembro, destino, filter='tar')
+                else:
+                    tar.extract(miembro, destino)
+                if progreso:
+                    progreso(flujo.archivo.tell() if flujo.archivo else 0, total)
+    except BaseException:
+        try:
+            flujo.close()
+        except Exception:
+            pass
+        shutil.rmtree(destino, ignore_errors=True)
+        raise
+    flujo.close()
+
+    if metadatos.get('ruta_original'):
+        reescribir_rutas_entorno(destino, metadatos['ruta_original'], destino)
+    return metadatos
+
+
+# --- Intérpretes Gestionados (python-build-standalone) ---
+
+PATRON_TOOLCHAIN = re.compile(r'cpython-(\d+\.\d+\.\d+[a-z0-9]*)')
+
+class LectorConHash:
+    """Envuelve un archivo calculando el hash de los bytes leídos y notificando el avance"""
+    def __init__(self, archivo, hash_obj, callback=None):
+        self.archivo = archivo
+        self.hash_obj = hash_obj
+        self.callback = callback
+
+    def read(self, tamaño=-1):
+        datos = self.archivo.read(tamaño)
+        self.hash_obj.update(datos)
+        if self.callback:
+            self.callback(len(datos))
+        return datos
+
+
+def version_toolchain(ruta_archivo):
+    """Versión de CPython del nombre del tarball (cpython-3.12.3+20240415-...-install_only.tar.gz)"""
+    coincidencia = PATRON_TOOLCHAIN.search(os.path.basename(ruta_archivo))
+    if not coincidencia:
+        raise ValueError(f"No parece un tarball de python-build-standalone: {os.path.basename(ruta_archivo)}")
+    return coincidencia.group(1)
+
+def buscar_checksum(ruta_archivo):
+    """SHA-256 publicado junto al tarball: <archivo>.sha256 o una línea de SHA256SUMS del mismo directorio"""
+    nombre = os.path.basename(ruta_archivo)
+    individual = ruta_archivo + '.sha256'
+    if os.path.exists(individual):
+        with open(individual, 'r') as f:
+            contenido = f.read().split()
+        return contenido[0].lower() if contenido else None
+    sumas = os.path.join(os.path.dirname(ruta_archivo), 'SHA256SUMS')
+    if os.path.exists(sumas):
+        with open(sumas, 'r') as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) == 2 and partes[1].lstrip('*') == nombre:
+                    return partes[0].lower()
+    return None
+
+def abrir_tarball_toolchain(lector, nombre):
+    """Abre el tarball en modo flujo según su compresión"""
+    if nombre.endswith(('.tar.gz', '.tgz')):
+        return tarfile.open(fileobj=lector, mode='r|gz', bufsize=TAMAÑO_BLOQUE_ARCHIVO)
+    if nombre.endswith('.tar.xz'):
+        return tarfile.open(fileobj=lector, mode='r|xz', bufsize=TAMAÑO_BLOQUE_ARCHIVO)
+    if nombre.endswith('.tar.zst'):
+        if zstandard is None:
+            raise OSError("Los tarballs .tar.zst necesitan el módulo 'zstandard'")
+        return tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(lector), mode='r|', bufsize=TAMAÑO_BLOQUE_ARCHIVO)
+    raise ValueError(f"Formato no soportado: {nombre}")
+
+def ruta_dentro_de_toolchain(nombre_miembro):
+    """Ruta relativa dentro de la instalación: quita 'python/' (install_only) o 'python/install/' (full).
+    Devuelve None para lo que no forma parte de la instalación (build/, licenses/...)."""
+    partes = nombre_miembro.strip('/').split('/')
+    if len(partes) < 2 or partes[0] != 'python':
+        return None
+    if partes[1] == 'install':
+        partes = partes[2:]
+    elif partes[1] in ('build', 'licenses', 'PYTHON.json'):
+        return None
+    else:
+        partes = partes[1:]
+    return '/'.join(partes) or None
+
+def instalar_toolchain(ruta_archivo, directorio_pythons, progreso=None):
+    """Instala un tarball de python-build-standalone en directorio_pythons/<versión>.
+
+    Se extrae en flujo a un directorio temporal hermano mientras se calcula el SHA-256;
+    solo si coincide con el publicado (si lo hay) y el intérprete arranca se renombra al destino."""
+    version = version_toolchain(ruta_archivo)
+    destino = os.path.join(directorio_pythons, version)
+    if os.path.exists(destino):
+        raise FileExistsError(f"Ya está instalado: {destino}")
+    os.makedirs(directorio_pythons, exist_ok=True)
+    esperado = buscar_checksum(ruta_archivo)
+
+    total = os.path.getsize(ruta_archivo)
+    leidos = 0
+    def avanzar(n):
+        nonlocal leidos
+        leidos += n
+        if progreso:
+            progreso(leidos, total)
+
+    temporal = tempfile.mkdtemp(prefix=f'.{version}-', dir=directorio_pythons)
+    suma = hashlib.sha256()
+    try:
+        with open(ruta_archivo, 'rb') as f:
+            lector = LectorConHash(f, suma, avanzar)
+            with abrir_tarball_toolchain(lector, ruta_archivo) as tar:
+                for miembro in tar:
+                    relativa = ruta_dentro_de_toolchain(miembro.name)
+                    if relativa is None:
+                        continue
+                    miembro.name = relativa
+                    if miembro.islnk():
+                        miembro.linkname = ruta_dentro_de_toolchain(miembro.linkname) or miembro.linkname
+                    tar.extract(miembro, temporal, filter='tar')
+            # El hash debe cubrir el archivo completo, incluido el relleno final del tar
+            while lector.read(TAMAÑO_BLOQUE_ARCHIVO):
+                pass
+
+        calculado = suma.hexdigest()
+        if esperado and calculado != esperado:
+            raise ValueError(f"SHA-256 no coincide: esperado {esperado}, obtenido {calculado}")
+
+        python_path = os.path.join(temporal, 'bin', 'python3')
+        result = subprocess.run([python_path, '--version'], capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"{python_path} no arranca")
+
+        manifiesto = {
+            'version': version,
+            'archivo': os.path.basename(ruta_archivo),
+            'sha256': calculado,
+            'verificado': bool(esperado),
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        escribir_json_atomico(os.path.join(temporal, '.toolchain.json'), manifiesto, indent=4)
+        os.rename(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    manifiesto['python'] = os.path.join(destino, 'bin', 'python3')
+    return manifiesto
+
+def interpretes_gestionados(directorio_pythons):
+    """Intérpretes instalados por la aplicación, del más nuevo al más antiguo"""
+    if not os.path.isdir(directorio_pythons):
+        return []
+    versiones = [v for v in os.listdir(directorio_pythons) if not v.startswith('.')]
+    versiones.sort(key=lambda v: (clave_version(v) or ((),))[0], reverse=True)
+    return [
+        os.path.join(directorio_pythons, v, 'bin', 'python3') for v in versiones
+        if os.path.exists(os.path.join(directorio_pythons, v, 'bin', 'python3'))
+    ]
+
+
+class CacheInterpretes:
+    """Versión de cada intérprete conocido, revalidada por mtime para no ejecutar --version cada vez"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.interpretes = {}
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    self.interpretes = json.load(f)
+            except (OSError, ValueError):
+                self.interpretes = {}
+
+    def registrar(self, ruta, version):
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+        except OSError:
+            return
+        self.interpretes[ruta] = {'version': version, 'mtime': mtime}
+        escribir_json_atomico(self.archivo, self.interpretes)
+
+    def obtener_version(self, ruta):
+        """Versión del intérprete o None si no se puede ejecutar"""
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+        except OSError:
+            return None
+        entrada = self.interpretes.get(ruta)
+        if entrada and entrada.get('mtime') == mtime:
+            return entrada['version']
+        try:
+            result = subprocess.run([ruta, '--version'], capture_output=True, text=True, timeout=2)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        coincidencia = re.search(r'Python (\d+\.\d+(\.\d+)?)', result.stdout + result.stderr)
+        if result.returncode != 0 or not coincidencia:
+            return None
+        self.registrar(ruta, coincidencia.group(1))
+        return coincidencia.group(1)
+
+
+# --- Paleta de Comandos (búsqueda difusa con frecencia) ---
+
+SEPARADORES_PALABRA = ' /-_.'
+
+def puntuar_difuso(consulta, texto):
+    """Puntuación de la consulta como subsecuencia del texto (ambos en minúsculas), o None.
+    Premia los caracteres consecutivos y los inicios de palabra; penaliza los huecos."""
+    if consulta in texto:
+        # Coincidencia literal: la rama rápida y la mejor puntuada
+        i = texto.index(consulta)
+        return 10 * len(consulta) + (8 if i == 0 or texto[i - 1] in SEPARADORES_PALABRA else 0) - i * 0.1
+    puntos = 0
+    posicion = 0
+    anterior = -2
+    for caracter in consulta:
+        i = texto.find(caracter, posicion)
+        if i < 0:
+            return None
+        if i == anterior + 1:
+            puntos += 5
+        if i == 0 or texto[i - 1] in SEPARADORES_PALABRA:
+            puntos += 8
+        puntos -= min(i - posicion, 3)
+        anterior = i
+        posicion = i + 1
+    return puntos
+
+def puntuar_frecencia(conteo, ultimo, ahora):
+    """Frecuencia ponderada por antigüedad, por tramos (como la barra de direcciones de Firefox)"""
+    if not ultimo:
+        return 0
+    dias = (ahora - ultimo) / 86400
+    for limite, peso in ((4, 100), (14, 70), (31, 50), (90, 30)):
+        if dias < limite:
+            return conteo * peso
+    return conteo * 10
+
+
+class HistorialPaleta:
+    """Veces que se ha elegido cada entrada de la paleta y cuándo fue la última"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.entradas = {}
+        if os.path.exists(archivo):
+            try:
+                with open(archivo, 'r') as f:
+                    self.entradas = json.load(f)
+            except (OSError, ValueError):
+                self.entradas = {}
+
+    def registrar(self, clave):
+        conteo, _ultimo = self.entradas.get(clave, (0, 0))
+        self.entradas[clave] = [conteo + 1, time.time()]
+        escribir_json_atomico(self.archivo, self.entradas)
+
+    def obtener(self, clave):
+        return self.entradas.get(clave, (0, 0))
+
+
+class IndicePaleta:
+    """Entradas de la paleta con su texto de búsqueda ya normalizado.
+
+    Los entornos se añaden y quitan de uno en uno al cambiar el registro. Mientras se escribe,
+    si la consulta nueva amplía la anterior solo se vuelve a puntuar lo que ya coincidía."""
+    MAX_RESULTADOS = 50
+
+    def __init__(self, acciones):
+        # acciones: [(clave, etiqueta, requiere_entorno)]
+        self.acciones = {}
+        self.entornos = {}
+        self.actualizar_acciones(acciones)
+        self.ultima_consulta = None
+        self.ultimos_candidatos = None
+
+    def actualizar_acciones(self, acciones):
+        self.acciones = {
+            clave: {'clave': f"accion:{clave}", 'accion': clave, 'etiqueta': etiqueta, 'requiere_entorno': requiere,
+                    'texto': f"{clave} {etiqueta}".lower(), 'frecencia': 0}
+            for clave, etiqueta, requiere in acciones
+        }
+        self.invalidar_busqueda()
+
+    def agregar_entorno(self, nombre, ruta):
+        self.entornos[ruta] = {
+            'clave': f"entorno:{ruta}", 'ruta': ruta, 'etiqueta': nombre,
+            'nombre': nombre.lower(), 'texto': ruta.lower(), 'frecencia': 0,
+        }
+        self.invalidar_busqueda()
+
+    def quitar_entorno(self, ruta):
+        if self.entornos.pop(ruta, None) is not None:
+            self.invalidar_busqueda()
+
+    def sincronizar_entornos(self, entornos):
+        """Aplica solo las diferencias con la lista (nombre, ruta) del registro"""
+        actuales = dict((ruta, nombre) for nombre, ruta in entornos)
+        for ruta in [r for r in self.entornos if r not in actuales]:
+            self.quitar_entorno(ruta)
+        for ruta, nombre in actuales.items():
+            if ruta not in self.entornos or self.entornos[ruta]['etiqueta'] != nombre:
+                self.agregar_entorno(nombre, ruta)
+
+    def invalidar_busqueda(self):
+        self.ultima_consulta = None
+        self.ultimos_candidatos = None
+
+    def calcular_frecencias(self, historial, registro_uso):
+        """Una vez por apertura de la paleta; el uso de los entornos también cuenta el de fuera de ella"""
+        ahora = time.time()
+        for entrada in self.acciones.values():
+            entrada['frecencia'] = puntuar_frecencia(*historial.obtener(entrada['clave']), ahora)
+        for entrada in self.entornos.values():
+            conteo, ultimo = historial.obtener(entrada['clave'])
+            ultimo_uso = registro_uso.ultimo_uso(entrada['ruta'])
+            entrada['frecencia'] = puntuar_frecencia(max(conteo, 1), max(ultimo, ultimo_uso), ahora)
+        self.invalidar_busqueda()
+
+    @staticmethod
+    def puntuar_entrada(consulta, entrada):
+        if 'nombre' in entrada:
+            # El nombre del entorno pesa más que su ruta
+            puntos = puntuar_difuso(consulta, entrada['nombre'])
+            if puntos is not None:
+                return puntos + 10
+        return puntuar_difuso(consulta, entrada['texto'])
+
+    def buscar(self, consulta):
+        """Devuelve [(entrada_accion, entrada_entorno)] ordenadas; cualquiera de las dos puede ser None.
+
+        Si la primera palabra es una acción que requiere entorno ('terminal foo'), se buscan
+        entornos para esa acción; si no, se mezclan acciones globales y entornos (acción por defecto)."""
+        consulta = consulta.strip().lower()
+        palabras = consulta.split(None, 1)
+        accion = None
+        if palabras:
+            accion = next((a for a in self.acciones.values()
+                           if a['requiere_entorno'] and a['accion'].startswith(palabras[0])), None)
+            if accion and (len(palabras) > 1 or palabras[0] == accion['accion']):
+                consulta = palabras[1] if len(palabras) > 1 else ''
+            else:
+                accion = None
+
+        clave_busqueda = (accion['accion'] if accion else None, consulta)
+        if accion:
+            universo = list(self.entornos.values())
+        else:
+            universo = list(self.entornos.values()) + list(self.acciones.values())
+        if (self.ultima_consulta and self.ultima_consulta[0] == clave_busqueda[0]
+                and consulta.startswith(self.ultima_consulta[1])):
+            universo = self.ultimos_candidatos
+
+        if consulta:
+            puntuadas = []
+            for entrada in universo:
+                puntos = self.puntuar_entrada(consulta, entrada)
+                if puntos is not None:
+                    puntuadas.append((puntos + 4 * math.log1p(entrada['frecencia']), entrada))
+            self.ultima_consulta = clave_busqueda
+            self.ultimos_candidatos = [entrada for _puntos, entrada in puntuadas]
+        else:
+            puntuadas = [(entrada['frecencia'], entrada) for entrada in universo]
+            self.invalidar_busqueda()
+
+        mejores = heapq.nlargest(self.MAX_RESULTADOS, puntuadas, key=lambda p: p[0])
+        resultados = []
+        for _puntos, entrada in mejores:
+            if 'ruta' in entrada:
+                resultados.append((accion, entrada))
+            else:
+                resultados.append((entrada, None))
+        return resultados
+
+
+class TareaSegundoPlano(QThread):
+    """Ejecuta una función larga fuera del hilo de la interfaz notificando el progreso"""
+    progreso = Signal(int)
+    terminado = Signal(object)
+    fallo = Signal(str)
+
+    def __init__(self, funcion, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.ultimo_porcentaje = -1
+
+    def notificar(self, hecho, total):
+        porcentaje = int(hecho * 100 / total) if total else 0
+        if porcentaje != self.ultimo_porcentaje:
+            self.ultimo_porcentaje = porcentaje
+            self.progreso.emit(porcentaje)
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, progreso=self.notificar, **self.kwargs)
+            self.terminado.emit(resultado)
+        except Exception as e:
+            self.fallo.emit(str(e))
+
+# --- Ejecución de Procesos dentro de un Entorno ---
+
+def construir_entorno_proceso(entorno_path):
+    """Crea el QProcessEnvironment con PATH y VIRTUAL_ENV del entorno, sin script de activación"""
+    env = QProcessEnvironment.systemEnvironment()
+    bin_dir = os.path.join(entorno_path, 'bin')
+    env.insert('VIRTUAL_ENV', entorno_path)
+    env.insert('PATH', bin_dir + os.pathsep + env.value('PATH', os.defpath))
+    env.remove('PYTHONHOME')
+    env.insert('PYTHONUNBUFFERED', '1')
+    return env
+
+def resolver_comando_entorno(entorno_path, comando):
+    """Divide el comando y resuelve el ejecutable priorizando el bin/ del entorno.
+    Devuelve (programa, argumentos) o lanza ValueError si no se encuentra."""
+    args = shlex.split(comando, posix=True)
+    if not args:
+        raise ValueError("Comando vacío")
+    path_busqueda = os.path.join(entorno_path, 'bin') + os.pathsep + os.environ.get('PATH', os.defpath)
+    programa = shutil.which(args[0], path=path_busqueda)
+    if not programa:
+        raise ValueError(f"No se encontró el ejecutable '{args[0]}'")
+    return programa, args[1:]
+
+# --- Widgets de Desglose de Espacio en Disco ---
+
+class ItemNumerico(QTableWidgetItem):
+    """Celda que se ordena por el valor numérico guardado en UserRole y no por el texto"""
+    def __init__(self, texto, valor):
+        super().__init__(texto)
+        self.setData(Qt.UserRole, valor)
+
+    def __lt__(self, other):
+        return (self.data(Qt.UserRole) or 0) < (other.data(Qt.UserRole) or 0)
+
+
+def distribuir_treemap(valores, x, y, ancho, alto):
+    """Algoritmo squarified: devuelve un rectángulo (x, y, ancho, alto) por valor, en el mismo orden.
+    Los valores deben venir ordenados de mayor a menor."""
+    total = float(sum(valores))
+    if total <= 0 or ancho <= 0 or alto <= 0:
+        return [(x, y, 0, 0) for _ in valores]
+    areas = [v * ancho * alto / total for v in valores]
+    rects = []
+
+    def peor_proporcion(fila, lado):
+        suma = sum(fila)
+        return max(max(lado * lado * a / (suma * suma), (suma * suma) / (lado * lado * a)) for a in fila)
+
+    i = 0
+    while i < len(areas):
+        lado = min(ancho, alto)
+        fila = [areas[i]]
+        i += 1
+        while i < len(areas) and peor_proporcion(fila + [areas[i]], lado) <= peor_proporcion(fila, lado):
+            fila.append(areas[i])
+            i += 1
+
+        suma = sum(fila)
+        if ancho >= alto:
+            # Columna a la izquierda
+            grosor = suma / alto
+            cy = y
+            for a in fila:
+                rects.append((x, cy, grosor, a / grosor))
+                cy += a / grosor
+            x += grosor
+            ancho -= grosor
+        else:
+            # Fila arriba
+            grosor = suma / ancho
+            cx = x
+            for a in fila:
+                rects.append((cx, y, a / grosor, grosor))
+                cx += a / grosor
+            y += grosor
+            alto -= grosor
+    return rects
+
+
+class TreemapWidget(QWidget):
+    """Mapa de árbol de los paquetes por tamaño"""
+    MAX_ELEMENTOS = 60
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.elementos = []
+        self.rects = []
+        self.setMouseTracking(True)
+        self.setMinimumHeight(150)
+
+    def establecer_elementos(self, elementos):
+        """elementos: lista de (nombre, tamaño)"""
+        elementos = sorted((e for e in elementos if e[1] > 0), key=lambda e: e[1], reverse=True)
+        if len(elementos) > self.MAX_ELEMENTOS:
+            resto = sum(t for _, t in elementos[self.MAX_ELEMENTOS:])
+            elementos = elementos[:self.MAX_ELEMENTOS] + [("…", resto)]
+        self.elementos = elementos
+        self.rects = []
+        self.update()
+
+    def resizeEvent(self, event):
+        self.rects = []
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if not self.rects and self.elementos:
+            self.rects = distribuir_treemap([t for _, t in self.elementos], 0, 0, self.width(), self.height())
+        painter = QPainter(self)
+        for (nombre, tamaño), (x, y, ancho, alto) in zip(self.elementos, self.rects):
+            rect = QRectF(x, y, ancho, alto)
+            tono = zlib.crc32(nombre.encode('utf-8')) % 360
+            painter.fillRect(rect, QColor.fromHsv(tono, 110, 150))
+            painter.setPen(QColor(COLOR_BG_PRIMARY))
+            painter.drawRect(rect)
+            if ancho > 50 and alto > 18:
+                painter.setPen(QColor(COLOR_TEXT))
+                painter.drawText(rect.adjusted(3, 2, -3, -2), Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap,
+                                 f"{nombre}\n{formatear_tamaño(tamaño)}")
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        posicion = event.position()
+        for (nombre, tamaño), (x, y, ancho, alto) in zip(self.elementos, self.rects):
+            if x <= posicion.x() < x + ancho and y <= posicion.y() < y + alto:
+                self.setToolTip(f"{nombre}: {formatear_tamaño(tamaño)}")
+                return
+        self.setToolTip("")
+
+
+class DesglosePaquetesWidget(QWidget):
+    """Tabla ordenable y mapa de árbol con el tamaño de cada paquete"""
+    def __init__(self, main_window, mostrar_entorno=False, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.mostrar_entorno = mostrar_entorno
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.tabla = QTableWidget(0, 4 if mostrar_entorno else 3)
+        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        splitter.addWidget(self.tabla)
+
+        self.treemap = TreemapWidget()
+        splitter.addWidget(self.treemap)
+        layout.addWidget(splitter)
+
+        self.total_label = QLabel()
+        layout.addWidget(self.total_label)
+        self.retraducir_ui()
+
+    def retraducir_ui(self):
+        columnas = [self.main_window.get_string("package_column"), self.main_window.get_string("version_column")]
+        if self.mostrar_entorno:
+            columnas.append(self.main_window.get_string("environment_column"))
+        columnas.append(self.main_window.get_string("size_label"))
+        self.tabla.setHorizontalHeaderLabels(columnas)
+
+    def mostrar(self, filas):
+        """filas: lista de (nombre, version, entorno, tamaño)"""
+        self.tabla.setSortingEnabled(False)
+        self.tabla.setRowCount(len(filas))
+        for fila, (nombre, version, entorno, tamaño) in enumerate(filas):
+            columnas = [QTableWidgetItem(nombre), QTableWidgetItem(version)]
+            if self.mostrar_entorno:
+                columnas.append(QTableWidgetItem(entorno))
+            columnas.append(ItemNumerico(formatear_tamaño(tamaño), tamaño))
+            for columna, item in enumerate(columnas):
+                self.tabla.setItem(fila, columna, item)
+        self.tabla.setSortingEnabled(True)
+        self.tabla.sortByColumn(self.tabla.columnCount() - 1, Qt.DescendingOrder)
+
+        etiqueta = (lambda f: f"{f[0]} ({f[2]})") if self.mostrar_entorno else (lambda f: f[0])
+        self.treemap.establecer_elementos([(etiqueta(f), f[3]) for f in filas])
+        total = sum(f[3] for f in filas)
+        self.total_label.setText(f"{len(filas)} · {formatear_tamaño(total)}")
+
+
+def paquetes_mas_grandes(cache, entornos, limite, progreso=None):
+    """[(paquete, versión, entorno, tamaño)] de los 'limite' paquetes más grandes de los entornos"""
+    filas = []
+    for i, (nombre_entorno, ruta) in enumerate(entornos):
+        for datos in cache.obtener_tamaños(ruta).values():
+            filas.append((datos['nombre'], datos['version'], nombre_entorno, datos['tamaño']))
+        if progreso:
+            progreso(i + 1, len(entornos))
+    cache.guardar()
+    return heapq.nlargest(limite, filas, key=lambda f: f[3])
+
+
+class EspacioPaquetesDialog(QDialog):
+    """Paquetes más grandes en todos los entornos registrados"""
+    MAX_FILAS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle(self.parent.get_string("largest_packages_title"))
+        self.resize(800, 600)
+        layout = QVBoxLayout(self)
+        self.desglose = DesglosePaquetesWidget(self.parent, mostrar_entorno=True)
+        layout.addWidget(self.desglose)
+        self.btn_cerrar = QPushButton(self.parent.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(self.btn_cerrar)
+        self.cargar()
+
+    def cargar(self):
+        # La primera vez se leen los RECORD de todos los entornos: va en segundo plano.
+        # La tarea pertenece a la ventana principal para sobrevivir al cierre del diálogo.
+        self.desglose.total_label.setText(self.parent.get_string("measuring_sizes"))
+        self.tarea = TareaSegundoPlano(
+            paquetes_mas_grandes, self.parent.cache_metadatos, self.parent.obtener_entornos_registrados(),
+            self.MAX_FILAS, parent=self.parent
+        )
+        self.tarea.terminado.connect(self.desglose.mostrar)
+        self.tarea.fallo.connect(self.desglose.total_label.setText)
+        self.tarea.finished.connect(self.tarea.deleteLater)
+        self.tarea.start(QThread.LowPriority)
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.parent.get_string("largest_packages_title"))
+        self.btn_cerrar.setText(self.parent.get_string("close"))
+
+
+# --- Widget de Medición de Arranque ---
+
+class ArranqueWidget(QWidget):
+    """Pestaña de medición del arranque del intérprete con -X importtime"""
+
+    def __init__(self, main_window, entorno_path):
+        super().__init__()
+        self.main_window = main_window
+        self.entorno_path = entorno_path
+        self.tarea = None
+        self.setup_ui()
+        self.mostrar_historial()
+
+    def get_string(self, key):
+        return self.main_window.get_string(key)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        controles = QHBoxLayout()
+        self.input_modulos = QLineEdit()
+        self.input_modulos.setPlaceholderText(self.get_string("startup_modules_placeholder"))
+        controles.addWidget(self.input_modulos)
+        self.spin_repeticiones = QSpinBox()
+        self.spin_repeticiones.setRange(1, 50)
+        self.spin_repeticiones.setValue(5)
+        self.spin_repeticiones.setSuffix("×")
+        controles.addWidget(self.spin_repeticiones)
+        self.btn_medir = QPushButton(self.get_string("startup_run"))
+        self.btn_medir.clicked.connect(self.medir)
+        controles.addWidget(self.btn_medir)
+        layout.addLayout(controles)
+
+        self.resultado_label = QLabel()
+        layout.addWidget(self.resultado_label)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.tabla_modulos = QTableWidget(0, 3)
+        self.tabla_modulos.setHorizontalHeaderLabels([
+            self.get_string("startup_module"), self.get_string("startup_self_ms"), self.get_string("startup_cumulative_ms")
+        ])
+        self.tabla_modulos.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tabla_modulos.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_modulos.verticalHeader().setVisible(False)
+        self.tabla_modulos.setSortingEnabled(True)
+        splitter.addWidget(self.tabla_modulos)
+
+        self.tabla_historial = QTableWidget(0, 4)
+        self.tabla_historial.setHorizontalHeaderLabels([
+            self.get_string("startup_date"), self.get_string("startup_target"), self.get_string("startup_median"), self.get_string("startup_changes")
+        ])
+        self.tabla_historial.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.tabla_historial.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_historial.verticalHeader().setVisible(False)
+        splitter.addWidget(self.tabla_historial)
+        layout.addWidget(splitter)
+
+    def medir(self):
+        if self.tarea and self.tarea.isRunning():
+            return
+        modulos = [m.strip() for m in re.split(r'[,\s]+', self.input_modulos.text()) if m.strip()]
+        python_path = os.path.join(self.entorno_path, 'bin', 'python')
+        self.btn_medir.setEnabled(False)
+        self.resultado_label.setText(self.get_string("startup_running"))
+        self.tarea = TareaSegundoPlano(medir_arranque, python_path, modulos, self.spin_repeticiones.value(), parent=self)
+        self.tarea.progreso.connect(lambda p: self.resultado_label.setText(f"{self.get_string('startup_running')} {p}%"))
+        self.tarea.terminado.connect(self.medicion_terminada)
+        self.tarea.fallo.connect(lambda e: self.resultado_label.setText(f"{self.get_string('error')}: {e}"))
+        self.tarea.finished.connect(lambda: self.btn_medir.setEnabled(True))
+        self.tarea.start()
+
+    def medicion_terminada(self, resultado):
+        paquetes = self.main_window.cache_metadatos.obtener_paquetes(self.entorno_path)
+        self.main_window.historial_arranque.agregar(self.entorno_path, resultado, paquetes)
+        self.resultado_label.setText(
+            f"{self.get_string('startup_median')}: {resultado['mediana'] * 1000:.1f} ms "
+            f"(min {resultado['minimo'] * 1000:.1f} ms, n={resultado['repeticiones']})"
+        )
+        self.tabla_modulos.setSortingEnabled(False)
+        self.tabla_modulos.setRowCount(len(resultado['modulos']))
+        for fila, (modulo, propio, acumulado) in enumerate(resultado['modulos']):
+            self.tabla_modulos.setItem(fila, 0, QTableWidgetItem(modulo))
+            self.tabla_modulos.setItem(fila, 1, ItemNumerico(f"{propio / 1000:.2f}", propio))
+            self.tabla_modulos.setItem(fila, 2, ItemNumerico(f"{acumulado / 1000:.2f}", acumulado))
+        self.tabla_modulos.setSortingEnabled(True)
+        self.tabla_modulos.sortByColumn(2, Qt.DescendingOrder)
+        self.mostrar_historial()
+
+    def mostrar_historial(self):
+        historial = self.main_window.historial_arranque.obtener(self.entorno_path)
+        self.tabla_historial.setRowCount(len(historial))
+        # Lo más reciente arriba
+        for fila, indice in enumerate(reversed(range(len(historial)))):
+            medicion = historial[indice]
+            cambios = self.main_window.historial_arranque.cambios_desde_anterior(self.entorno_path, indice)
+            self.tabla_historial.setItem(fila, 0, QTableWidgetItem(medicion['fecha']))
+            self.tabla_historial.setItem(fila, 1, QTableWidgetItem(medicion['objetivo']))
+            self.tabla_historial.setItem(fila, 2, QTableWidgetItem(f"{medicion['mediana'] * 1000:.1f} ms"))
+            item_cambios = QTableWidgetItem(", ".join(cambios))
+            item_cambios.setToolTip("\n".join(cambios))
+            self.tabla_historial.setItem(fila, 3, item_cambios)
+
+    def retraducir_ui(self):
+        self.input_modulos.setPlaceholderText(self.get_string("startup_modules_placeholder"))
+        self.btn_medir.setText(self.get_string("startup_run"))
+        self.tabla_modulos.setHorizontalHeaderLabels([
+            self.get_string("startup_module"), self.get_string("startup_self_ms"), self.get_string("startup_cumulative_ms")
+        ])
+        self.tabla_historial.setHorizontalHeaderLabels([
+            self.get_string("startup_date"), self.get_string("startup_target"), self.get_string("startup_median"), self.get_string("startup_changes")
+        ])
+
+
+# --- Diálogo de Información del Entorno ---
+
+class EntornoInfoDialog(QDialog):
+    def __init__(self, parent=None, entorno_path="", entorno_name=""):
+        super().__init__(parent)
+        self.main_window = parent
+        self.entorno_path = entorno_path
+        self.entorno_name = entorno_name
+        self.info_basica = {}
+        self.librerias = {}
+        self.setWindowTitle(f"{self.main_window.get_string('env_info_title')}: {entorno_name}")
+        self.setFixedSize(600, 500)
+        self.setup_ui()
+        self.cargar_informacion()
+
+    def get_string(self, key):
+        return self.main_window.get_string(key)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Crear widget de pestañas
+        self.tab_widget = QTabWidget()
+        
+        # Pestaña Básica
+        self.basica_tab = QWidget()
+        self.setup_basica_tab()
+        self.tab_widget.addTab(self.basica_tab, self.get_string("basic_tab"))
+        
+        # Pestaña Librerías
+        self.librerias_tab = QWidget()
+        self.setup_librerias_tab()
+        self.tab_widget.addTab(self.librerias_tab, self.get_string("libraries_tab"))
+
+        # Pestaña Espacio (se calcula al abrirla)
+        self.espacio_tab = DesglosePaquetesWidget(self.main_window)
+        self.espacio_cargado = False
+        self.tab_widget.addTab(self.espacio_tab, self.get_string("disk_tab"))
+
+        # Pestaña Arranque (la medición se lanza a petición)
+        self.arranque_tab = ArranqueWidget(self.main_window, self.entorno_path)
+        self.tab_widget.addTab(self.arranque_tab, self.get_string("startup_tab"))
+        self.tab_widget.currentChanged.connect(self.pestaña_cambiada)
+        
+        layout.addWidget(self.tab_widget)
+
+        # Botón de cerrar
+        self.btn_cerrar = QPushButton(self.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(self.btn_cerrar)
+
+    def retraducir_ui(self):
+        self.setWindowTitle(f"{self.get_string('env_info_title')}: {self.entorno_name}")
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.basica_tab), self.get_string("basic_tab"))
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.librerias_tab), self.get_string("libraries_tab"))
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.espacio_tab), self.get_string("disk_tab"))
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.arranque_tab), self.get_string("startup_tab"))
+        self.btn_cerrar.setText(self.get_string("close"))
+        # Los datos ya obtenidos se vuelven a mostrar sin ejecutar de nuevo python ni pip
+        self.mostrar_info_basica()
+        self.retraducir_librerias()
+        self.mostrar_librerias()
+
+    def setup_basica_tab(self):
+        layout = QVBoxLayout(self.basica_tab)
+        
+        # Área de scroll para la información básica
+        scroll_area = QScrollArea()
+        scroll_widget = QWidget()
+        scroll_layout = QVBoxLayout(scroll_widget)
+        
+        self.info_basica_text = QTextEdit()
+        self.info_basica_text.setReadOnly(True)
+        self.info_basica_text.setStyleSheet("background-color: #2e2e2e; color: white; border: none;")
+        scroll_layout.addWidget(self.info_basica_text)
+        
+        scroll_area.setWidget(scroll_widget)
+        scroll_area.setWidgetResizable(True)
+        layout.addWidget(scroll_area)
+
+    def setup_librerias_tab(self):
+        layout = QVBoxLayout(self.librerias_tab)
+
+        filtro_layout = QHBoxLayout()
+        self.librerias_resumen = QLabel()
+        filtro_layout.addWidget(self.librerias_resumen)
+        filtro_layout.addStretch()
+        self.librerias_filtro = QComboBox()
+        self.librerias_filtro.currentIndexChanged.connect(self.mostrar_librerias)
+        filtro_layout.addWidget(self.librerias_filtro)
+        layout.addLayout(filtro_layout)
+
+        # Árbol de paquetes: cada uno despliega sus dependencias
+        self.librerias_arbol = QTreeWidget()
+        self.librerias_arbol.setColumnCount(5)
+        self.librerias_arbol.setSortingEnabled(True)
+        self.librerias_arbol.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.librerias_arbol)
+        self.retraducir_librerias()
+
+    def retraducir_librerias(self):
+        self.librerias_arbol.setHeaderLabels([
+            self.get_string("package_column"), self.get_string("version_column"),
+            self.get_string("required_by_column"), self.get_string("status_column"),
+            self.get_string("layer_column"),
+        ])
+        indice = max(self.librerias_filtro.currentIndex(), 0)
+        self.librerias_filtro.blockSignals(True)
+        self.librerias_filtro.clear()
+        for clave, filtro in (("filter_all", 'todos'), ("filter_orphans", 'huerfanos'), ("filter_problems", 'problemas')):
+            self.librerias_filtro.addItem(self.get_string(clave), filtro)
+        self.librerias_filtro.setCurrentIndex(indice)
+        self.librerias_filtro.blockSignals(False)
+
+    def pestaña_cambiada(self, _indice):
+        if self.tab_widget.currentWidget() is self.espacio_tab and not self.espacio_cargado:
+            self.espacio_cargado = True
+            paquetes = self.main_window.cache_metadatos.obtener_tamaños(self.entorno_path)
+            self.espacio_tab.mostrar([
+                (datos['nombre'], datos['version'], self.entorno_name, datos['tamaño'])
+                for datos in paquetes.values()
+            ])
+
+    def cargar_informacion(self):
+        self.cargar_info_basica()
+        self.cargar_librerias()
+
+    def cargar_info_basica(self):
+        self.info_basica = {}
+        # Información del directorio
+        if os.path.exists(self.entorno_path):
+            stat_info = os.stat(self.entorno_path)
+            from datetime import datetime
+            self.info_basica['creado'] = datetime.fromtimestamp(stat_info.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
+            self.info_basica['modificado'] = datetime.fromtimestamp(stat_info.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+            self.info_basica['tamaño'] = self.calcular_tamaño_directorio(self.entorno_path)
+
+        # Información de Python del entorno
+        python_path = self.obtener_python_del_entorno()
+        if python_path and os.path.exists(python_path):
+            try:
+                result = subprocess.run(
+                    [python_path, '-c', 'import platform, sys; print(platform.python_version()); print(sys.platform); print(sys.implementation.name)'],
+                    capture_output=True, text=True, timeout=5
+                )
+                if result.returncode == 0:
+                    version, plataforma, implementacion = result.stdout.strip().split('\n')[:3]
+                    self.info_basica['version'] = f"Python {version}"
+                    self.info_basica['plataforma'] = plataforma
+                    self.info_basica['implementacion'] = implementacion
+            except Exception as e:
+                self.info_basica['error'] = str(e)
+            self.main_window.registro_uso.registrar_ejecucion_propia(self.entorno_path)
+
+        # Se muestra el último escaneo periódico y se pide uno nuevo en segundo plano: recorrer /proc (con maps) bloquearía la GUI
+        self.info_basica['procesos'] = self.main_window.procesos_entornos.get(self.entorno_path, [])
+        self.main_window.escanear_procesos_entornos()
+        if self.main_window.tarea_procesos:
+            self.main_window.tarea_procesos.terminado.connect(self.procesos_escaneados)
+        self.info_basica['capas'] = cadena_de_capas(self.entorno_path)[1:]
+        self.info_basica['capa_base'] = es_capa_base(self.entorno_path)
+
+        self.mostrar_info_basica()
+
+    def procesos_escaneados(self, en_uso):
+        self.info_basica['procesos'] = en_uso.get(self.entorno_path, [])
+        self.mostrar_info_basica()
+
+    def mostrar_info_basica(self):
+        info = self.info_basica
+        info_text = f"""{self.get_string("basic_info_header")}
+
+{self.get_string("name_label")}: {self.entorno_name}
+{self.get_string("path_label")}: {self.entorno_path}
+
+"""
+        if 'creado' in info:
+            info_text += f"""{self.get_string("directory_info")}:
+- {self.get_string("created_label")}: {info['creado']}
+- {self.get_string("modified_label")}: {info['modificado']}
+- {self.get_string("size_label")}: {info['tamaño']}
+
+"""
+        if 'version' in info:
+            info_text += f"{self.get_string('python_version_label')}: {info['version']}\n"
+            info_text += f"{self.get_string('platform_label')}: {info['plataforma']}\n"
+            info_text += f"{self.get_string('implementation_label')}: {info['implementacion']}\n"
+        if 'error' in info:
+            info_text += f"{self.get_string('python_info_error')}: {info['error']}\n"
+        if info.get('capa_base'):
+            info_text += f"\n◆ {self.get_string('base_layer_badge')}\n"
+        if info.get('capas'):
+            info_text += f"\n{self.get_string('layer_column')}: {' → '.join(info['capas'])}\n"
+        if info.get('procesos'):
+            info_text += f"\n{self.get_string('in_use_by')} {len(info['procesos'])} {self.get_string('processes_label')}:\n"
+            for pid, cmdline in info['procesos']:
+                info_text += f"- {pid}: {cmdline}\n"
+
+        self.info_basica_text.setPlainText(info_text)
+
+    def cargar_librerias(self):
+        """Lee los paquetes de la caché de metadatos y construye el grafo de dependencias (sin ejecutar pip)"""
+        self.librerias = {}
+        try:
+            paquetes = paquetes_por_capas(self.main_window.cache_metadatos, self.entorno_path)
+            self.librerias['paquetes'] = paquetes
+            self.librerias['grafo'] = construir_grafo_dependencias(paquetes, entorno_marcadores(self.entorno_path))
+        except OSError as e:
+            self.librerias['error_lista'] = str(e)
+
+        self.mostrar_librerias()
+
+    def mostrar_librerias(self):
+        self.librerias_arbol.clear()
+        if 'error_lista' in self.librerias:
+            self.librerias_resumen.setText(f"{self.get_string('libraries_list_error')}: {self.librerias['error_lista']}")
+            return
+        paquetes = self.librerias.get('paquetes', {})
+        if not paquetes:
+            self.librerias_resumen.setText(self.get_string('no_libraries_found'))
+            return
+
+        grafo = self.librerias['grafo']
+        huerfanos = set(grafo['huerfanos'])
+        con_problemas = {nombre for nombre, *_ in grafo['insatisfechos']}
+        self.librerias_resumen.setText(
+            f"{len(paquetes)} {self.get_string('installed_libraries').rstrip(':').lower()} · "
+            f"{len(huerfanos)} {self.get_string('orphans_label')} · "
+            f"{len(grafo['insatisfechos'])} {self.get_string('unsatisfied_label')}"
+        )
+        textos_estado = {
+            'falta': self.get_string("dependency_missing"),
+            'version': self.get_string("dependency_wrong_version"),
+            'ok': "",
+        }
+
+        filtro = self.librerias_filtro.currentData()
+        self.librerias_arbol.setSortingEnabled(False)
+        for nombre, datos in paquetes.items():
+            if filtro == 'huerfanos' and nombre not in huerfanos:
+                continue
+            if filtro == 'problemas' and nombre not in con_problemas:
+                continue
+            inversas = sorted(paquetes[n]['nombre'] for n in grafo['inversas'].get(nombre, ()))
+            estado = self.get_string("orphan_status") if nombre in huerfanos else ""
+            if nombre in con_problemas:
+                estado = self.get_string("unsatisfied_label")
+            capa = os.path.basename(datos['capa'])
+            if 'oculta' in datos:
+                capa_oculta, version_oculta = datos['oculta']
+                capa += f" ⇡ {os.path.basename(capa_oculta)} {version_oculta}"
+            item = QTreeWidgetItem([datos['nombre'], datos['version'], str(len(inversas)), estado, capa])
+            item.setToolTip(2, "\n".join(inversas))
+            if datos['capa'] != self.entorno_path:
+                item.setForeground(4, QColor("#8FA8C8"))
+            if nombre in con_problemas:
+                item.setForeground(3, QColor("#E06060"))
+            for dep, especificador, estado_dep in grafo['dependencias'].get(nombre, []):
+                version_dep = paquetes[dep]['version'] if dep in paquetes else "—"
+                nombre_dep = paquetes[dep]['nombre'] if dep in paquetes else dep
+                hijo = QTreeWidgetItem([f"→ {nombre_dep} {especificador}".rstrip(), version_dep, "", textos_estado[estado_dep]])
+                if estado_dep != 'ok':
+                    hijo.setForeground(3, QColor("#E06060"))
+                item.addChild(hijo)
+            self.librerias_arbol.addTopLevelItem(item)
+        self.librerias_arbol.setSortingEnabled(True)
+        self.librerias_arbol.sortByColumn(0, Qt.AscendingOrder)
+
+    def obtener_python_del_entorno(self):
+        # Buscar el ejecutable de Python en el entorno virtual
+        posibles_rutas = [
+            os.path.join(self.entorno_path, 'bin', 'python'),
+            os.path.join(self.entorno_path, 'bin', 'python3'),
+            os.path.join(self.entorno_path, 'Scripts', 'python.exe') if sys.platform == 'win32' else ''
+        ]
+        
+        for ruta in posibles_rutas:
+            if os.path.exists(ruta):
+                return ruta
+        return None
+
+    def calcular_tamaño_directorio(self, path):
+        total_size = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                filepath = os.path.join(dirpath, filename)
+                if os.path.exists(filepath):
+                    total_size += os.path.getsize(filepath)
+        
+        return formatear_tamaño(total_size)
+
+# --- Diálogo para Selección de Python ---
+
+class SeleccionadorPythonDialog(QDialog):
+    def __init__(self, parent=None, initial_path=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.selected_path = initial_path
+        self.cache_interpretes = getattr(parent, 'cache_interpretes', None) or CacheInterpretes(ARCHIVO_CACHE_INTERPRETES)
+        self.setWindowTitle(self.tr("Seleccionar intérprete de Python"))
+        self.setup_ui()
+        self.setFixedSize(500, 450)
+
+    def tr(self, text):
+        return QCoreApplication.translate("SeleccionadorPythonDialog", text)
+        
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        explanation_label = QLabel(self.tr("Elige la ruta del ejecutable de Python para crear los entornos virtuales:"))
+        layout.addWidget(explanation_label)
+        
+        self.path_input = QLineEdit() 
+        self.path_input.setPlaceholderText(self.tr("Ruta del ejecutable"))
+        if self.selected_path:
+            self.path_input.setText(self.selected_path)
+
+        self.list_widget = QListWidget()
+        self.list_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.list_widget.setSelectionMode(QListWidget.SingleSelection)
+        self.list_widget.itemSelectionChanged.connect(self.update_path_from_list)
+        layout.addWidget(self.list_widget)
+        
+        self.cargar_opciones_python() 
+
+        path_layout = QHBoxLayout()
+        path_layout.addWidget(self.path_input) 
+        
+        self.btn_browse = QPushButton(self.tr("Buscar"))
+        self.btn_browse.clicked.connect(self.browse_for_python)
+        path_layout.addWidget(self.btn_browse)
+        layout.addLayout(path_layout)
+
+        self.btn_install_toolchain = QPushButton(self.tr("Instalar desde archivo..."))
+        self.btn_install_toolchain.setToolTip(self.tr("Instala un tarball de python-build-standalone (.tar.gz, .tar.xz, .tar.zst) en ~/.env-creator-ui/pythons"))
+        self.btn_install_toolchain.clicked.connect(self.instalar_toolchain_desde_archivo)
+        layout.addWidget(self.btn_install_toolchain)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        
+        self.btn_cancel = QPushButton(self.tr("Cancelar"))
+        self.btn_cancel.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.btn_cancel)
+        
+        self.btn_save = QPushButton(self.tr("Aceptar"))
+        self.btn_save.clicked.connect(self.accept_selection)
+        buttons_layout.addWidget(self.btn_save)
+        
+        layout.addLayout(buttons_layout)
+
+    def get_python_version_and_path(self, path):
+        version = self.cache_interpretes.obtener_version(path)
+        return (version or "Desconocida"), path
+
+    def cargar_opciones_python(self):
+        self.list_widget.clear()
+        
+        gestionados = interpretes_gestionados(DIRECTORIO_PYTHONS)
+        potential_paths = set(COMMON_PYTHON_PATHS)
+        
+        for i in range(7, 13):
+            potential_paths.add(f'/usr/bin/python3.{i}')
+            potential_paths.add(f'/usr/local/bin/python3.{i}')
+
+        valid_paths = [p for p in potential_paths if os.path.exists(p) and os.access(p, os.X_OK)]
+        valid_paths = gestionados + [p for p in set(valid_paths) if p not in gestionados]
         
         current_selection_item = None
         
-        for path in valid_paths:
-            version, _ = self.get_python_version_and_path(path)
-            if version != "Desconocida":
-                item_text = f"Python {version} ({path})"
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.UserRole, path)
-                self.list_widget.addItem(item)
-                
-                if path == self.selected_path:
-                    current_selection_item = item
+        for path in valid_paths:
+            version, _ = self.get_python_version_and_path(path)
+            if version != "Desconocida":
+                item_text = f"Python {version} ({path})"
+                if path in gestionados:
+                    item_text = f"⬢ {item_text} [{self.tr('gestionado')}]"
+                item = QListWidgetItem(item_text)
+                item.setData(Qt.UserRole, path)
+                self.list_widget.addItem(item)
+                
+                if path == self.selected_path:
+                    current_selection_item = item
+
+        if current_selection_item:
+            self.list_widget.setCurrentItem(current_selection_item)
+            self.list_widget.scrollToItem(current_selection_item)
+            
+    def update_path_from_list(self):
+        item = self.list_widget.currentItem()
+        if item:
+            self.path_input.setText(item.data(Qt.UserRole)) 
+
+    def instalar_toolchain_desde_archivo(self):
+        ruta_archivo, _ = QFileDialog.getOpenFileName(
+            self,
+            self.tr("Seleccionar tarball de CPython"),
+            QDir.homePath(),
+            self.tr("Tarballs de CPython (*.tar.gz *.tgz *.tar.xz *.tar.zst)")
+        )
+        if not ruta_archivo:
+            return
+        manifiesto, error = self.parent.ejecutar_con_progreso(
+            self.tr("Instalando intérprete"), instalar_toolchain, ruta_archivo, DIRECTORIO_PYTHONS
+        )
+        if error:
+            QMessageBox.critical(self, self.tr("Error"), self.tr("No se pudo instalar el intérprete: ") + error)
+            return
+
+        self.cache_interpretes.registrar(manifiesto['python'], manifiesto['version'])
+        if not manifiesto['verificado']:
+            QMessageBox.warning(
+                self, self.tr("Sin checksum"),
+                self.tr("No se encontró un .sha256 ni SHA256SUMS junto al archivo; la integridad no se ha verificado.")
+            )
+        self.selected_path = manifiesto['python']
+        self.path_input.setText(self.selected_path)
+        self.cargar_opciones_python()
+
+    def browse_for_python(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, 
+            self.tr("Seleccionar ejecutable de Python"), 
+            QDir.homePath(), 
+            self.tr("Ejecutables (*)")
+        )
+        if path:
+            self.path_input.setText(path)
+            
+    def accept_selection(self):
+        selected_path = self.path_input.text().strip()
+        if not selected_path:
+            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("Por favor, introduce una ruta válida."))
+            return
+            
+        if not os.path.exists(selected_path):
+            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("El ejecutable no existe. Por favor, verifica la ruta."))
+            return
+            
+        self.selected_path = selected_path
+        self.accept()
+# ----------------------------------------------------
+
+# --- Diálogo para Configuración de Terminal Personalizada (Corregido) ---
+class CustomTerminalDialog(QDialog):
+    def __init__(self, main_window, parent=None): 
+        super().__init__(parent)
+        self.main_window = main_window
+        self.nombre = None
+        self.ruta = None
+        self.comando = None
+        self.setWindowTitle(self.main_window.get_string("custom_terminal")) 
+        self.setFixedSize(500, 300)
+        self.setup_ui()
+
+    def tr(self, text):
+        return QCoreApplication.translate("CustomTerminalDialog", text)
+        
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        parent = self.main_window
+
+        layout.addWidget(QLabel(parent.get_string("terminal_name")))
+        self.input_nombre = QLineEdit()
+        layout.addWidget(self.input_nombre)
+        
+        layout.addWidget(QLabel(parent.get_string("terminal_path")))
+        ruta_layout = QHBoxLayout()
+        self.input_ruta = QLineEdit("/usr/bin/")
+        ruta_layout.addWidget(self.input_ruta)
+        self.btn_browse_ruta = QPushButton(parent.get_string("browse"))
+        self.btn_browse_ruta.clicked.connect(self.browse_for_terminal)
+        ruta_layout.addWidget(self.btn_browse_ruta)
+        layout.addLayout(ruta_layout)
+        
+        # --- INICIO DE LA CORRECCIÓN: Ajuste de Texto ---
+        label_comando = QLabel(parent.get_string("custom_command_full"))
+        label_comando.setWordWrap(True) # ¡Asegura que el texto se ajuste!
+        layout.addWidget(label_comando)
+        # --- FIN DE LA CORRECCIÓN ---
+
+        self.input_comando = QLineEdit("-e 'bash --init-file {script}'")
+        layout.addWidget(self.input_comando)
+        
+        layout.addStretch()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, self)
+        buttons.accepted.connect(self.check_and_accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def browse_for_terminal(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, 
+            self.main_window.get_string("select_terminal_executable"), 
+            QDir.homePath(), 
+            self.tr("Ejecutables (*)")
+        )
+        if path:
+            self.input_ruta.setText(path)
+
+    def check_and_accept(self):
+        nombre = self.input_nombre.text().strip()
+        ruta = self.input_ruta.text().strip()
+        comando = self.input_comando.text().strip()
+        parent = self.main_window
+
+        if not nombre or not ruta or not comando:
+            QMessageBox.warning(self, parent.get_string("warning"), parent.get_string("provide_all_custom_terminal_fields"))
+            return
+            
+        if not os.path.exists(ruta):
+            respuesta = QMessageBox.question(self, parent.get_string("executable_not_found"), parent.get_string("continue_anyway"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if respuesta == QMessageBox.StandardButton.No: return
+            
+        self.nombre = nombre
+        self.ruta = ruta
+        self.comando = comando
+        self.accept()
+
+# --- Diálogo de Configuración (Modificado - Eliminada pestaña de Gestión de Entornos) ---
+
+class ConfigDialog(QDialog):
+    def __init__(self, parent=None, config=None):
+        super().__init__(parent)
+        self.parent = parent 
+        self.config = config
+        self.setup_ui()
+
+    def tr(self, text):
+        return QCoreApplication.translate("ConfigDialog", text)
+
+    def setup_ui(self):
+        self.setWindowTitle(self.parent.get_string("config_title"))
+        self.setFixedSize(600, 500)
+
+        layout = QVBoxLayout(self)
+
+        # Crear el widget de pestañas
+        self.tab_widget = QTabWidget()
+        
+        # Pestaña 1: Configuración General
+        self.general_tab = QWidget()
+        self.setup_general_tab()
+        self.tab_widget.addTab(self.general_tab, self.parent.get_string("general_tab"))
+        
+        layout.addWidget(self.tab_widget)
+
+        # Solo un botón de Cerrar
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        
+        self.btn_ok = QPushButton(self.parent.get_string("close"))
+        self.btn_ok.clicked.connect(self.accept_changes) 
+        buttons_layout.addWidget(self.btn_ok)
+        
+        layout.addLayout(buttons_layout)
+
+    def setup_general_tab(self):
+        """Configura la pestaña de configuración general"""
+        layout = QVBoxLayout(self.general_tab)
+
+        # 1. Selector de Idioma
+        lang_layout = QHBoxLayout()
+        self.lang_label = QLabel(self.parent.get_string("language") + ":")
+        self.lang_combo = QComboBox()
+        self.lang_combo.addItem("Español", "es")
+        self.lang_combo.addItem("English", "en")
+        self.lang_combo.addItem("Português", "pt")
+        
+        current_lang = self.config.get('idioma', 'es')
+        index = self.lang_combo.findData(current_lang)
+        if index >= 0:
+            self.lang_combo.setCurrentIndex(index)
+        
+        lang_layout.addWidget(self.lang_label)
+        lang_layout.addWidget(self.lang_combo)
+        layout.addLayout(lang_layout)
+        
+        # 2. Directorio Base de Entornos
+        self.env_dir_label = QLabel(self.parent.get_string("base_env_directory") + ":")
+        layout.addWidget(self.env_dir_label)
+        
+        env_dir_layout = QHBoxLayout()
+        self.env_dir_input = QLineEdit(self.config.get('directorio_base_env'))
+        self.env_dir_input.setReadOnly(True) 
+        env_dir_layout.addWidget(self.env_dir_input)
+        
+        self.btn_browse_env_dir = QPushButton(self.parent.get_string("change_button"))
+        self.btn_browse_env_dir.clicked.connect(self.browse_env_directory)
+        env_dir_layout.addWidget(self.btn_browse_env_dir)
+        layout.addLayout(env_dir_layout)
+        
+        # 3. Reutilizar la instancia abierta de la terminal
+        self.reutilizar_terminal_check = QCheckBox(self.parent.get_string("reuse_terminal_instance"))
+        self.reutilizar_terminal_check.setChecked(self.config.get('reutilizar_instancia_terminal', True))
+        layout.addWidget(self.reutilizar_terminal_check)
+
+        self.precompilar_check = QCheckBox(self.parent.get_string("precompile_after_create"))
+        self.precompilar_check.setChecked(self.config.get('precompilar_al_crear', True))
+        layout.addWidget(self.precompilar_check)
+
+        self.descubrimiento_check = QCheckBox(self.parent.get_string("auto_discover_envs"))
+        self.descubrimiento_check.setChecked(self.config.get('descubrimiento_automatico', False))
+        layout.addWidget(self.descubrimiento_check)
+
+        self.raices_label = QLabel(self.parent.get_string("project_roots_label") + ":")
+        layout.addWidget(self.raices_label)
+        self.raices_input = QLineEdit(os.pathsep.join(self.config.get('raices_proyectos', [QDir.homePath()])))
+        layout.addWidget(self.raices_input)
+
+        self.servicio_rpc_check = QCheckBox(self.parent.get_string("rpc_service_enabled"))
+        self.servicio_rpc_check.setToolTip(ruta_socket_rpc())
+        self.servicio_rpc_check.setChecked(self.config.get('servicio_rpc', False))
+        layout.addWidget(self.servicio_rpc_check)
+
+        # 4. Terminales personalizadas
+        self.terminals_label = QLabel(self.parent.get_string("custom_terminals") + ":")
+        layout.addWidget(self.terminals_label)
+        self.terminals_list = QListWidget()
+        self.actualizar_lista_terminales()
+        layout.addWidget(self.terminals_list)
+        
+        # Botones para terminales (Añadir y Eliminar)
+        terminals_buttons_layout = QHBoxLayout()
+        self.btn_add_terminal = QPushButton(self.parent.get_string("add_custom_terminal_button")) 
+        self.btn_add_terminal.clicked.connect(self.add_custom_terminal)
+        terminals_buttons_layout.addWidget(self.btn_add_terminal)
+        
+        self.btn_eliminar_terminal = QPushButton(self.parent.get_string("delete_selected_terminal"))
+        self.btn_eliminar_terminal.clicked.connect(self.eliminar_terminal_seleccionada)
+        terminals_buttons_layout.addWidget(self.btn_eliminar_terminal)
+        layout.addLayout(terminals_buttons_layout)
 
-        if current_selection_item:
-            self.list_widget.setCurrentItem(current_selection_item)
-            self.list_widget.scrollToItem(current_selection_item)
+        layout.addStretch()
+
+    def browse_env_directory(self):
+        dir_path = QFileDialog.getExistingDirectory(
+            self, 
+            self.parent.get_string("browse_env_dir_title"), 
+            self.env_dir_input.text()
+        )
+        if dir_path:
+            self.env_dir_input.setText(dir_path)
+
+    def add_custom_terminal(self):
+        dialog = CustomTerminalDialog(self.parent, self) 
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            nombre = dialog.nombre
+            ruta = dialog.ruta
+            comando = dialog.comando
             
-    def update_path_from_list(self):
-        item = self.list_widget.currentItem()
-        if item:
-            self.path_input.setText(item.data(Qt.UserRole)) 
+            if 'terminales_personalizados' not in self.config: self.config['terminales_personalizados'] = {}
+            self.config['terminales_personalizados'][nombre] = {'ruta': ruta, 'comando': comando}
+            self.parent.guardar_config()
+            self.actualizar_lista_terminales()
+            QMessageBox.information(self, self.tr("Éxito"), self.parent.get_string("terminal_added_successfully"))
+
+    def accept_changes(self):
+        new_env_dir = self.env_dir_input.text().strip()
+        if not new_env_dir or not os.path.isdir(new_env_dir):
+            QMessageBox.warning(self, self.tr("Advertencia"), self.parent.get_string("invalid_env_dir"))
+            return
+            
+        self.config['directorio_base_env'] = new_env_dir
+        
+        current_lang = self.config.get('idioma')
+        nuevo_idioma = self.lang_combo.currentData()
+        self.config['idioma'] = nuevo_idioma
+        self.config['reutilizar_instancia_terminal'] = self.reutilizar_terminal_check.isChecked()
+        self.config['precompilar_al_crear'] = self.precompilar_check.isChecked()
+        self.config['descubrimiento_automatico'] = self.descubrimiento_check.isChecked()
+        self.config['raices_proyectos'] = [r.strip() for r in self.raices_input.text().split(os.pathsep) if r.strip()]
+        if self.servicio_rpc_check.isChecked() != self.config.get('servicio_rpc', False):
+            self.config['servicio_rpc'] = self.servicio_rpc_check.isChecked()
+            self.parent.activar_servicio_rpc(self.config['servicio_rpc'])
+
+        self.parent.guardar_config()
+        
+        if nuevo_idioma != current_lang:
+            self.parent.cambiar_idioma(nuevo_idioma)
+
+        super().accept()
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.parent.get_string("config_title"))
+        self.tab_widget.setTabText(0, self.parent.get_string("general_tab"))
+        self.btn_ok.setText(self.parent.get_string("close"))
+        self.lang_label.setText(self.parent.get_string("language") + ":")
+        self.env_dir_label.setText(self.parent.get_string("base_env_directory") + ":")
+        self.btn_browse_env_dir.setText(self.parent.get_string("change_button"))
+        self.reutilizar_terminal_check.setText(self.parent.get_string("reuse_terminal_instance"))
+        self.precompilar_check.setText(self.parent.get_string("precompile_after_create"))
+        self.descubrimiento_check.setText(self.parent.get_string("auto_discover_envs"))
+        self.raices_label.setText(self.parent.get_string("project_roots_label") + ":")
+        self.servicio_rpc_check.setText(self.parent.get_string("rpc_service_enabled"))
+        self.terminals_label.setText(self.parent.get_string("custom_terminals") + ":")
+        self.btn_add_terminal.setText(self.parent.get_string("add_custom_terminal_button"))
+        self.btn_eliminar_terminal.setText(self.parent.get_string("delete_selected_terminal"))
+
+    def actualizar_lista_terminales(self):
+        self.terminals_list.clear()
+        terminales_personalizados = self.config.get('terminales_personalizados', {})
+        for nombre, datos in terminales_personalizados.items():
+            item_text = f"{nombre} - {datos['ruta']}"
+            self.terminals_list.addItem(item_text)
+
+    def eliminar_terminal_seleccionada(self):
+        current_item = self.terminals_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("Selecciona una terminal para eliminar"))
+            return
+
+        item_text = current_item.text()
+        nombre_terminal = item_text.split(" - ")[0]
+
+        respuesta = QMessageBox.question(
+            self,
+            self.tr("Confirmar eliminación"),
+            f"{self.tr('¿Estás seguro de que quieres eliminar la terminal')} '{nombre_terminal}'?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+
+        if respuesta == QMessageBox.StandardButton.Yes:
+            if 'terminales_personalizados' in self.config:
+                if nombre_terminal in self.config['terminales_personalizados']:
+                    del self.config['terminales_personalizados'][nombre_terminal]
+                    self.parent.guardar_config()
+                    self.actualizar_lista_terminales()
+                    QMessageBox.information(self, self.tr("Éxito"), self.tr("Terminal eliminada correctamente"))
+
+# --- Diálogo de Importación de Entornos ---
+
+class ImportEnvDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle(self.parent.get_string("import_envs_button"))
+        self.setFixedSize(400, 280)
+        self.setup_ui()
+
+    def tr(self, text):
+        return QCoreApplication.translate("ImportEnvDialog", text)
+        
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        explanation_label = QLabel(self.parent.get_string("import_dialog_explanation"))
+        explanation_label.setWordWrap(True)
+        layout.addWidget(explanation_label)
+        layout.addStretch()
+
+        self.btn_select_and_search = QPushButton(self.parent.get_string("select_and_search_button"))
+        self.btn_select_and_search.clicked.connect(self.select_and_search)
+        layout.addWidget(self.btn_select_and_search)
+
+        self.btn_import_archive = QPushButton(self.parent.get_string("import_from_archive_button"))
+        self.btn_import_archive.clicked.connect(self.import_from_archive)
+        layout.addWidget(self.btn_import_archive)
+
+        self.btn_discover_tools = QPushButton(self.parent.get_string("discover_tools_button"))
+        self.btn_discover_tools.clicked.connect(self.discover_tools)
+        layout.addWidget(self.btn_discover_tools)
+
+        self.btn_close = QPushButton(self.parent.get_string("close"))
+        self.btn_close.clicked.connect(self.close)
+        layout.addWidget(self.btn_close)
+        
+    def select_and_search(self):
+        self.parent.buscar_entornos_existentes()
+        self.accept() 
+
+    def import_from_archive(self):
+        self.accept()
+        self.parent.importar_entorno_desde_archivo()
+
+    def discover_tools(self):
+        self.accept()
+        self.parent.descubrir_entornos_herramientas(forzar=True, interactivo=True)
+
+
+# --- Diálogo de Comparación de Entornos ---
+
+class DiffEntornosDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.paquetes_a = {}
+        self.paquetes_b = {}
+        self.conteo = None
+        self.resize(800, 600)
+        self.setup_ui()
+        self.retraducir_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        selector_layout = QHBoxLayout()
+        self.combo_a = QComboBox()
+        self.combo_b = QComboBox()
+        for nombre, ruta in self.parent.obtener_entornos_registrados():
+            self.combo_a.addItem(nombre, ruta)
+            self.combo_b.addItem(nombre, ruta)
+        if self.combo_b.count() > 1:
+            self.combo_b.setCurrentIndex(1)
+        selector_layout.addWidget(self.combo_a)
+        selector_layout.addWidget(QLabel("⇄"))
+        selector_layout.addWidget(self.combo_b)
+
+        self.btn_comparar = QPushButton()
+        self.btn_comparar.clicked.connect(self.comparar)
+        selector_layout.addWidget(self.btn_comparar)
+        layout.addLayout(selector_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        self.arbol_diff = QTreeWidget()
+        self.arbol_diff.setRootIsDecorated(False)
+        self.arbol_diff.setSortingEnabled(True)
+        self.arbol_diff.itemSelectionChanged.connect(self.mostrar_diff_archivos)
+        splitter.addWidget(self.arbol_diff)
+
+        self.diff_archivos_text = QTextEdit()
+        self.diff_archivos_text.setReadOnly(True)
+        self.diff_archivos_text.setStyleSheet("background-color: #2e2e2e; color: white; border: none;")
+        splitter.addWidget(self.diff_archivos_text)
+        layout.addWidget(splitter)
+
+        self.resumen_label = QLabel()
+        layout.addWidget(self.resumen_label)
+
+        self.btn_cerrar = QPushButton()
+        self.btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(self.btn_cerrar)
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.parent.get_string("diff_envs_title"))
+        self.btn_comparar.setText(self.parent.get_string("compare_button"))
+        self.btn_cerrar.setText(self.parent.get_string("close"))
+        self.arbol_diff.setHeaderLabels([
+            self.parent.get_string("package_column"), self.parent.get_string("status_column"),
+            self.parent.get_string("version_a_column"), self.parent.get_string("version_b_column"),
+        ])
+        # El estado de cada fila guarda su clave para poder traducirlo de nuevo
+        for i in range(self.arbol_diff.topLevelItemCount()):
+            item = self.arbol_diff.topLevelItem(i)
+            item.setText(1, self.parent.get_string(item.data(1, Qt.UserRole)))
+        self.actualizar_resumen()
+        if self.arbol_diff.currentItem():
+            self.mostrar_diff_archivos()
+
+    def actualizar_resumen(self):
+        if self.conteo is None:
+            self.resumen_label.clear()
+            return
+        self.resumen_label.setText("  |  ".join(
+            f"{self.parent.get_string(clave)}: {n}"
+            for clave, n in zip(("diff_only_a", "diff_only_b", "diff_version_changed", "diff_equal"), self.conteo)
+        ))
+
+    def comparar(self):
+        ruta_a = self.combo_a.currentData()
+        ruta_b = self.combo_b.currentData()
+        if not ruta_a or not ruta_b:
+            return
+
+        cache = self.parent.cache_metadatos
+        self.paquetes_a = cache.obtener_paquetes(ruta_a)
+        self.paquetes_b = cache.obtener_paquetes(ruta_b)
+        añadidos, eliminados, cambiados = diferenciar_paquetes(self.paquetes_a, self.paquetes_b)
+
+        self.arbol_diff.setSortingEnabled(False)
+        self.arbol_diff.clear()
+        filas = (
+            [(datos['nombre'], "diff_only_a", datos['version'], "") for datos in eliminados]
+            + [(datos['nombre'], "diff_only_b", "", datos['version']) for datos in añadidos]
+            + [(a['nombre'], "diff_version_changed", a['version'], b['version']) for a, b in cambiados]
+        )
+        items = []
+        for nombre, clave, version_a, version_b in filas:
+            item = QTreeWidgetItem([nombre, self.parent.get_string(clave), version_a, version_b])
+            item.setData(1, Qt.UserRole, clave)
+            items.append(item)
+        self.arbol_diff.addTopLevelItems(items)
+        self.arbol_diff.setSortingEnabled(True)
+        self.arbol_diff.sortByColumn(0, Qt.AscendingOrder)
+
+        iguales = len(self.paquetes_a) - len(eliminados) - len(cambiados)
+        self.conteo = (len(eliminados), len(añadidos), len(cambiados), iguales)
+        self.actualizar_resumen()
+        self.diff_archivos_text.clear()
+
+    def mostrar_diff_archivos(self):
+        item = self.arbol_diff.currentItem()
+        if not item:
+            return
+
+        clave = normalizar_nombre_paquete(item.text(0))
+        datos_a = self.paquetes_a.get(clave)
+        datos_b = self.paquetes_b.get(clave)
+        if not datos_a or not datos_b:
+            self.diff_archivos_text.setPlainText(self.parent.get_string("diff_package_in_one_env"))
+            return
+
+        # Las rutas del RECORD incluyen el propio dist-info con la versión, se normalizan para comparar
+        def sin_dist_info(record, dist_info):
+            prefijo = os.path.basename(dist_info) + '/'
+            return {
+                (r.replace(prefijo, '<dist-info>/', 1) if r.startswith(prefijo) else r): v
+                for r, v in record.items()
+            }
+
+        record_a = sin_dist_info(leer_record(datos_a['dist_info']), datos_a['dist_info'])
+        record_b = sin_dist_info(leer_record(datos_b['dist_info']), datos_b['dist_info'])
+        if not record_a or not record_b:
+            self.diff_archivos_text.setPlainText(self.parent.get_string("diff_record_missing"))
+            return
+
+        añadidos, eliminados, modificados = diferenciar_record(record_a, record_b)
+        texto = self.parent.get_string("diff_files_of") % (datos_a['nombre'], datos_a['version'], datos_b['version']) + "\n\n"
+        texto += "".join(f"- {r}\n" for r in eliminados)
+        texto += "".join(f"+ {r}\n" for r in añadidos)
+        texto += "".join(f"~ {r}\n" for r in modificados)
+        if not (añadidos or eliminados or modificados):
+            texto += self.parent.get_string("diff_files_identical") + "\n"
+        self.diff_archivos_text.setPlainText(texto)
+
+
+# --- Diálogo de Ejecución en Matriz de Entornos ---
+
+class MatrizComandosDialog(QDialog):
+    COLUMNA_ENTORNO, COLUMNA_ESTADO, COLUMNA_CODIGO, COLUMNA_TIEMPO = range(4)
+
+    def __init__(self, parent=None, seleccionados=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.seleccionados = set(seleccionados or [])
+        self.pendientes = []
+        self.procesos = {}
+        self.decodificadores = {}
+        self.filas = {}
+        self.paneles = {}
+        self.resize(900, 650)
+        self.setup_ui()
+        self.retraducir_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        comando_layout = QHBoxLayout()
+        self.input_comando = QLineEdit()
+        self.input_comando.setPlaceholderText("pytest  |  python -c 'import x'")
+        comando_layout.addWidget(self.input_comando)
+
+        self.trabajadores_label = QLabel()
+        comando_layout.addWidget(self.trabajadores_label)
+        self.spin_trabajadores = QSpinBox()
+        self.spin_trabajadores.setRange(1, 64)
+        self.spin_trabajadores.setValue(self.parent.config.get('matriz_trabajadores', os.cpu_count() or 4))
+        comando_layout.addWidget(self.spin_trabajadores)
+
+        self.btn_ejecutar = QPushButton()
+        self.btn_ejecutar.clicked.connect(self.ejecutar)
+        comando_layout.addWidget(self.btn_ejecutar)
+
+        self.btn_detener = QPushButton()
+        self.btn_detener.clicked.connect(self.detener)
+        self.btn_detener.setEnabled(False)
+        comando_layout.addWidget(self.btn_detener)
+        layout.addLayout(comando_layout)
+
+        # El comando se ejecuta en el proyecto (p.ej. pytest recoge sus tests), no dentro del entorno
+        directorio_layout = QHBoxLayout()
+        self.directorio_label = QLabel()
+        directorio_layout.addWidget(self.directorio_label)
+        self.input_directorio = QLineEdit(self.parent.config.get('matriz_directorio') or os.getcwd())
+        directorio_layout.addWidget(self.input_directorio)
+        self.btn_directorio = QPushButton()
+        self.btn_directorio.clicked.connect(self.elegir_directorio)
+        directorio_layout.addWidget(self.btn_directorio)
+        layout.addLayout(directorio_layout)
+
+        splitter = QSplitter(Qt.Horizontal)
+
+        self.lista_entornos = QListWidget()
+        for nombre, ruta in self.parent.obtener_entornos_registrados():
+            item = QListWidgetItem(nombre)
+            item.setData(Qt.UserRole, ruta)
+            item.setToolTip(ruta)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if ruta in self.seleccionados else Qt.Unchecked)
+            self.lista_entornos.addItem(item)
+        splitter.addWidget(self.lista_entornos)
+
+        resultados_splitter = QSplitter(Qt.Vertical)
+        self.tabla_resultados = QTableWidget(0, 4)
+        self.tabla_resultados.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla_resultados.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_resultados.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla_resultados.cellClicked.connect(self.mostrar_panel)
+        resultados_splitter.addWidget(self.tabla_resultados)
+
+        self.tabs_salida = QTabWidget()
+        resultados_splitter.addWidget(self.tabs_salida)
+        splitter.addWidget(resultados_splitter)
+        splitter.setSizes([200, 700])
+        layout.addWidget(splitter)
+
+        self.resumen_label = QLabel()
+        layout.addWidget(self.resumen_label)
+
+        self.btn_cerrar = QPushButton()
+        self.btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(self.btn_cerrar)
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.parent.get_string("matrix_runner_title"))
+        self.trabajadores_label.setText(self.parent.get_string("matrix_workers_label") + ":")
+        self.directorio_label.setText(self.parent.get_string("working_directory_label") + ":")
+        self.btn_directorio.setText(self.parent.get_string("browse"))
+        self.btn_ejecutar.setText(self.parent.get_string("run_button"))
+        self.btn_detener.setText(self.parent.get_string("stop_button"))
+        self.btn_cerrar.setText(self.parent.get_string("close"))
+        self.tabla_resultados.setHorizontalHeaderLabels([
+            self.parent.get_string("environment_column"), self.parent.get_string("status_column"),
+            self.parent.get_string("code_column"), self.parent.get_string("time_seconds_column"),
+        ])
+        for fila in range(self.tabla_resultados.rowCount()):
+            item_estado = self.tabla_resultados.item(fila, self.COLUMNA_ESTADO)
+            item_estado.setText(self.parent.get_string(item_estado.data(Qt.UserRole)))
+        if not self.procesos and not self.pendientes and self.tabla_resultados.rowCount():
+            self.actualizar_resumen()
+
+    def poner_estado(self, fila, estado):
+        """estado es la clave de traducción; se guarda en el item para contar y retraducir"""
+        item_estado = self.tabla_resultados.item(fila, self.COLUMNA_ESTADO)
+        item_estado.setData(Qt.UserRole, estado)
+        item_estado.setText(self.parent.get_string(estado))
+        return item_estado
+
+    def elegir_directorio(self):
+        directorio = QFileDialog.getExistingDirectory(self, self.parent.get_string("working_directory_label"), self.input_directorio.text())
+        if directorio:
+            self.input_directorio.setText(directorio)
+
+    def entornos_marcados(self):
+        marcados = []
+        for i in range(self.lista_entornos.count()):
+            item = self.lista_entornos.item(i)
+            if item.checkState() == Qt.Checked:
+                marcados.append((item.text(), item.data(Qt.UserRole)))
+        return marcados
+
+    def ejecutar(self):
+        comando = self.input_comando.text().strip()
+        entornos = self.entornos_marcados()
+        if not comando or not entornos:
+            QMessageBox.warning(self, self.parent.get_string("warning"), self.parent.get_string("matrix_missing_fields"))
+            return
+        directorio = os.path.abspath(os.path.expanduser(self.input_directorio.text().strip() or os.getcwd()))
+        if not os.path.isdir(directorio):
+            QMessageBox.warning(self, self.parent.get_string("warning"), f"{self.parent.get_string('matrix_workdir_missing')}: {directorio}")
+            return
+
+        self.directorio = directorio
+        self.parent.config['matriz_directorio'] = directorio
+        self.parent.config['matriz_trabajadores'] = self.spin_trabajadores.value()
+        self.parent.guardar_config()
+
+        self.comando = comando
+        self.tabla_resultados.setRowCount(0)
+        self.tabs_salida.clear()
+        self.filas.clear()
+        self.paneles.clear()
+
+        for nombre, ruta in entornos:
+            fila = self.tabla_resultados.rowCount()
+            self.tabla_resultados.insertRow(fila)
+            self.tabla_resultados.setItem(fila, self.COLUMNA_ENTORNO, QTableWidgetItem(nombre))
+            self.tabla_resultados.setItem(fila, self.COLUMNA_ESTADO, QTableWidgetItem())
+            self.poner_estado(fila, "matrix_queued")
+            self.tabla_resultados.setItem(fila, self.COLUMNA_CODIGO, QTableWidgetItem(""))
+            self.tabla_resultados.setItem(fila, self.COLUMNA_TIEMPO, QTableWidgetItem(""))
+            self.filas[ruta] = fila
+
+            panel = QPlainTextEdit()
+            panel.setReadOnly(True)
+            panel.setMaximumBlockCount(5000)
+            panel.setStyleSheet("background-color: #2e2e2e; color: white; border: none; font-family: monospace;")
+            self.tabs_salida.addTab(panel, nombre)
+            self.paneles[ruta] = panel
+
+        self.pendientes = [ruta for _, ruta in entornos]
+        self.btn_ejecutar.setEnabled(False)
+        self.btn_detener.setEnabled(True)
+        self.resumen_label.clear()
+        self.lanzar_siguientes()
+
+    def lanzar_siguientes(self):
+        while self.pendientes and len(self.procesos) < self.spin_trabajadores.value():
+            self.lanzar(self.pendientes.pop(0))
+
+        if not self.pendientes and not self.procesos:
+            self.finalizar_matriz()
+
+    def lanzar(self, ruta):
+        fila = self.filas[ruta]
+        try:
+            programa, argumentos = resolver_comando_entorno(ruta, self.comando)
+        except ValueError as e:
+            self.paneles[ruta].appendPlainText(str(e))
+            self.marcar_resultado(fila, "matrix_error", "", None)
+            return
+
+        proceso = QProcess(self)
+        proceso.setProcessEnvironment(construir_entorno_proceso(ruta))
+        proceso.setProcessChannelMode(QProcess.MergedChannels)
+        proceso.setWorkingDirectory(self.directorio)
+        proceso.readyReadStandardOutput.connect(lambda r=ruta: self.leer_salida(r))
+        proceso.finished.connect(lambda codigo, estado, r=ruta: self.proceso_terminado(r, codigo, estado))
+        proceso.errorOccurred.connect(lambda error, r=ruta: self.proceso_error(r, error))
+
+        cronometro = QElapsedTimer()
+        cronometro.start()
+        self.procesos[ruta] = (proceso, cronometro)
+        # Un carácter multibyte puede quedar partido entre dos lecturas
+        self.decodificadores[ruta] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.poner_estado(fila, "matrix_running")
+        proceso.start(programa, argumentos)
+
+    def leer_salida(self, ruta):
+        proceso, _ = self.procesos.get(ruta, (None, None))
+        if proceso:
+            datos = self.decodificadores[ruta].decode(bytes(proceso.readAllStandardOutput()))
+            panel = self.paneles[ruta]
+            panel.moveCursor(QTextCursor.End)
+            panel.insertPlainText(datos)
+
+    def proceso_terminado(self, ruta, codigo, estado):
+        if ruta not in self.procesos:
+            return
+        self.leer_salida(ruta)
+        resto = self.decodificadores.pop(ruta).decode(b'', final=True)
+        if resto:
+            self.paneles[ruta].insertPlainText(resto)
+        proceso, cronometro = self.procesos.pop(ruta)
+        segundos = cronometro.elapsed() / 1000.0
+        if estado == QProcess.CrashExit:
+            self.marcar_resultado(self.filas[ruta], "matrix_interrupted", "", segundos)
+        else:
+            self.marcar_resultado(self.filas[ruta], "matrix_ok" if codigo == 0 else "matrix_failed", str(codigo), segundos)
+        proceso.deleteLater()
+        self.lanzar_siguientes()
+
+    def proceso_error(self, ruta, error):
+        # FailedToStart no emite finished, el resto de errores sí
+        if error != QProcess.FailedToStart or ruta not in self.procesos:
+            return
+        proceso, cronometro = self.procesos.pop(ruta)
+        self.paneles[ruta].appendPlainText(proceso.errorString())
+        self.marcar_resultado(self.filas[ruta], "matrix_error", "", cronometro.elapsed() / 1000.0)
+        proceso.deleteLater()
+        self.lanzar_siguientes()
+
+    def marcar_resultado(self, fila, estado, codigo, segundos):
+        colores = {"matrix_ok": "#2e7d32", "matrix_failed": "#c62828", "matrix_error": "#c62828", "matrix_interrupted": "#ef6c00"}
+        item_estado = self.poner_estado(fila, estado)
+        if estado in colores:
+            item_estado.setBackground(QColor(colores[estado]))
+        self.tabla_resultados.item(fila, self.COLUMNA_CODIGO).setText(codigo)
+        self.tabla_resultados.item(fila, self.COLUMNA_TIEMPO).setText(f"{segundos:.2f}" if segundos is not None else "")
+
+    def finalizar_matriz(self):
+        self.btn_ejecutar.setEnabled(True)
+        self.btn_detener.setEnabled(False)
+        self.actualizar_resumen()
+
+    def actualizar_resumen(self):
+        conteo = {}
+        for fila in range(self.tabla_resultados.rowCount()):
+            estado = self.parent.get_string(self.tabla_resultados.item(fila, self.COLUMNA_ESTADO).data(Qt.UserRole))
+            conteo[estado] = conteo.get(estado, 0) + 1
+        self.resumen_label.setText("  |  ".join(f"{estado}: {n}" for estado, n in sorted(conteo.items())))
+
+    def detener(self):
+        for ruta in self.pendientes:
+            self.marcar_resultado(self.filas[ruta], "matrix_cancelled", "", None)
+        self.pendientes = []
+        for proceso, _ in list(self.procesos.values()):
+            proceso.kill()
+
+    def mostrar_panel(self, fila, _columna):
+        self.tabs_salida.setCurrentIndex(fila)
+
+    def closeEvent(self, event):
+        self.detener()
+        for proceso, _ in list(self.procesos.values()):
+            proceso.waitForFinished(1000)
+        super().closeEvent(event)
+
+
+# --- Consola Integrada por Entorno ---
+
+class ConsolaEntornoWidget(QWidget):
+    """Consola embebida que ejecuta comandos dentro de un entorno mediante QProcess"""
+    MAX_LINEAS = 5000
+
+    def __init__(self, main_window, entorno_path, entorno_name, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.entorno_path = entorno_path
+        self.entorno_name = entorno_name
+        self.proceso = None
+        self.decodificador = None
+        self.historial = []
+        self.indice_historial = 0
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.salida = QPlainTextEdit()
+        self.salida.setReadOnly(True)
+        # La salida larga descarta las líneas más antiguas
+        self.salida.setMaximumBlockCount(self.MAX_LINEAS)
+        self.salida.setStyleSheet("background-color: #2e2e2e; color: white; border: none; font-family: monospace;")
+        layout.addWidget(self.salida)
+
+        entrada_layout = QHBoxLayout()
+        self.entrada = QLineEdit()
+        self.entrada.setPlaceholderText("pip install paquete  |  python -V")
+        self.entrada.returnPressed.connect(self.ejecutar)
+        self.entrada.installEventFilter(self)
+        entrada_layout.addWidget(self.entrada)
+
+        self.btn_detener = QPushButton(self.main_window.get_string("stop_button"))
+        self.btn_detener.setEnabled(False)
+        self.btn_detener.clicked.connect(self.detener)
+        entrada_layout.addWidget(self.btn_detener)
+
+        self.btn_limpiar = QPushButton(self.main_window.get_string("clear_button"))
+        self.btn_limpiar.clicked.connect(self.limpiar)
+        entrada_layout.addWidget(self.btn_limpiar)
+        layout.addLayout(entrada_layout)
+
+    def eventFilter(self, obj, event):
+        # Navegación por el historial con las flechas
+        if obj is self.entrada and event.type() == QEvent.KeyPress and self.historial:
+            if event.key() == Qt.Key_Up:
+                self.indice_historial = max(0, self.indice_historial - 1)
+                self.entrada.setText(self.historial[self.indice_historial])
+                return True
+            if event.key() == Qt.Key_Down:
+                self.indice_historial = min(len(self.historial), self.indice_historial + 1)
+                texto = self.historial[self.indice_historial] if self.indice_historial < len(self.historial) else ""
+                self.entrada.setText(texto)
+                return True
+        return super().eventFilter(obj, event)
+
+    def agregar_lineas(self, texto):
+        """Añade la salida tal cual al final: las líneas sin salto (p.ej. preguntas de pip) se ven al momento"""
+        cursor = self.salida.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(texto)
+        self.salida.setTextCursor(cursor)
+        self.salida.ensureCursorVisible()
+
+    def cerrar_linea(self):
+        if self.salida.document().lastBlock().text():
+            self.agregar_lineas("\n")
+
+    def ejecutar(self):
+        if self.proceso is not None:
+            # Con un comando en marcha la entrada se envía a su stdin (p.ej. responder 'y' a pip uninstall)
+            texto = self.entrada.text()
+            self.entrada.clear()
+            self.agregar_lineas(texto + "\n")
+            self.proceso.write((texto + "\n").encode())
+            return
+        comando = self.entrada.text().strip()
+        if not comando:
+            return
+        self.entrada.clear()
+        if not self.historial or self.historial[-1] != comando:
+            self.historial.append(comando)
+        self.indice_historial = len(self.historial)
+
+        self.cerrar_linea()
+        self.agregar_lineas(f"$ {comando}\n")
+        try:
+            programa, argumentos = resolver_comando_entorno(self.entorno_path, comando)
+        except ValueError as e:
+            self.agregar_lineas(f"{e}\n")
+            return
+
+        self.decodificador = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.proceso = QProcess(self)
+        self.proceso.setProcessEnvironment(construir_entorno_proceso(self.entorno_path))
+        self.proceso.setProcessChannelMode(QProcess.MergedChannels)
+        self.proceso.setWorkingDirectory(self.entorno_path)
+        self.proceso.readyReadStandardOutput.connect(self.leer_salida)
+        self.proceso.finished.connect(self.proceso_terminado)
+        self.proceso.errorOccurred.connect(self.proceso_error)
+        self.btn_detener.setEnabled(True)
+        self.proceso.start(programa, argumentos)
+
+    def leer_salida(self):
+        if self.proceso:
+            self.agregar_lineas(self.decodificador.decode(bytes(self.proceso.readAllStandardOutput())))
+
+    def proceso_terminado(self, codigo, estado):
+        self.leer_salida()
+        self.agregar_lineas(self.decodificador.decode(b'', final=True))
+        self.cerrar_linea()
+        if estado == QProcess.CrashExit:
+            self.agregar_lineas("[proceso interrumpido]\n")
+        elif codigo != 0:
+            self.agregar_lineas(f"[código de salida {codigo}]\n")
+        self.liberar_proceso()
+        # Un pip install/uninstall cambia los paquetes del entorno
+        self.main_window.cache_metadatos.invalidar(self.entorno_path)
+
+    def proceso_error(self, error):
+        if error == QProcess.FailedToStart and self.proceso:
+            self.agregar_lineas(f"{self.proceso.errorString()}\n")
+            self.liberar_proceso()
+
+    def liberar_proceso(self):
+        if self.proceso:
+            self.proceso.deleteLater()
+            self.proceso = None
+        self.btn_detener.setEnabled(False)
+        self.entrada.setFocus()
+
+    def detener(self):
+        if self.proceso:
+            self.proceso.kill()
+
+    def limpiar(self):
+        self.salida.clear()
+
+    def cerrar(self):
+        if self.proceso:
+            self.proceso.kill()
+            self.proceso.waitForFinished(1000)
+
+
+class ConsolaEntornosDialog(QDialog):
+    """Ventana con una pestaña de consola por cada entorno abierto"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle(self.parent.get_string("console_title"))
+        self.resize(750, 500)
+        layout = QVBoxLayout(self)
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setTabsClosable(True)
+        self.tab_widget.tabCloseRequested.connect(self.cerrar_pestaña)
+        layout.addWidget(self.tab_widget)
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.parent.get_string("console_title"))
+        for i in range(self.tab_widget.count()):
+            consola = self.tab_widget.widget(i)
+            consola.btn_detener.setText(self.parent.get_string("stop_button"))
+            consola.btn_limpiar.setText(self.parent.get_string("clear_button"))
+
+    def abrir_consola(self, entorno_path, entorno_name):
+        for i in range(self.tab_widget.count()):
+            if self.tab_widget.widget(i).entorno_path == entorno_path:
+                self.tab_widget.setCurrentIndex(i)
+                break
+        else:
+            consola = ConsolaEntornoWidget(self.parent, entorno_path, entorno_name)
+            self.tab_widget.addTab(consola, entorno_name)
+            self.tab_widget.setCurrentWidget(consola)
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.tab_widget.currentWidget().entrada.setFocus()
+
+    def cerrar_pestaña(self, indice):
+        consola = self.tab_widget.widget(indice)
+        consola.cerrar()
+        self.tab_widget.removeTab(indice)
+        consola.deleteLater()
+        if self.tab_widget.count() == 0:
+            self.hide()
+
+    def closeEvent(self, event):
+        while self.tab_widget.count():
+            self.cerrar_pestaña(0)
+        super().closeEvent(event)
+
+
+# --- Diálogo de Exportación de Entornos ---
+
+class ExportarEntornoDialog(QDialog):
+    def __init__(self, parent=None, entorno_path=""):
+        super().__init__(parent)
+        self.parent = parent
+        self.entorno_path = entorno_path
+        self.setWindowTitle(self.parent.get_string("export_env_title"))
+        self.setFixedSize(500, 200)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(self.parent.get_string("export_destination") + ":"))
+        ruta_layout = QHBoxLayout()
+        nombre_archivo = os.path.basename(self.entorno_path.rstrip(os.sep)) + formato_exportacion_disponible()
+        self.input_ruta = QLineEdit(os.path.join(QDir.homePath(), nombre_archivo))
+        ruta_layout.addWidget(self.input_ruta)
+        self.btn_browse = QPushButton(self.parent.get_string("browse"))
+        self.btn_browse.clicked.connect(self.browse_destino)
+        ruta_layout.addWidget(self.btn_browse)
+        layout.addLayout(ruta_layout)
+
+        self.omitir_pycache_check = QCheckBox(self.parent.get_string("skip_pycache"))
+        self.omitir_pycache_check.setChecked(True)
+        layout.addWidget(self.omitir_pycache_check)
+        layout.addStretch()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def browse_destino(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            self.parent.get_string("export_env_title"),
+            self.input_ruta.text(),
+            "Entornos (*.tar.zst *.tar.xz)"
+        )
+        if path:
+            if not path.endswith(('.tar.zst', '.tar.xz')):
+                path += formato_exportacion_disponible()
+            self.input_ruta.setText(path)
+
+
+# --- Diálogo de Optimización de Bytecode ---
+
+class OptimizarEntornoDialog(QDialog):
+    def __init__(self, parent=None, entorno_path=""):
+        super().__init__(parent)
+        self.parent = parent
+        self.entorno_path = entorno_path
+        self.setWindowTitle(f"{self.parent.get_string('optimize_env_title')}: {os.path.basename(entorno_path)}")
+        self.setFixedSize(450, 220)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.precompilar_check = QCheckBox(self.parent.get_string("optimize_precompile"))
+        self.precompilar_check.setChecked(True)
+        layout.addWidget(self.precompilar_check)
+
+        self.podar_check = QCheckBox(self.parent.get_string("optimize_prune_pycache"))
+        self.podar_check.setChecked(True)
+        layout.addWidget(self.podar_check)
+
+        self.quitar_tests_check = QCheckBox(self.parent.get_string("optimize_strip_tests"))
+        self.quitar_tests_check.setToolTip(", ".join(sorted(DIRECTORIOS_TESTS_DOCS)))
+        layout.addWidget(self.quitar_tests_check)
+
+        self.medir_check = QCheckBox(self.parent.get_string("optimize_measure_imports"))
+        self.medir_check.setChecked(True)
+        layout.addWidget(self.medir_check)
+        layout.addStretch()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
 
-    def browse_for_python(self):
-        path, _ = QFileDialog.getOpenFileName(
-            self, 
-            self.tr("Seleccionar ejecutable de Python"), 
-            QDir.homePath(), 
-            self.tr("Ejecutables (*)")
-        )
-        if path:
-            self.path_input.setText(path)
-            
-    def accept_selection(self):
-        selected_path = self.path_input.text().strip()
-        if not selected_path:
-            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("Por favor, introduce una ruta válida."))
-            return
-            
-        if not os.path.exists(selected_path):
-            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("El ejecutable no existe. Por favor, verifica la ruta."))
-            return
-            
-        self.selected_path = selected_path
-        self.accept()
-# ----------------------------------------------------
+    def opciones(self):
+        return {
+            'precompilar': self.precompilar_check.isChecked(),
+            'podar': self.podar_check.isChecked(),
+            'quitar_tests': self.quitar_tests_check.isChecked(),
+            'medir': self.medir_check.isChecked(),
+        }
 
-# --- Diálogo para Configuración de Terminal Personalizada (Corregido) ---
-class CustomTerminalDialog(QDialog):
-    def __init__(self, main_window, parent=None): 
+
+# --- Diálogo para Mover / Renombrar Entornos ---
+
+class ReubicarEntornoDialog(QDialog):
+    def __init__(self, parent=None, entorno_path=""):
         super().__init__(parent)
-        self.main_window = main_window
-        self.nombre = None
-        self.ruta = None
-        self.comando = None
-        self.setWindowTitle(self.main_window.get_string("custom_terminal")) 
-        self.setFixedSize(500, 300)
+        self.parent = parent
+        self.entorno_path = entorno_path
+        self.setWindowTitle(self.parent.get_string("relocate_env_title"))
+        self.setFixedSize(500, 220)
         self.setup_ui()
 
-    def tr(self, text):
-        return QCoreApplication.translate("CustomTerminalDialog", text)
-        
     def setup_ui(self):
         layout = QVBoxLayout(self)
-        parent = self.main_window
 
-        layout.addWidget(QLabel(parent.get_string("terminal_name")))
-        self.input_nombre = QLineEdit()
+        layout.addWidget(QLabel(self.parent.get_string("env_name_placeholder") + ":"))
+        self.input_nombre = QLineEdit(os.path.basename(self.entorno_path))
         layout.addWidget(self.input_nombre)
-        
-        layout.addWidget(QLabel(parent.get_string("terminal_path")))
-        ruta_layout = QHBoxLayout()
-        self.input_ruta = QLineEdit("/usr/bin/")
-        ruta_layout.addWidget(self.input_ruta)
-        self.btn_browse_ruta = QPushButton(parent.get_string("browse"))
-        self.btn_browse_ruta.clicked.connect(self.browse_for_terminal)
-        ruta_layout.addWidget(self.btn_browse_ruta)
-        layout.addLayout(ruta_layout)
-        
-        # --- INICIO DE LA CORRECCIÓN: Ajuste de Texto ---
-        label_comando = QLabel(parent.get_string("custom_command_full"))
-        label_comando.setWordWrap(True) # ¡Asegura que el texto se ajuste!
-        layout.addWidget(label_comando)
-        # --- FIN DE LA CORRECCIÓN ---
 
-        self.input_comando = QLineEdit("-e 'bash --init-file {script}'")
-        layout.addWidget(self.input_comando)
-        
+        layout.addWidget(QLabel(self.parent.get_string("base_env_directory") + ":"))
+        base_layout = QHBoxLayout()
+        self.input_base = QLineEdit(os.path.dirname(self.entorno_path))
+        base_layout.addWidget(self.input_base)
+        self.btn_browse = QPushButton(self.parent.get_string("browse"))
+        self.btn_browse.clicked.connect(self.browse_base)
+        base_layout.addWidget(self.btn_browse)
+        layout.addLayout(base_layout)
         layout.addStretch()
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, self)
@@ -569,235 +6340,571 @@ class CustomTerminalDialog(QDialog):
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
 
-    def browse_for_terminal(self):
-        path, _ = QFileDialog.getOpenFileName(
-            self, 
-            self.main_window.get_string("select_terminal_executable"), 
-            QDir.homePath(), 
-            self.tr("Ejecutables (*)")
-        )
-        if path:
-            self.input_ruta.setText(path)
+    def browse_base(self):
+        dir_path = QFileDialog.getExistingDirectory(self, self.parent.get_string("browse_env_dir_title"), self.input_base.text())
+        if dir_path:
+            self.input_base.setText(dir_path)
+
+    def destino(self):
+        # Una base escrita a mano puede ser relativa o empezar por ~
+        base = os.path.abspath(os.path.expanduser(self.input_base.text().strip()))
+        return os.path.join(base, self.input_nombre.text().strip())
 
     def check_and_accept(self):
         nombre = self.input_nombre.text().strip()
-        ruta = self.input_ruta.text().strip()
-        comando = self.input_comando.text().strip()
-        parent = self.main_window
-
-        if not nombre or not ruta or not comando:
-            QMessageBox.warning(self, parent.get_string("warning"), parent.get_string("provide_all_custom_terminal_fields"))
+        base = self.input_base.text().strip()
+        if not nombre or not base or os.sep in nombre or '|' in nombre:
+            QMessageBox.warning(self, self.parent.get_string("warning"), self.parent.get_string("provide_name"))
+            return
+        if os.path.exists(self.destino()):
+            QMessageBox.warning(self, self.parent.get_string("warning"), f"{self.parent.get_string('relocate_target_exists')}: {self.destino()}")
             return
-            
-        if not os.path.exists(ruta):
-            respuesta = QMessageBox.question(self, parent.get_string("executable_not_found"), parent.get_string("continue_anyway"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-            if respuesta == QMessageBox.StandardButton.No: return
-            
-        self.nombre = nombre
-        self.ruta = ruta
-        self.comando = comando
         self.accept()
 
-# --- Diálogo de Configuración (Modificado - Eliminada pestaña de Gestión de Entornos) ---
 
-class ConfigDialog(QDialog):
-    def __init__(self, parent=None, config=None):
+# --- Diálogo de Avisos de Seguridad ---
+
+class VerificacionDialog(QDialog):
+    """Resultado de comprobar los archivos instalados contra los hashes de sus RECORD"""
+
+    def __init__(self, parent=None, entorno_inicial=None):
         super().__init__(parent)
-        self.parent = parent 
-        self.config = config
+        self.parent = parent
+        self.entorno_inicial = entorno_inicial
+        self.setWindowTitle(self.parent.get_string("verify_title"))
+        self.resize(750, 500)
         self.setup_ui()
 
-    def tr(self, text):
-        return QCoreApplication.translate("ConfigDialog", text)
-
     def setup_ui(self):
-        self.setWindowTitle(self.tr("Configuración"))
-        self.setFixedSize(600, 500)
-
         layout = QVBoxLayout(self)
 
-        # Crear el widget de pestañas
-        self.tab_widget = QTabWidget()
-        
-        # Pestaña 1: Configuración General
-        self.general_tab = QWidget()
-        self.setup_general_tab()
-        self.tab_widget.addTab(self.general_tab, self.tr("General"))
-        
-        layout.addWidget(self.tab_widget)
+        self.arbol = QTreeWidget()
+        self.arbol.setColumnCount(2)
+        self.arbol.setHeaderLabels([self.parent.get_string("package_column"), self.parent.get_string("status_column")])
+        self.arbol.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.arbol)
+
+        self.resumen_label = QLabel(self.parent.get_string("verify_hint"))
+        layout.addWidget(self.resumen_label)
 
-        # Solo un botón de Cerrar
         buttons_layout = QHBoxLayout()
         buttons_layout.addStretch()
-        
-        self.btn_ok = QPushButton(self.tr("Cerrar"))
-        self.btn_ok.clicked.connect(self.accept_changes) 
-        buttons_layout.addWidget(self.btn_ok)
-        
+        if self.entorno_inicial:
+            self.btn_verificar = QPushButton(f"{self.parent.get_string('verify_env')} '{os.path.basename(self.entorno_inicial)}'")
+            self.btn_verificar.clicked.connect(lambda: self.verificar([self.entorno_inicial]))
+            buttons_layout.addWidget(self.btn_verificar)
+        self.btn_verificar_todos = QPushButton(self.parent.get_string("verify_all"))
+        self.btn_verificar_todos.clicked.connect(
+            lambda: self.verificar([ruta for _nombre, ruta in self.parent.obtener_entornos_registrados()])
+        )
+        buttons_layout.addWidget(self.btn_verificar_todos)
+        self.btn_cerrar = QPushButton(self.parent.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        buttons_layout.addWidget(self.btn_cerrar)
         layout.addLayout(buttons_layout)
 
-    def setup_general_tab(self):
-        """Configura la pestaña de configuración general"""
-        layout = QVBoxLayout(self.general_tab)
+    def verificar(self, rutas):
+        inicio = time.perf_counter()
+        resultados, error = self.parent.ejecutar_con_progreso(
+            self.parent.get_string("verify_title"), verificar_entornos, rutas, ARCHIVO_CACHE_VERIFICACION
+        )
+        if error:
+            QMessageBox.critical(self, self.parent.get_string("error"), error)
+            return
+        self.mostrar(resultados, time.perf_counter() - inicio)
 
-        # 1. Selector de Idioma
-        lang_layout = QHBoxLayout()
-        lang_label = QLabel(self.tr("Idioma") + ":")
-        self.lang_combo = QComboBox()
-        self.lang_combo.addItem("Español", "es")
-        self.lang_combo.addItem("English", "en")
-        self.lang_combo.addItem("Português", "pt")
-        
-        current_lang = self.config.get('idioma', 'es')
-        index = self.lang_combo.findData(current_lang)
-        if index >= 0:
-            self.lang_combo.setCurrentIndex(index)
-        
-        lang_layout.addWidget(lang_label)
-        lang_layout.addWidget(self.lang_combo)
-        layout.addLayout(lang_layout)
-        
-        # 2. Directorio Base de Entornos
-        layout.addWidget(QLabel(self.parent.get_string("base_env_directory") + ":"))
-        
-        env_dir_layout = QHBoxLayout()
-        self.env_dir_input = QLineEdit(self.config.get('directorio_base_env'))
-        self.env_dir_input.setReadOnly(True) 
-        env_dir_layout.addWidget(self.env_dir_input)
-        
-        self.btn_browse_env_dir = QPushButton(self.parent.get_string("change_button"))
-        self.btn_browse_env_dir.clicked.connect(self.browse_env_directory)
-        env_dir_layout.addWidget(self.btn_browse_env_dir)
-        layout.addLayout(env_dir_layout)
-        
-        # 3. Terminales personalizadas
-        layout.addWidget(QLabel(self.tr("Terminales personalizadas") + ":"))
-        self.terminals_list = QListWidget()
-        self.actualizar_lista_terminales()
-        layout.addWidget(self.terminals_list)
-        
-        # Botones para terminales (Añadir y Eliminar)
-        terminals_buttons_layout = QHBoxLayout()
-        self.btn_add_terminal = QPushButton(self.parent.get_string("add_custom_terminal_button")) 
-        self.btn_add_terminal.clicked.connect(self.add_custom_terminal)
-        terminals_buttons_layout.addWidget(self.btn_add_terminal)
-        
-        self.btn_eliminar_terminal = QPushButton(self.tr("Eliminar seleccionada"))
-        self.btn_eliminar_terminal.clicked.connect(self.eliminar_terminal_seleccionada)
-        terminals_buttons_layout.addWidget(self.btn_eliminar_terminal)
-        layout.addLayout(terminals_buttons_layout)
+    def mostrar(self, resultados, duracion):
+        tipos = (
+            ('modificados', self.parent.get_string("verify_modified"), "#E06060"),
+            ('faltantes', self.parent.get_string("verify_missing"), "#E06060"),
+            ('extra', self.parent.get_string("verify_extra"), "#E0A040"),
+        )
+        self.arbol.clear()
+        archivos = leidos = con_incidencias = 0
+        for ruta, resultado in sorted(resultados.items()):
+            archivos += resultado['archivos']
+            leidos += resultado['leidos']
+            item_entorno = QTreeWidgetItem([os.path.basename(ruta), "✓" if not resultado['paquetes'] else ""])
+            item_entorno.setToolTip(0, ruta)
+            for paquete, incidencias in sorted(resultado['paquetes'].items()):
+                con_incidencias += 1
+                resumen = " · ".join(f"{len(incidencias[clave])} {texto}" for clave, texto, _ in tipos if incidencias[clave])
+                item_paquete = QTreeWidgetItem([paquete, resumen])
+                for clave, texto, color in tipos:
+                    for archivo in sorted(incidencias[clave]):
+                        hijo = QTreeWidgetItem([archivo, texto])
+                        hijo.setForeground(1, QColor(color))
+                        item_paquete.addChild(hijo)
+                item_entorno.addChild(item_paquete)
+            self.arbol.addTopLevelItem(item_entorno)
+            item_entorno.setExpanded(bool(resultado['paquetes']))
+        self.resumen_label.setText(
+            f"{archivos} {self.parent.get_string('verify_files')} · {leidos} {self.parent.get_string('verify_read')} · "
+            f"{con_incidencias} {self.parent.get_string('verify_packages_with_issues')} · {duracion:.1f} s"
+        )
 
-        layout.addStretch()
 
-    def browse_env_directory(self):
-        dir_path = QFileDialog.getExistingDirectory(
-            self, 
-            self.parent.get_string("browse_env_dir_title"), 
-            self.env_dir_input.text()
-        )
-        if dir_path:
-            self.env_dir_input.setText(dir_path)
+class AvisosDialog(QDialog):
+    def __init__(self, parent=None, entorno_inicial=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle(self.parent.get_string("advisories_title"))
+        self.resize(800, 500)
+        self.setup_ui()
+        self.actualizar(entorno_inicial)
 
-    def add_custom_terminal(self):
-        dialog = CustomTerminalDialog(self.parent, self) 
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            nombre = dialog.nombre
-            ruta = dialog.ruta
-            comando = dialog.comando
-            
-            if 'terminales_personalizados' not in self.config: self.config['terminales_personalizados'] = {}
-            self.config['terminales_personalizados'][nombre] = {'ruta': ruta, 'comando': comando}
-            self.parent.guardar_config()
-            self.actualizar_lista_terminales()
-            QMessageBox.information(self, self.tr("Éxito"), self.parent.get_string("terminal_added_successfully"))
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
 
-    def accept_changes(self):
-        new_env_dir = self.env_dir_input.text().strip()
-        if not new_env_dir or not os.path.isdir(new_env_dir):
-            QMessageBox.warning(self, self.tr("Advertencia"), self.parent.get_string("invalid_env_dir"))
+        cabecera = QHBoxLayout()
+        self.base_label = QLabel()
+        cabecera.addWidget(self.base_label)
+        cabecera.addStretch()
+        # El volcado OSV puede ser un .zip o un directorio ya descomprimido: se elige explícitamente
+        self.btn_importar = QPushButton(self.parent.get_string("advisories_import"))
+        menu_importar = QMenu(self.btn_importar)
+        menu_importar.addAction(self.parent.get_string("advisories_import_file"), lambda: self.importar(directorio=False))
+        menu_importar.addAction(self.parent.get_string("advisories_import_dir"), lambda: self.importar(directorio=True))
+        self.btn_importar.setMenu(menu_importar)
+        cabecera.addWidget(self.btn_importar)
+        layout.addLayout(cabecera)
+
+        filtro = QHBoxLayout()
+        filtro.addWidget(QLabel(self.parent.get_string("environment_column") + ":"))
+        self.combo_entorno = QComboBox()
+        self.combo_entorno.currentIndexChanged.connect(self.mostrar)
+        filtro.addWidget(self.combo_entorno, 1)
+        layout.addLayout(filtro)
+
+        self.tabla = QTableWidget(0, 5)
+        self.tabla.setHorizontalHeaderLabels([
+            self.parent.get_string("environment_column"), self.parent.get_string("package_column"),
+            self.parent.get_string("version_column"), self.parent.get_string("advisory_column"),
+            self.parent.get_string("fixed_in_column"),
+        ])
+        self.tabla.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.setSortingEnabled(True)
+        layout.addWidget(self.tabla)
+
+        self.btn_cerrar = QPushButton(self.parent.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        layout.addWidget(self.btn_cerrar)
+
+    def actualizar(self, entorno_seleccionado=None):
+        base = self.parent.base_avisos
+        if base.disponible():
+            self.base_label.setText(f"{self.parent.get_string('advisories_db')}: {sum(len(a) for a in base.avisos.values())} · {base.fecha}")
+        else:
+            self.base_label.setText(self.parent.get_string("advisories_no_db"))
+
+        seleccionado = entorno_seleccionado or self.combo_entorno.currentData()
+        self.combo_entorno.blockSignals(True)
+        self.combo_entorno.clear()
+        self.combo_entorno.addItem(self.parent.get_string("filter_all"), None)
+        for ruta, coincidencias in sorted(self.parent.avisos_entornos.items()):
+            self.combo_entorno.addItem(f"{os.path.basename(ruta)} ({len(coincidencias)})", ruta)
+        indice = self.combo_entorno.findData(seleccionado)
+        self.combo_entorno.setCurrentIndex(max(indice, 0))
+        self.combo_entorno.blockSignals(False)
+        self.mostrar()
+
+    def mostrar(self):
+        ruta_filtro = self.combo_entorno.currentData()
+        filas = [
+            (ruta, c) for ruta, coincidencias in self.parent.avisos_entornos.items()
+            if ruta_filtro in (None, ruta) for c in coincidencias
+        ]
+        self.tabla.setSortingEnabled(False)
+        self.tabla.setRowCount(len(filas))
+        for fila, (ruta, c) in enumerate(filas):
+            item_entorno = QTableWidgetItem(os.path.basename(ruta))
+            item_entorno.setToolTip(ruta)
+            self.tabla.setItem(fila, 0, item_entorno)
+            self.tabla.setItem(fila, 1, QTableWidgetItem(c['paquete']))
+            self.tabla.setItem(fila, 2, QTableWidgetItem(c['version']))
+            item_aviso = QTableWidgetItem(f"{c['id']}: {c['resumen']}")
+            item_aviso.setToolTip(", ".join([c['id']] + c['alias']) + "\n" + c['resumen'])
+            self.tabla.setItem(fila, 3, item_aviso)
+            self.tabla.setItem(fila, 4, QTableWidgetItem(", ".join(c['corregido'])))
+        self.tabla.setSortingEnabled(True)
+
+    def importar(self, directorio=False):
+        if directorio:
+            ruta = QFileDialog.getExistingDirectory(self, self.parent.get_string("advisories_import"), QDir.homePath())
+        else:
+            ruta, _ = QFileDialog.getOpenFileName(
+                self, self.parent.get_string("advisories_import"), QDir.homePath(), "OSV (*.zip);;*"
+            )
+        if not ruta:
             return
-            
-        self.config['directorio_base_env'] = new_env_dir
-        
-        current_lang = self.config.get('idioma')
-        nuevo_idioma = self.lang_combo.currentData()
-        self.config['idioma'] = nuevo_idioma
+        cantidad, error = self.parent.ejecutar_con_progreso(
+            self.parent.get_string("advisories_import"), importar_volcado_avisos, ruta, ARCHIVO_BASE_AVISOS
+        )
+        if error:
+            QMessageBox.critical(self, self.parent.get_string("error"), error)
+            return
+        self.parent.base_avisos.cargar()
+        self.parent.analizar_avisos(en_segundo_plano=False)
+        self.actualizar()
+        QMessageBox.information(self, self.parent.get_string("success"), f"{self.parent.get_string('advisories_imported')}: {cantidad}")
 
-        self.parent.guardar_config()
-        
-        if nuevo_idioma != current_lang:
-            QMessageBox.information(self, self.parent.get_string("success"), self.parent.get_string("restart_for_changes"))
 
-        super().accept()
+# --- Diálogo de Limpieza de Entornos ---
 
-    def actualizar_lista_terminales(self):
-        self.terminals_list.clear()
-        terminales_personalizados = self.config.get('terminales_personalizados', {})
-        for nombre, datos in terminales_personalizados.items():
-            item_text = f"{nombre} - {datos['ruta']}"
-            self.terminals_list.addItem(item_text)
+class LimpiezaDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle(self.parent.get_string("cleanup_title"))
+        self.resize(700, 500)
+        self.setup_ui()
+        self.mostrar_propuesta(self.parent.propuesta_limpieza)
 
-    def eliminar_terminal_seleccionada(self):
-        current_item = self.terminals_list.currentItem()
-        if not current_item:
-            QMessageBox.warning(self, self.tr("Advertencia"), self.tr("Selecciona una terminal para eliminar"))
-            return
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
 
-        item_text = current_item.text()
-        nombre_terminal = item_text.split(" - ")[0]
+        politicas_layout = QHBoxLayout()
+        politicas_layout.addWidget(QLabel(self.parent.get_string("cleanup_unused_days")))
+        self.spin_dias = QSpinBox()
+        self.spin_dias.setRange(0, 3650)
+        self.spin_dias.setSpecialValueText("—")
+        self.spin_dias.setValue(self.parent.config.get('limpieza_dias_sin_uso', 90))
+        politicas_layout.addWidget(self.spin_dias)
+
+        politicas_layout.addWidget(QLabel(self.parent.get_string("cleanup_size_budget")))
+        self.spin_limite = QSpinBox()
+        self.spin_limite.setRange(0, 100000)
+        self.spin_limite.setSuffix(" GB")
+        self.spin_limite.setSpecialValueText("—")
+        self.spin_limite.setValue(self.parent.config.get('limpieza_limite_gb', 0))
+        politicas_layout.addWidget(self.spin_limite)
+
+        self.btn_evaluar = QPushButton(self.parent.get_string("cleanup_evaluate"))
+        self.btn_evaluar.clicked.connect(self.evaluar)
+        politicas_layout.addWidget(self.btn_evaluar)
+        layout.addLayout(politicas_layout)
+
+        self.tabla = QTableWidget(0, 4)
+        self.tabla.setHorizontalHeaderLabels([
+            self.parent.get_string("environment_column"),
+            self.parent.get_string("cleanup_last_used"),
+            self.parent.get_string("size_label"),
+            self.parent.get_string("cleanup_reason"),
+        ])
+        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        layout.addWidget(self.tabla)
+
+        self.resumen_label = QLabel()
+        layout.addWidget(self.resumen_label)
 
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.btn_eliminar = QPushButton(self.parent.get_string("cleanup_delete_checked"))
+        self.btn_eliminar.clicked.connect(self.eliminar_marcados)
+        buttons_layout.addWidget(self.btn_eliminar)
+        self.btn_cerrar = QPushButton(self.parent.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        buttons_layout.addWidget(self.btn_cerrar)
+        layout.addLayout(buttons_layout)
+
+    def evaluar(self):
+        self.parent.config['limpieza_dias_sin_uso'] = self.spin_dias.value()
+        self.parent.config['limpieza_limite_gb'] = self.spin_limite.value()
+        self.parent.guardar_config()
+        self.parent.evaluar_limpieza(en_segundo_plano=False)
+        self.mostrar_propuesta(self.parent.propuesta_limpieza)
+
+    def mostrar_propuesta(self, propuesta):
+        motivos = {'sin_uso': self.parent.get_string("cleanup_reason_unused"), 'limite': self.parent.get_string("cleanup_reason_budget")}
+        self.tabla.setRowCount(len(propuesta))
+        for fila, d in enumerate(propuesta):
+            item_nombre = QTableWidgetItem(d['nombre'])
+            item_nombre.setData(Qt.UserRole, d['ruta'])
+            item_nombre.setToolTip(d['ruta'])
+            item_nombre.setFlags(item_nombre.flags() | Qt.ItemIsUserCheckable)
+            item_nombre.setCheckState(Qt.Checked)
+            self.tabla.setItem(fila, 0, item_nombre)
+            fecha = time.strftime('%Y-%m-%d', time.localtime(d['ultimo_uso'])) if d['ultimo_uso'] else "—"
+            self.tabla.setItem(fila, 1, QTableWidgetItem(fecha))
+            self.tabla.setItem(fila, 2, ItemNumerico(formatear_tamaño(d['tamaño']), d['tamaño']))
+            self.tabla.setItem(fila, 3, QTableWidgetItem(motivos.get(d.get('motivo'), "")))
+        total = sum(d['tamaño'] for d in propuesta)
+        self.resumen_label.setText(f"{len(propuesta)} · {formatear_tamaño(total)}")
+
+    def eliminar_marcados(self):
+        rutas = [
+            self.tabla.item(fila, 0).data(Qt.UserRole) for fila in range(self.tabla.rowCount())
+            if self.tabla.item(fila, 0).checkState() == Qt.Checked
+        ]
+        if not rutas:
+            return
         respuesta = QMessageBox.question(
-            self,
-            self.tr("Confirmar eliminación"),
-            f"{self.tr('¿Estás seguro de que quieres eliminar la terminal')} '{nombre_terminal}'?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            self, self.parent.get_string("delete_env"),
+            f"{self.parent.get_string('cleanup_confirm')} ({len(rutas)})",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No
         )
+        if respuesta != QMessageBox.StandardButton.Yes:
+            return
+        if not self.parent.confirmar_borrado_en_uso(rutas):
+            return
+
+        errores = []
+        for ruta in rutas:
+            try:
+                self.parent.borrar_entorno(ruta)
+            except Exception as e:
+                errores.append(f"{ruta}: {e}")
+        self.parent.cargar_entornos_desde_registro()
+        self.parent.propuesta_limpieza = [d for d in self.parent.propuesta_limpieza if d['ruta'] not in rutas]
+        self.parent.actualizar_indicador_limpieza()
+        self.mostrar_propuesta(self.parent.propuesta_limpieza)
+        if errores:
+            QMessageBox.critical(self, self.parent.get_string("error"), "\n".join(errores))
 
-        if respuesta == QMessageBox.StandardButton.Yes:
-            if 'terminales_personalizados' in self.config:
-                if nombre_terminal in self.config['terminales_personalizados']:
-                    del self.config['terminales_personalizados'][nombre_terminal]
-                    self.parent.guardar_config()
-                    self.actualizar_lista_terminales()
-                    QMessageBox.information(self, self.tr("Éxito"), self.tr("Terminal eliminada correctamente"))
 
-# --- Diálogo de Importación de Entornos ---
+class ReconstruirEntornosDialog(QDialog):
+    """Reconstruye los entornos seleccionados sobre otro intérprete conservando sus paquetes"""
 
-class ImportEnvDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.setWindowTitle(self.parent.get_string("import_envs_button"))
-        self.setFixedSize(400, 200)
+        self.setWindowTitle(self.parent.get_string("rebuild_title"))
+        self.resize(700, 500)
         self.setup_ui()
+        self.cargar_entornos()
 
-    def tr(self, text):
-        return QCoreApplication.translate("ImportEnvDialog", text)
-        
     def setup_ui(self):
         layout = QVBoxLayout(self)
 
-        explanation_label = QLabel(self.parent.get_string("import_dialog_explanation"))
-        explanation_label.setWordWrap(True)
-        layout.addWidget(explanation_label)
-        layout.addStretch()
+        interprete_layout = QHBoxLayout()
+        interprete_layout.addWidget(QLabel(self.parent.get_string("rebuild_target")))
+        self.combo_python = QComboBox()
+        self.combo_python.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        candidatos = interpretes_gestionados(DIRECTORIO_PYTHONS) + COMMON_PYTHON_PATHS
+        for python in dict.fromkeys(candidatos):
+            version = self.parent.cache_interpretes.obtener_version(python)
+            if version:
+                self.combo_python.addItem(f"Python {version} ({python})", python)
+        actual = self.combo_python.findData(self.parent.config.get('current_python_interpreter'))
+        self.combo_python.setCurrentIndex(max(actual, 0))
+        self.combo_python.currentIndexChanged.connect(self.cargar_entornos)
+        interprete_layout.addWidget(self.combo_python)
+        layout.addLayout(interprete_layout)
+
+        opciones_layout = QHBoxLayout()
+        self.sin_conexion_check = QCheckBox(self.parent.get_string("rebuild_offline"))
+        self.sin_conexion_check.setToolTip(DIRECTORIO_WHEELS)
+        self.sin_conexion_check.setChecked(self.parent.config.get('reconstruir_sin_conexion', False))
+        opciones_layout.addWidget(self.sin_conexion_check)
+        opciones_layout.addStretch()
+        opciones_layout.addWidget(QLabel(self.parent.get_string("rebuild_jobs")))
+        self.spin_trabajos = QSpinBox()
+        self.spin_trabajos.setRange(1, max(os.cpu_count() or 1, 1))
+        self.spin_trabajos.setValue(self.parent.config.get('reconstruir_trabajos', 2))
+        opciones_layout.addWidget(self.spin_trabajos)
+        layout.addLayout(opciones_layout)
+
+        self.tabla = QTableWidget(0, 3)
+        self.tabla.setHorizontalHeaderLabels([
+            self.parent.get_string("environment_column"),
+            self.parent.get_string("python_version_label"),
+            self.parent.get_string("status_column"),
+        ])
+        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        layout.addWidget(self.tabla)
 
-        self.btn_select_and_search = QPushButton(self.parent.get_string("select_and_search_button"))
-        self.btn_select_and_search.clicked.connect(self.select_and_search)
-        layout.addWidget(self.btn_select_and_search)
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.btn_reconstruir = QPushButton(self.parent.get_string("rebuild_checked"))
+        self.btn_reconstruir.clicked.connect(self.reconstruir_marcados)
+        buttons_layout.addWidget(self.btn_reconstruir)
+        self.btn_cerrar = QPushButton(self.parent.get_string("close"))
+        self.btn_cerrar.clicked.connect(self.close)
+        buttons_layout.addWidget(self.btn_cerrar)
+        layout.addLayout(buttons_layout)
 
-        self.btn_close = QPushButton(self.parent.get_string("close"))
-        self.btn_close.clicked.connect(self.close)
-        layout.addWidget(self.btn_close)
-        
-    def select_and_search(self):
-        self.parent.buscar_entornos_existentes()
-        self.accept() 
+    def cargar_entornos(self):
+        """Marca de entrada los entornos cuyo intérprete base ya no existe o es de otra versión"""
+        version_destino = self.parent.cache_interpretes.obtener_version(self.combo_python.currentData() or "") or ""
+        serie_destino = ".".join(version_destino.split(".")[:2])
+        entornos = self.parent.obtener_entornos_registrados()
+        self.tabla.setRowCount(len(entornos))
+        for fila, (nombre, ruta) in enumerate(entornos):
+            pyvenv = leer_pyvenv_cfg(ruta)
+            version = pyvenv.get('version') or pyvenv.get('version_info') or "—"
+            roto = not os.path.exists(os.path.join(ruta, 'bin', 'python'))
+            item_nombre = QTableWidgetItem(nombre)
+            item_nombre.setData(Qt.UserRole, ruta)
+            item_nombre.setToolTip(ruta)
+            item_nombre.setFlags(item_nombre.flags() | Qt.ItemIsUserCheckable)
+            desfasado = roto or (serie_destino and not version.startswith(serie_destino + "."))
+            item_nombre.setCheckState(Qt.Checked if desfasado else Qt.Unchecked)
+            self.tabla.setItem(fila, 0, item_nombre)
+            self.tabla.setItem(fila, 1, QTableWidgetItem(version))
+            estado = QTableWidgetItem(self.parent.get_string("rebuild_broken") if roto else "")
+            if roto:
+                estado.setForeground(QColor("#E06060"))
+            self.tabla.setItem(fila, 2, estado)
+
+    def comprobar_capas(self, rutas, python_nuevo):
+        """Una base solo se reconstruye junto con todos sus hijos (su .pth apunta a la base y la
+        versión cambia), y un hijo solo con la misma serie X.Y que su base"""
+        self.parent.actualizar_capas_entornos()
+        en_lote = {os.path.realpath(ruta) for ruta in rutas}
+        hijos_fuera = [
+            hijo for ruta in rutas for hijo in self.parent.hijos_de_capa(ruta)
+            if os.path.realpath(hijo) not in en_lote
+        ]
+        if hijos_fuera:
+            QMessageBox.warning(
+                self, self.parent.get_string("warning"),
+                f"{self.parent.get_string('rebuild_children_missing')}:\n" + "\n".join(os.path.basename(h) for h in hijos_fuera)
+            )
+            return False
+
+        version_destino = self.parent.cache_interpretes.obtener_version(python_nuevo) or ""
+        serie_destino = ".".join(version_destino.split(".")[:2])
+        distinta = [
+            ruta for ruta in rutas
+            if ruta in self.parent.capas_entornos
+            and os.path.realpath(self.parent.capas_entornos[ruta]) not in en_lote
+            and serie_python(self.parent.capas_entornos[ruta]) != serie_destino
+        ]
+        if distinta:
+            QMessageBox.warning(
+                self, self.parent.get_string("warning"),
+                f"{self.parent.get_string('rebuild_child_version_mismatch')}:\n" + "\n".join(os.path.basename(h) for h in distinta)
+            )
+            return False
+        return True
+
+    def reconstruir_marcados(self):
+        filas = [fila for fila in range(self.tabla.rowCount()) if self.tabla.item(fila, 0).checkState() == Qt.Checked]
+        rutas = [self.tabla.item(fila, 0).data(Qt.UserRole) for fila in filas]
+        python_nuevo = self.combo_python.currentData()
+        if not rutas or not python_nuevo:
+            return
+        if not self.comprobar_capas(rutas, python_nuevo):
+            return
+        respuesta = QMessageBox.question(
+            self, self.parent.get_string("rebuild_title"),
+            f"{self.parent.get_string('rebuild_confirm')} {self.combo_python.currentText()} ({len(rutas)})",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No
+        )
+        if respuesta != QMessageBox.StandardButton.Yes:
+            return
+        if not self.parent.confirmar_borrado_en_uso(rutas):
+            return
+
+        self.parent.config['reconstruir_sin_conexion'] = self.sin_conexion_check.isChecked()
+        self.parent.config['reconstruir_trabajos'] = self.spin_trabajos.value()
+        self.parent.guardar_config()
+        resultados, error = self.parent.ejecutar_con_progreso(
+            self.parent.get_string("rebuild_title"), reconstruir_entornos, rutas, python_nuevo,
+            sin_conexion=self.sin_conexion_check.isChecked(), trabajos=self.spin_trabajos.value()
+        )
+        for ruta in rutas:
+            self.parent.registro_uso.registrar_ejecucion_propia(ruta)
+        if error:
+            QMessageBox.critical(self, self.parent.get_string("error"), error)
+            return
+
+        for fila, ruta in zip(filas, rutas):
+            resultado = resultados[ruta]
+            self.parent.cache_metadatos.invalidar(ruta)
+            if 'error' in resultado:
+                estado = QTableWidgetItem(resultado['error'])
+                estado.setForeground(QColor("#E06060"))
+            else:
+                estado = QTableWidgetItem(f"✓ {resultado['paquetes']} {self.parent.get_string('rebuild_packages')}")
+                if resultado['avisos']:
+                    estado.setForeground(QColor("#E0A040"))
+                    estado.setToolTip("\n".join(resultado['avisos']))
+            estado.setToolTip(estado.toolTip() or estado.text())
+            self.tabla.setItem(fila, 2, estado)
+            self.tabla.item(fila, 0).setCheckState(Qt.Unchecked)
+            pyvenv = leer_pyvenv_cfg(ruta)
+            self.tabla.setItem(fila, 1, QTableWidgetItem(pyvenv.get('version') or pyvenv.get('version_info') or "—"))
+        self.parent.analizar_avisos()
+
+
+class PaletaComandosDialog(QDialog):
+    """Paleta Ctrl+K: búsqueda difusa de entornos y acciones"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Popup | Qt.FramelessWindowHint)
+        self.parent = parent
+        self.resultados = []
+        self.setMinimumWidth(max(parent.width() - 40, 360))
+        self.setup_ui()
+        self.buscar("")
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        self.entrada = QLineEdit()
+        self.entrada.setPlaceholderText(self.parent.get_string("palette_placeholder"))
+        self.entrada.textChanged.connect(self.buscar)
+        self.entrada.returnPressed.connect(self.ejecutar_actual)
+        self.entrada.installEventFilter(self)
+        layout.addWidget(self.entrada)
+        self.lista = QListWidget()
+        self.lista.itemActivated.connect(lambda _item: self.ejecutar_actual())
+        layout.addWidget(self.lista)
+
+    def eventFilter(self, obj, event):
+        if obj is self.entrada and event.type() == QEvent.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            paso = -1 if event.key() == Qt.Key_Up else 1
+            fila = min(max(self.lista.currentRow() + paso, 0), self.lista.count() - 1)
+            self.lista.setCurrentRow(fila)
+            return True
+        return super().eventFilter(obj, event)
+
+    def buscar(self, texto):
+        self.resultados = self.parent.indice_paleta.buscar(texto)
+        etiqueta_defecto = self.parent.get_string("palette_action_terminal")
+        self.lista.setUpdatesEnabled(False)
+        self.lista.clear()
+        for accion, entorno in self.resultados:
+            if entorno:
+                etiqueta_accion = accion['etiqueta'] if accion else etiqueta_defecto
+                item = QListWidgetItem(f"{entorno['etiqueta']}    — {etiqueta_accion}")
+                item.setToolTip(entorno['ruta'])
+            else:
+                item = QListWidgetItem(f"» {accion['etiqueta']}")
+            self.lista.addItem(item)
+        self.lista.setUpdatesEnabled(True)
+        if self.lista.count():
+            self.lista.setCurrentRow(0)
+
+    def ejecutar_actual(self):
+        fila = self.lista.currentRow()
+        if not 0 <= fila < len(self.resultados):
+            return
+        accion, entorno = self.resultados[fila]
+        if accion and accion['requiere_entorno'] and not entorno:
+            # Acción elegida sin entorno: se deja escrita para filtrar los entornos
+            self.entrada.setText(accion['accion'] + " ")
+            return
+        self.accept()
+        self.parent.ejecutar_desde_paleta(accion['accion'] if accion else 'terminal', entorno)
 
 
 # --- Clase Principal CreadorEntornos (Modificado) ---
 
 class CreadorEntornos(QMainWindow):
+    TIEMPO_MAXIMO_MEDICION = 30
+    INTERVALO_LIMPIEZA_MS = 6 * 60 * 60 * 1000
+    RETARDO_PRIMERA_LIMPIEZA_MS = 60 * 1000
+    INTERVALO_PROCESOS_MS = 30 * 1000
+    MAX_LATENCIAS_GUARDADAS = 10
+
     def tr(self, text):
         return QCoreApplication.translate("CreadorEntornos", text)
         
@@ -809,62 +6916,66 @@ class CreadorEntornos(QMainWindow):
         
         os.makedirs(CONFIG_BASE_DIR, exist_ok=True)
         os.makedirs(self.config['directorio_base_env'], exist_ok=True)
+        self.cache_metadatos = CacheMetadatos(ARCHIVO_CACHE_METADATOS)
+        self.descubridor_terminales = DescubridorTerminales(ARCHIVO_CACHE_TERMINALES, self)
+        self.descubridor_terminales.refrescar_en_segundo_plano()
+        self.registro_uso = RegistroUso(ARCHIVO_USO_ENTORNOS)
+        self.historial_arranque = HistorialArranque(ARCHIVO_HISTORIAL_ARRANQUE)
+        self.propuesta_limpieza = []
+        self.tarea_limpieza = None
+        self.tareas_precompilacion = []
+        self.procesos_entornos = {}
+        self.capas_entornos = {}
+        self.origenes_entornos = self.cargar_origenes_entornos()
+        self.tarea_descubrimiento = None
+        self.servicio_rpc = None
+        self.base_avisos = BaseAvisos(ARCHIVO_BASE_AVISOS)
+        self.cache_interpretes = CacheInterpretes(ARCHIVO_CACHE_INTERPRETES)
+        self.avisos_entornos = {}
+        self.tarea_avisos = None
+        self.tarea_procesos = None
+        self.planificador_metadatos = PlanificadorMetadatos(ARCHIVO_METADATOS_ENTORNOS, parent=self)
+        self.planificador_metadatos.actualizado.connect(self.metadatos_entorno_actualizados)
         
+        self.consola_dialog = None
+        self.mediciones_terminal = {}
+        self.temporizador_mediciones = QTimer(self)
+        self.temporizador_mediciones.setInterval(50)
+        self.temporizador_mediciones.timeout.connect(self.revisar_mediciones_terminal)
         self.translation_manager = TranslationManager(QApplication.instance(), self)
         self.cargar_idioma() 
+        self.historial_paleta = HistorialPaleta(ARCHIVO_HISTORIAL_PALETA)
+        self.indice_paleta = IndicePaleta(self.acciones_paleta())
         self.iniciar_ui()
         self.cargar_entornos_desde_registro()
+
+        # Evaluación periódica de las políticas de limpieza, fuera del arranque
+        self.temporizador_limpieza = QTimer(self)
+        self.temporizador_limpieza.setInterval(self.INTERVALO_LIMPIEZA_MS)
+        self.temporizador_limpieza.timeout.connect(self.evaluar_limpieza)
+        self.temporizador_limpieza.timeout.connect(self.analizar_avisos)
+        self.temporizador_limpieza.start()
+        QTimer.singleShot(self.RETARDO_PRIMERA_LIMPIEZA_MS, self.evaluar_limpieza)
+
+        self.temporizador_procesos = QTimer(self)
+        self.temporizador_procesos.setInterval(self.INTERVALO_PROCESOS_MS)
+        self.temporizador_procesos.timeout.connect(self.escanear_procesos_entornos)
+        # Revalida los metadatos de la lista: solo se recalculan los entornos cuya firma cambió
+        self.temporizador_procesos.timeout.connect(self.priorizar_metadatos_visibles)
+        self.temporizador_procesos.start()
+        QTimer.singleShot(0, self.escanear_procesos_entornos)
+
+        if self.config.get('descubrimiento_automatico', False):
+            QTimer.singleShot(0, self.descubrir_entornos_herramientas)
+
+        if self.config.get('servicio_rpc', False):
+            self.activar_servicio_rpc(True)
+
+        if self.base_avisos.disponible():
+            QTimer.singleShot(0, self.analizar_avisos)
     
     def get_string(self, key):
-        string_map = {
-            "app_title": "Entornos Virtuales (py)",
-            "create_env": "Crear entorno",
-            "env_name_placeholder": "Nombre del entorno",
-            "delete_selected": "Eliminar seleccionado",
-            "open_directory": "Abrir directorio",
-            "open_terminal": "Abrir terminal",
-            "config_title": "Configuración",
-            "warning": "Advertencia",
-            "success": "Éxito",
-            "select_terminal": "Seleccionar Terminal",
-            "choose_terminal": "Elige una terminal:",
-            "custom_terminal": "Terminal Personalizada",
-            "terminal_name": "Nombre para esta terminal:",
-            "terminal_path": "Ruta del ejecutable:",
-            "custom_command": "Comando personalizado (usa {script} para el script):",
-            "custom_command_full": "Comando personalizado de la terminal (usa {script} para el script de activación):",
-            "executable_not_found": "Ejecutable no encontrado",
-            "continue_anyway": "¿La ruta no existe. Deseas continuar de todos modos?",
-            "missing_fields": "Campos faltantes",
-            "provide_name": "Por favor, proporciona un nombre para el entorno.",
-            "env_created": "Entorno creado correctamente.",
-            "error": "Error",
-            "venv_error": "Error al crear el entorno. Verifica si el módulo 'venv' está instalado. Asegúrate de que el intérprete de Python seleccionado sea válido.",
-            "delete_env": "Eliminar entorno",
-            "confirm_delete_env": "¿Estás seguro de que quieres eliminar el entorno",
-            "about_title": "Acerca de Python Venv Gui",
-            "about_content": "Python Venv Gui v1.2.0\n\nDesarrollado por krafairus\n\nMás información en:\nhttps://github.com/krafairus/py-venv-gui",
-            "close": "Cerrar",
-            "restart_for_changes": "Los cambios de idioma requieren reiniciar la aplicación",
-            "terminal_error": "No se pudo abrir la terminal",
-            "select_interpreter": "Seleccionar intérprete de Python",
-            "base_env_directory": "Directorio base de entornos virtuales",
-            "change_button": "Cambiar",
-            "browse_env_dir_title": "Seleccionar Directorio Base para Entornos",
-            "import_envs_button": "Importar entornos existentes",
-            "select_scan_directory": "Seleccionar Directorio para Escanear Entornos",
-            "no_new_envs_found": "No se encontraron nuevos entornos virtuales en el directorio seleccionado.",
-            "added_new_envs": "Se añadieron %d nuevos entornos a la lista.",
-            "invalid_env_dir": "La ruta seleccionada para el directorio de entornos no es válida.",
-            "add_custom_terminal_button": "Añadir Terminal Personalizada",
-            "terminal_added_successfully": "Terminal personalizada añadida correctamente",
-            "select_terminal_executable": "Seleccionar ejecutable de Terminal",
-            "provide_all_custom_terminal_fields": "Por favor, proporciona el nombre, la ruta y el comando de la terminal personalizada.",
-            "import_dialog_explanation": "Selecciona el directorio que deseas escanear. La aplicación buscará subcarpetas que contengan una estructura de entorno virtual (por ejemplo, 'bin/activate') y los añadirá a tu lista.",
-            "select_and_search_button": "Seleccionar directorio y buscar",
-        }
-        
-        return self.tr(string_map.get(key, key))
+        return self.translation_manager.cadena(key)
 
     def setup_icons(self):
         """Configura las rutas de los íconos"""
@@ -888,48 +6999,113 @@ class CreadorEntornos(QMainWindow):
             "terminales_personalizados": {},
             "idioma": "es",
             "current_python_interpreter": sys.executable,
-            "directorio_base_env": os.path.expanduser('~/.virtualenvs').rstrip('/')
+            "directorio_base_env": os.path.expanduser('~/.virtualenvs').rstrip('/'),
+            "reutilizar_instancia_terminal": True,
+            "limpieza_dias_sin_uso": 90,
+            "precompilar_al_crear": True,
+            # Registrar entornos ajenos sin preguntar es intrusivo: el usuario lo activa en Configuración
+            "descubrimiento_automatico": False,
+            "raices_proyectos": [QDir.homePath()],
+            "servicio_rpc": False,
+            "limpieza_limite_gb": 0,
+            "reconstruir_sin_conexion": False,
+            "reconstruir_trabajos": 2,
+            "latencias_terminal": {}
         }
         
-        if os.path.exists(ARCHIVO_CONFIG):
-            try:
-                with open(ARCHIVO_CONFIG, 'r') as f:
-                    loaded_config = json.load(f)
-                    if 'theme' in loaded_config: del loaded_config['theme'] 
-                    self.config = {**config_default, **loaded_config}
-            except:
-                self.config = config_default
-        else:
-            self.config = config_default
+        self.almacen_config = AlmacenConfig(ARCHIVO_CONFIG, config_default, self)
+        self.almacen_config.cambiado.connect(self.config_cambiada_externamente)
+        self.config = self.almacen_config.datos
+
+    def config_cambiada_externamente(self, claves):
+        """Aplica los cambios de configuración hechos por otra instancia"""
+        if 'directorio_base_env' in claves:
+            os.makedirs(self.config['directorio_base_env'], exist_ok=True)
+        if 'idioma' in claves:
+            self.cambiar_idioma(self.config['idioma'])
 
     def cargar_idioma(self):
         """Carga la traducción Qt (.qm) según el idioma seleccionado"""
         idioma = self.config.get('idioma', 'es')
         self.translation_manager.load_language(idioma, BASE_DIR)
 
+    def cambiar_idioma(self, idioma):
+        """Cambia el idioma en caliente y vuelve a traducir las ventanas abiertas"""
+        if idioma != self.translation_manager.idioma:
+            self.translation_manager.load_language(idioma, BASE_DIR)
+            self.translation_manager.retraducir_widgets()
+
+    def retraducir_ui(self):
+        self.setWindowTitle(self.get_string("app_title"))
+        self.btn_info.setToolTip(self.get_string("env_info_tooltip"))
+        self.btn_eliminar.setToolTip(self.get_string("delete_selected"))
+        self.btn_abrir_directorio.setToolTip(self.get_string("open_directory"))
+        self.btn_iniciar_terminal.setToolTip(self.get_string("open_terminal_tooltip"))
+        self.btn_consola.setToolTip(self.get_string("open_console"))
+        self.btn_exportar.setToolTip(self.get_string("export_env_title"))
+        self.btn_reubicar.setToolTip(self.get_string("relocate_env_title"))
+        self.btn_optimizar.setToolTip(self.get_string("optimize_env_title"))
+        self.btn_capa.setToolTip(self.get_string("layer_menu_tooltip"))
+        self.btn_verificar.setToolTip(self.get_string("verify_title"))
+        self.entrada_nombre_entorno.setPlaceholderText(self.get_string("env_name_placeholder"))
+        self.btn_select_python.setToolTip(self.get_string("select_interpreter"))
+        self.boton_crear.setText(self.get_string("create_env"))
+        self.import_button.setToolTip(self.get_string("import_envs_button"))
+        self.diff_button.setToolTip(self.get_string("diff_envs_title"))
+        self.matrix_button.setToolTip(self.get_string("matrix_runner_title"))
+        self.disk_button.setToolTip(self.get_string("largest_packages_title"))
+        self.advisories_button.setToolTip(self.get_string("advisories_title"))
+        self.rebuild_button.setToolTip(self.get_string("rebuild_title"))
+        self.indice_paleta.actualizar_acciones(self.acciones_paleta())
+        self.actualizar_indicador_limpieza()
+        self.config_button.setToolTip(self.get_string("config_title"))
+        self.about_button.setToolTip(self.get_string("about_tooltip"))
+        self.actualizar_estados_entornos()
+
     def guardar_config(self):
-        """Guarda la configuración en el archivo JSON"""
-        os.makedirs(os.path.dirname(ARCHIVO_CONFIG), exist_ok=True)
-        with open(ARCHIVO_CONFIG, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        """Guarda la configuración en el archivo JSON (escritura diferida y atómica)"""
+        self.almacen_config.guardar()
 
     def detectar_terminales_disponibles(self):
-        terminales_disponibles = []
-        
-        for terminal, paths in system_terminals.items():
-            for path in paths:
-                if os.path.exists(path):
-                    terminales_disponibles.append({'nombre': terminal, 'tipo': 'sistema', 'ruta': path, 'comando': terminal_commands[terminal]})
-                    break
+        terminales_disponibles = self.descubridor_terminales.obtener_terminales()
         
         for nombre, datos in self.config.get('terminales_personalizados', {}).items():
             terminales_disponibles.append({'nombre': nombre, 'tipo': 'personalizado', 'ruta': datos['ruta'], 'comando': datos['comando']})
         
         return terminales_disponibles
 
+    def obtener_latencia_terminal(self, nombre):
+        """Mediana en ms de las últimas latencias de apertura medidas para la terminal"""
+        latencias = self.config.get('latencias_terminal', {}).get(nombre)
+        return statistics.median(latencias) if latencias else None
+
+    def obtener_terminal_recordada(self):
+        """Devuelve la última terminal usada si sigue disponible"""
+        ultima = self.config.get('ultima_terminal')
+        if not ultima:
+            return None
+        for term in self.detectar_terminales_disponibles():
+            if term['nombre'] == ultima['nombre']:
+                return term
+        return None
+
     def seleccionar_terminal(self):
         terminales_disponibles = self.detectar_terminales_disponibles()
-        nombres_terminales = [f"{term['nombre']} ({term['tipo']})" for term in terminales_disponibles]
+        # Revalida el índice para el próximo uso sin retrasar el selector
+        self.descubridor_terminales.refrescar_en_segundo_plano()
+
+        latencias = {term['nombre']: self.obtener_latencia_terminal(term['nombre']) for term in terminales_disponibles}
+        medidas = {nombre: ms for nombre, ms in latencias.items() if ms is not None}
+        mas_rapida = min(medidas, key=medidas.get) if len(medidas) > 1 else None
+
+        nombres_terminales = []
+        for term in terminales_disponibles:
+            texto = f"{term['nombre']} ({term['tipo']})"
+            if latencias[term['nombre']] is not None:
+                texto += f" - {latencias[term['nombre']]:.0f} ms"
+            if term['nombre'] == mas_rapida:
+                texto += f" ★ {self.get_string('fastest_terminal')}"
+            nombres_terminales.append(texto)
         
         default_index = 0
         if self.config.get('ultima_terminal'):
@@ -982,6 +7158,142 @@ class CreadorEntornos(QMainWindow):
         dialog = ImportEnvDialog(self)
         dialog.exec()
 
+    def abrir_diff_entornos(self):
+        dialog = DiffEntornosDialog(self)
+        dialog.exec()
+
+    def abrir_espacio_paquetes(self):
+        dialog = EspacioPaquetesDialog(self)
+        dialog.exec()
+
+    def acciones_paleta(self):
+        """(clave, etiqueta, requiere_entorno) de las acciones que ofrece la paleta Ctrl+K"""
+        return [
+            ('terminal', self.get_string("palette_action_terminal"), True),
+            ('info', self.get_string("env_info_tooltip"), True),
+            ('console', self.get_string("open_console"), True),
+            ('verify', self.get_string("verify_title"), True),
+            ('delete', self.get_string("delete_selected"), True),
+            ('create', self.get_string("create_env"), False),
+            ('cleanup', self.get_string("cleanup_title"), False),
+            ('rebuild', self.get_string("rebuild_title"), False),
+        ]
+
+    def abrir_paleta(self):
+        self.indice_paleta.calcular_frecencias(self.historial_paleta, self.registro_uso)
+        dialog = PaletaComandosDialog(self)
+        dialog.move(self.mapToGlobal(self.rect().topLeft()) + QPoint((self.width() - dialog.minimumWidth()) // 2, 50))
+        dialog.exec()
+
+    def ejecutar_desde_paleta(self, accion, entorno):
+        if entorno:
+            self.historial_paleta.registrar(entorno['clave'])
+            for fila in range(self.lista_entornos.count()):
+                if self.lista_entornos.item(fila).data(Qt.UserRole) == entorno['ruta']:
+                    self.lista_entornos.setCurrentRow(fila)
+                    break
+        self.historial_paleta.registrar(f"accion:{accion}")
+        acciones = {
+            'terminal': self.iniciar_entorno_terminal,
+            'info': self.mostrar_info_entorno,
+            'console': self.abrir_consola_entorno,
+            'verify': self.verificar_entorno_seleccionado,
+            'delete': self.eliminar_entorno,
+            'create': self.entrada_nombre_entorno.setFocus,
+            'cleanup': self.abrir_limpieza,
+            'rebuild': self.abrir_reconstruccion,
+        }
+        acciones[accion]()
+
+    def verificar_entorno_seleccionado(self):
+        item_actual = self.lista_entornos.currentItem()
+        if not item_actual:
+            return
+        dialog = VerificacionDialog(self, item_actual.data(Qt.UserRole))
+        dialog.exec()
+
+    def abrir_reconstruccion(self):
+        dialog = ReconstruirEntornosDialog(self)
+        dialog.exec()
+
+    def abrir_avisos(self):
+        item_actual = self.lista_entornos.currentItem()
+        dialog = AvisosDialog(self, item_actual.data(Qt.UserRole) if item_actual else None)
+        dialog.exec()
+
+    def analizar_avisos(self, en_segundo_plano=True):
+        """Cruza la base de avisos con los paquetes cacheados de todos los entornos registrados"""
+        if not self.base_avisos.disponible():
+            self.avisos_entornos = {}
+            self.actualizar_estados_entornos()
+            return
+        argumentos = (self.base_avisos, self.cache_metadatos, [ruta for _nombre, ruta in self.obtener_entornos_registrados()])
+        if not en_segundo_plano:
+            avisos, error = self.ejecutar_con_progreso(self.get_string("advisories_title"), analizar_avisos_entornos, *argumentos)
+            if error:
+                print(f"Error al analizar los avisos: {error}")
+            self.avisos_analizados(avisos or {})
+            return
+        if self.tarea_avisos and self.tarea_avisos.isRunning():
+            return
+        self.tarea_avisos = TareaSegundoPlano(analizar_avisos_entornos, *argumentos, parent=self)
+        self.tarea_avisos.terminado.connect(self.avisos_analizados)
+        self.tarea_avisos.start(QThread.LowPriority)
+
+    def avisos_analizados(self, avisos):
+        self.avisos_entornos = avisos
+        self.actualizar_estados_entornos()
+
+    def abrir_limpieza(self):
+        dialog = LimpiezaDialog(self)
+        dialog.exec()
+
+    def evaluar_limpieza(self, en_segundo_plano=True):
+        """Evalúa las políticas de limpieza; por defecto en un hilo para no bloquear la interfaz"""
+        # Los entornos de otras herramientas (poetry, conda...) los gestiona su herramienta, no se proponen
+        entornos = [(n, r) for n, r in self.obtener_entornos_registrados() if r not in self.origenes_entornos]
+        argumentos = (
+            entornos, self.registro_uso,
+            self.config.get('limpieza_dias_sin_uso', 0),
+            self.config.get('limpieza_limite_gb', 0) * 1024 ** 3,
+        )
+        if not en_segundo_plano:
+            self.propuesta_limpieza, _ = self.ejecutar_con_progreso(self.get_string("cleanup_title"), evaluar_politicas_limpieza, *argumentos)
+            self.propuesta_limpieza = self.propuesta_limpieza or []
+            self.actualizar_indicador_limpieza()
+            return
+        if self.tarea_limpieza and self.tarea_limpieza.isRunning():
+            return
+        self.tarea_limpieza = TareaSegundoPlano(evaluar_politicas_limpieza, *argumentos, parent=self)
+        self.tarea_limpieza.terminado.connect(self.limpieza_evaluada)
+        self.tarea_limpieza.start(QThread.LowestPriority)
+
+    def limpieza_evaluada(self, propuesta):
+        self.propuesta_limpieza = propuesta
+        self.actualizar_indicador_limpieza()
+
+    def actualizar_indicador_limpieza(self):
+        cantidad = len(self.propuesta_limpieza)
+        self.cleanup_button.setText(f"🧹 {cantidad}" if cantidad else "🧹")
+        texto = self.get_string("cleanup_title")
+        if cantidad:
+            texto += f" ({cantidad} · {formatear_tamaño(sum(d['tamaño'] for d in self.propuesta_limpieza))})"
+        self.cleanup_button.setToolTip(texto)
+
+    def abrir_matriz_comandos(self):
+        seleccionados = [item.data(Qt.UserRole) for item in self.lista_entornos.selectedItems()]
+        dialog = MatrizComandosDialog(self, seleccionados)
+        dialog.exec()
+
+    def abrir_consola_entorno(self):
+        item_actual = self.lista_entornos.currentItem()
+        if item_actual:
+            ruta_entorno = item_actual.data(Qt.UserRole)
+            if self.consola_dialog is None:
+                self.consola_dialog = ConsolaEntornosDialog(self)
+            self.consola_dialog.abrir_consola(ruta_entorno, os.path.basename(ruta_entorno))
+            self.registro_uso.registrar(ruta_entorno)
+
     def mostrar_info_entorno(self):
         """Muestra la información del entorno seleccionado"""
         item_actual = self.lista_entornos.currentItem()
@@ -1072,7 +7384,7 @@ class CreadorEntornos(QMainWindow):
             self.btn_info.setText("ℹ") 
         self.btn_info.setIconSize(QSize(25, 25))
         self.btn_info.clicked.connect(self.mostrar_info_entorno)
-        self.btn_info.setToolTip("Información del entorno")
+        self.btn_info.setToolTip(self.get_string("env_info_tooltip"))
         self.side_bar_layout.addWidget(self.btn_info)
         self.btn_info.hide()
 
@@ -1096,10 +7408,58 @@ class CreadorEntornos(QMainWindow):
         self.btn_iniciar_terminal.setIcon(QIcon(self.icono_abrir_terminal))
         self.btn_iniciar_terminal.setIconSize(QSize(25, 25))
         self.btn_iniciar_terminal.clicked.connect(self.iniciar_entorno_terminal)
-        self.btn_iniciar_terminal.setToolTip(self.get_string("open_terminal"))
+        self.btn_iniciar_terminal.setToolTip(self.get_string("open_terminal_tooltip"))
         self.side_bar_layout.addWidget(self.btn_iniciar_terminal)
         self.btn_iniciar_terminal.hide()
 
+        self.btn_consola = QToolButton(self)
+        self.btn_consola.setText("›_")
+        self.btn_consola.setIconSize(QSize(25, 25))
+        self.btn_consola.clicked.connect(self.abrir_consola_entorno)
+        self.btn_consola.setToolTip(self.get_string("open_console"))
+        self.side_bar_layout.addWidget(self.btn_consola)
+        self.btn_consola.hide()
+
+        self.btn_exportar = QToolButton(self)
+        self.btn_exportar.setText("⇩")
+        self.btn_exportar.setIconSize(QSize(25, 25))
+        self.btn_exportar.clicked.connect(self.exportar_entorno_seleccionado)
+        self.btn_exportar.setToolTip(self.get_string("export_env_title"))
+        self.side_bar_layout.addWidget(self.btn_exportar)
+        self.btn_exportar.hide()
+
+        self.btn_reubicar = QToolButton(self)
+        self.btn_reubicar.setText("✎")
+        self.btn_reubicar.setIconSize(QSize(25, 25))
+        self.btn_reubicar.clicked.connect(self.reubicar_entorno_seleccionado)
+        self.btn_reubicar.setToolTip(self.get_string("relocate_env_title"))
+        self.side_bar_layout.addWidget(self.btn_reubicar)
+        self.btn_reubicar.hide()
+
+        self.btn_optimizar = QToolButton(self)
+        self.btn_optimizar.setText("⚡")
+        self.btn_optimizar.setIconSize(QSize(25, 25))
+        self.btn_optimizar.clicked.connect(self.optimizar_entorno_seleccionado)
+        self.btn_optimizar.setToolTip(self.get_string("optimize_env_title"))
+        self.side_bar_layout.addWidget(self.btn_optimizar)
+        self.btn_optimizar.hide()
+
+        self.btn_capa = QToolButton(self)
+        self.btn_capa.setText("◆")
+        self.btn_capa.setIconSize(QSize(25, 25))
+        self.btn_capa.clicked.connect(self.menu_capa_entorno)
+        self.btn_capa.setToolTip(self.get_string("layer_menu_tooltip"))
+        self.side_bar_layout.addWidget(self.btn_capa)
+        self.btn_capa.hide()
+
+        self.btn_verificar = QToolButton(self)
+        self.btn_verificar.setText("✓")
+        self.btn_verificar.setIconSize(QSize(25, 25))
+        self.btn_verificar.clicked.connect(self.verificar_entorno_seleccionado)
+        self.btn_verificar.setToolTip(self.get_string("verify_title"))
+        self.side_bar_layout.addWidget(self.btn_verificar)
+        self.btn_verificar.hide()
+
         main_hbox.addLayout(self.side_bar_layout)
         entornos_layout.addLayout(main_hbox)
 
@@ -1129,6 +7489,9 @@ class CreadorEntornos(QMainWindow):
         self.stacked_widget.addWidget(self.entornos_page)
 
         self.lista_entornos.itemSelectionChanged.connect(self.update_side_bar_buttons)
+        QShortcut(QKeySequence("Ctrl+K"), self, activated=self.abrir_paleta)
+        self.lista_entornos.itemSelectionChanged.connect(self.priorizar_metadatos_visibles)
+        self.lista_entornos.verticalScrollBar().valueChanged.connect(self.priorizar_metadatos_visibles)
 
     def crear_barra_titulo(self):
         """Crea una barra de título personalizada."""
@@ -1141,32 +7504,80 @@ class CreadorEntornos(QMainWindow):
         title_layout.setSpacing(0)
         
         # Botón Importar Entornos
-        import_button = QToolButton()
+        self.import_button = QToolButton()
         if os.path.exists(self.icono_import_envs):
-            import_button.setIcon(QIcon(self.icono_import_envs))
+            self.import_button.setIcon(QIcon(self.icono_import_envs))
         else:
-            import_button.setText("⏏") 
+            self.import_button.setText("⏏") 
         
-        import_button.setIconSize(QSize(25, 25))
-        import_button.setToolTip(self.get_string("import_envs_button")) 
-        import_button.clicked.connect(self.abrir_import_dialog)
-        title_layout.addWidget(import_button)
+        self.import_button.setIconSize(QSize(25, 25))
+        self.import_button.setToolTip(self.get_string("import_envs_button")) 
+        self.import_button.clicked.connect(self.abrir_import_dialog)
+        title_layout.addWidget(self.import_button)
+
+        # Botón Comparar Entornos
+        self.diff_button = QToolButton()
+        self.diff_button.setText("⇄")
+        self.diff_button.setIconSize(QSize(25, 25))
+        self.diff_button.setToolTip(self.get_string("diff_envs_title"))
+        self.diff_button.clicked.connect(self.abrir_diff_entornos)
+        title_layout.addWidget(self.diff_button)
+
+        # Botón Ejecutar en Matriz
+        self.matrix_button = QToolButton()
+        self.matrix_button.setText("▦")
+        self.matrix_button.setIconSize(QSize(25, 25))
+        self.matrix_button.setToolTip(self.get_string("matrix_runner_title"))
+        self.matrix_button.clicked.connect(self.abrir_matriz_comandos)
+        title_layout.addWidget(self.matrix_button)
+
+        # Botón Paquetes más grandes
+        self.disk_button = QToolButton()
+        self.disk_button.setText("◔")
+        self.disk_button.setIconSize(QSize(25, 25))
+        self.disk_button.setToolTip(self.get_string("largest_packages_title"))
+        self.disk_button.clicked.connect(self.abrir_espacio_paquetes)
+        title_layout.addWidget(self.disk_button)
+
+        # Botón Avisos de seguridad
+        self.advisories_button = QToolButton()
+        self.advisories_button.setText("⛨")
+        self.advisories_button.setIconSize(QSize(25, 25))
+        self.advisories_button.setToolTip(self.get_string("advisories_title"))
+        self.advisories_button.clicked.connect(self.abrir_avisos)
+        title_layout.addWidget(self.advisories_button)
+
+        # Botón Reconstruir entornos sobre otro intérprete
+        self.rebuild_button = QToolButton()
+        self.rebuild_button.setText("⟳")
+        self.rebuild_button.setIconSize(QSize(25, 25))
+        self.rebuild_button.setToolTip(self.get_string("rebuild_title"))
+        self.rebuild_button.clicked.connect(self.abrir_reconstruccion)
+        title_layout.addWidget(self.rebuild_button)
+
+        # Botón Limpieza (muestra el número de entornos propuestos)
+        self.cleanup_button = QToolButton()
+        self.cleanup_button.setText("🧹")
+        self.cleanup_button.setIconSize(QSize(25, 25))
+        self.cleanup_button.setToolTip(self.get_string("cleanup_title"))
+        self.cleanup_button.clicked.connect(self.abrir_limpieza)
+        title_layout.addWidget(self.cleanup_button)
 
         # Botón Configuración
-        config_button = QToolButton()
-        config_button.setIcon(QIcon(self.icono_configuracion))
-        config_button.setIconSize(QSize(25, 25))
-        config_button.setToolTip(self.get_string("config_title")) 
-        config_button.clicked.connect(self.abrir_configuracion)
-        title_layout.addWidget(config_button)
+        self.config_button = QToolButton()
+        self.config_button.setIcon(QIcon(self.icono_configuracion))
+        self.config_button.setIconSize(QSize(25, 25))
+        self.config_button.setToolTip(self.get_string("config_title")) 
+        self.config_button.clicked.connect(self.abrir_configuracion)
+        title_layout.addWidget(self.config_button)
 
         # Botón Acerca de
-        about_button = QToolButton()
-        about_button.setIcon(QIcon(self.icono_acerca_de))
-        about_button.setIconSize(QSize(25, 25))
-        about_button.setToolTip(self.tr("Ver información de la app")) 
-        about_button.clicked.connect(self.mostrar_acerca_de)
-        title_layout.addWidget(about_button)
+        self.about_button = QToolButton()
+        self.about_button.setIcon(QIcon(self.icono_acerca_de))
+        self.about_button.setIconSize(QSize(25, 25))
+        self.about_button.setToolTip(self.get_string("about_tooltip")) 
+        self.about_button.clicked.connect(self.mostrar_acerca_de)
+        title_layout.addWidget(self.about_button)
 
         title_layout.addStretch()
 
@@ -1193,6 +7604,35 @@ class CreadorEntornos(QMainWindow):
 
         self.setMenuWidget(self.title_bar)
 
+    def closeEvent(self, event):
+        if any(tarea.isRunning() for tarea in self.tareas_precompilacion):
+            # Sí: esperar; No: interrumpir la precompilación (se puede repetir desde Optimizar)
+            respuesta = QMessageBox.question(
+                self, self.get_string("precompile_running_title"), self.get_string("precompile_running_wait"),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Yes
+            )
+            if respuesta == QMessageBox.StandardButton.Cancel:
+                event.ignore()
+                return
+            if respuesta == QMessageBox.StandardButton.No:
+                for tarea in self.tareas_precompilacion:
+                    tarea.cancelar.set()
+        if self.tarea_limpieza and self.tarea_limpieza.isRunning():
+            self.tarea_limpieza.wait()
+        for tarea in list(self.tareas_precompilacion):
+            tarea.wait()
+        if self.tarea_procesos and self.tarea_procesos.isRunning():
+            self.tarea_procesos.wait()
+        if self.tarea_descubrimiento and self.tarea_descubrimiento.isRunning():
+            self.tarea_descubrimiento.wait()
+        if self.tarea_avisos and self.tarea_avisos.isRunning():
+            self.tarea_avisos.wait()
+        self.planificador_metadatos.detener()
+        self.cache_metadatos.guardar()
+        self.almacen_config.guardar_ahora()
+        super().closeEvent(event)
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.title_bar.underMouse():
             self.dragging = True
@@ -1219,15 +7659,28 @@ class CreadorEntornos(QMainWindow):
             self.btn_eliminar.show()
             self.btn_abrir_directorio.show()
             self.btn_iniciar_terminal.show()
+            self.btn_consola.show()
+            self.btn_exportar.show()
+            self.btn_reubicar.show()
+            self.btn_optimizar.show()
+            self.btn_capa.show()
+            self.btn_verificar.show()
         else:
             self.btn_info.hide()
             self.btn_eliminar.hide()
             self.btn_abrir_directorio.hide()
             self.btn_iniciar_terminal.hide()
+            self.btn_consola.hide()
+            self.btn_exportar.hide()
+            self.btn_reubicar.hide()
+            self.btn_optimizar.hide()
+            self.btn_capa.hide()
+            self.btn_verificar.hide()
 
     def cargar_entornos_desde_registro(self):
         """Carga los entornos desde el archivo de registro"""
         self.lista_entornos.clear()
+        self.actualizar_capas_entornos()
         if os.path.exists(ARCHIVO_REGISTRO):
             with open(ARCHIVO_REGISTRO, "r") as log_file:
                 for line in log_file:
@@ -1251,31 +7704,263 @@ class CreadorEntornos(QMainWindow):
                         self.actualizar_registro_a_nuevo_formato()
 
                     if os.path.exists(full_path):
-                        # Crear el item y establecer el texto con la ruta acortada
-                        ruta_acortada = self.acortar_ruta(full_path)
-                        item_text = f"{nombre_entorno}\n{ruta_acortada}"
-                        
-                        item = QListWidgetItem(item_text)
-                        item.setData(Qt.UserRole, full_path)
-                        item.setToolTip(full_path)  # Tooltip con la ruta completa
-                        
-                        # Crear widget personalizado
-                        custom_widget = QWidget()
-                        custom_layout = QVBoxLayout(custom_widget)
-                        custom_layout.setContentsMargins(5, 5, 5, 5)
-                        custom_layout.setSpacing(2)
-                        
-                        entorno_label = QLabel(nombre_entorno)
-                        entorno_label.setStyleSheet("font-weight: bold;")
-                        
-                        ruta_label = QLabel(ruta_acortada)
-                        ruta_label.setStyleSheet("font-size: 9pt; color: #BEBEBE;")
-                        
-                        custom_layout.addWidget(entorno_label)
-                        custom_layout.addWidget(ruta_label)
-                        
-                        self.lista_entornos.addItem(item)
-                        self.lista_entornos.setItemWidget(item, custom_widget)
+                        self.agregar_item_entorno(nombre_entorno, full_path)
+        self.indice_paleta.sincronizar_entornos(self.obtener_entornos_registrados())
+        QTimer.singleShot(0, self.priorizar_metadatos_visibles)
+
+    def agregar_item_entorno(self, nombre_entorno, full_path):
+        """Añade a la lista un entorno con su nombre, la ruta acortada y una línea de estado"""
+        # Crear el item y establecer el texto con la ruta acortada
+        ruta_acortada = self.acortar_ruta(full_path)
+        item_text = f"{nombre_entorno}\n{ruta_acortada}"
+        
+        item = QListWidgetItem(item_text)
+        item.setData(Qt.UserRole, full_path)
+        item.setToolTip(full_path)  # Tooltip con la ruta completa
+        
+        # Crear widget personalizado
+        custom_widget = QWidget()
+        custom_layout = QVBoxLayout(custom_widget)
+        custom_layout.setContentsMargins(5, 5, 5, 5)
+        custom_layout.setSpacing(2)
+        
+        entorno_label = QLabel(nombre_entorno)
+        entorno_label.setStyleSheet("font-weight: bold;")
+
+        # Columnas rellenadas en segundo plano por el planificador de metadatos
+        detalle_label = QLabel()
+        detalle_label.setObjectName("detalle_entorno")
+        detalle_label.setStyleSheet("font-size: 8pt; color: #BEBEBE;")
+        fila_nombre = QHBoxLayout()
+        fila_nombre.addWidget(entorno_label)
+        fila_nombre.addStretch()
+        fila_nombre.addWidget(detalle_label)
+        
+        ruta_label = QLabel(ruta_acortada)
+        ruta_label.setStyleSheet("font-size: 9pt; color: #BEBEBE;")
+
+        estado_label = QLabel()
+        estado_label.setObjectName("estado_entorno")
+        estado_label.setStyleSheet("font-size: 8pt; color: #E0A040;")
+        
+        custom_layout.addLayout(fila_nombre)
+        custom_layout.addWidget(ruta_label)
+        custom_layout.addWidget(estado_label)
+        
+        self.lista_entornos.addItem(item)
+        self.lista_entornos.setItemWidget(item, custom_widget)
+        self.actualizar_estado_item(item)
+        self.planificador_metadatos.solicitar(full_path, PlanificadorMetadatos.PRIORIDAD_RESTO)
+        self.indice_paleta.agregar_entorno(nombre_entorno, full_path)
+        return item
+
+    def estado_entorno(self, ruta_entorno):
+        """Indicadores breves que se muestran bajo la ruta de cada entorno"""
+        indicadores = []
+        if ruta_entorno in self.capas_entornos.values():
+            hijos = sum(1 for base in self.capas_entornos.values() if base == ruta_entorno)
+            indicadores.append(f"◆ {self.get_string('base_layer_badge')} ({hijos})")
+        elif self.capas_entornos.get(ruta_entorno):
+            indicadores.append(f"↳ {os.path.basename(self.capas_entornos[ruta_entorno])}")
+        elif es_capa_base(ruta_entorno):
+            indicadores.append(f"◆ {self.get_string('base_layer_badge')}")
+        origen = self.origenes_entornos.get(ruta_entorno)
+        if origen == 'proyecto':
+            indicadores.append(f"⌂ {os.path.basename(os.path.dirname(ruta_entorno))}")
+        elif origen:
+            indicadores.append(f"⌂ {origen}")
+        avisos = self.avisos_entornos.get(ruta_entorno)
+        if avisos:
+            indicadores.append(f"⚠ {len(avisos)} {self.get_string('advisories_badge')}")
+        procesos = self.procesos_entornos.get(ruta_entorno)
+        if procesos:
+            indicadores.append(f"● {self.get_string('in_use_by')} {len(procesos)} {self.get_string('processes_label')}")
+        return indicadores
+
+    def actualizar_estado_item(self, item):
+        widget = self.lista_entornos.itemWidget(item)
+        estado_label = widget.findChild(QLabel, "estado_entorno") if widget else None
+        if estado_label is None:
+            return
+        self.actualizar_detalle_item(item)
+        indicadores = self.estado_entorno(item.data(Qt.UserRole))
+        estado_label.setText("  ".join(indicadores))
+        estado_label.setVisible(bool(indicadores))
+        item.setSizeHint(widget.sizeHint())
+
+    def actualizar_detalle_item(self, item):
+        detalle_label = self.lista_entornos.itemWidget(item).findChild(QLabel, "detalle_entorno")
+        datos = self.planificador_metadatos.obtener(item.data(Qt.UserRole))
+        if not datos:
+            detalle_label.clear()
+            return
+        columnas = []
+        if datos['salud'] != 'ok':
+            columnas.append(f"✗ {self.get_string('env_health_' + datos['salud'])}")
+        if datos.get('version'):
+            columnas.append(f"Py {datos['version']}")
+        columnas.append(f"{datos['paquetes']} {self.get_string('packages_short')}")
+        columnas.append(formatear_tamaño(datos['tamaño']))
+        detalle_label.setText(" · ".join(columnas))
+        detalle_label.setStyleSheet(f"font-size: 8pt; color: {'#E06060' if datos['salud'] != 'ok' else '#BEBEBE'};")
+
+    def metadatos_entorno_actualizados(self, ruta, _datos):
+        for fila in range(self.lista_entornos.count()):
+            item = self.lista_entornos.item(fila)
+            if item.data(Qt.UserRole) == ruta:
+                self.actualizar_detalle_item(item)
+                item.setSizeHint(self.lista_entornos.itemWidget(item).sizeHint())
+                return
+
+    def priorizar_metadatos_visibles(self):
+        """Sube la prioridad del entorno seleccionado y de las filas que se ven en la lista"""
+        area = self.lista_entornos.viewport().rect()
+        planificador = self.planificador_metadatos
+        for fila in range(self.lista_entornos.count()):
+            item = self.lista_entornos.item(fila)
+            ruta = item.data(Qt.UserRole)
+            if item.isSelected():
+                planificador.solicitar(ruta, planificador.PRIORIDAD_SELECCION)
+            elif self.lista_entornos.visualItemRect(item).intersects(area):
+                planificador.solicitar(ruta, planificador.PRIORIDAD_VISIBLE)
+            else:
+                planificador.solicitar(ruta, planificador.PRIORIDAD_RESTO)
+
+    def actualizar_estados_entornos(self):
+        for fila in range(self.lista_entornos.count()):
+            self.actualizar_estado_item(self.lista_entornos.item(fila))
+
+    def escanear_procesos_entornos(self):
+        """Escaneo periódico de /proc en segundo plano para el indicador de uso"""
+        if self.tarea_procesos and self.tarea_procesos.isRunning():
+            return
+        rutas = [ruta for _nombre, ruta in self.obtener_entornos_registrados()]
+        self.tarea_procesos = TareaSegundoPlano(escanear_procesos, rutas, parent=self)
+        self.tarea_procesos.terminado.connect(self.procesos_escaneados)
+        self.tarea_procesos.start(QThread.LowestPriority)
+
+    def procesos_escaneados(self, en_uso):
+        if en_uso != self.procesos_entornos:
+            if self.servicio_rpc:
+                self.servicio_rpc.notificar('in_use', envs={ruta: len(p) for ruta, p in en_uso.items()})
+            self.procesos_entornos = en_uso
+            self.actualizar_estados_entornos()
+
+    def activar_servicio_rpc(self, activo):
+        if activo:
+            if self.servicio_rpc is None:
+                self.servicio_rpc = ServicioRPC(self)
+            self.servicio_rpc.iniciar()
+        elif self.servicio_rpc is not None:
+            self.servicio_rpc.detener()
+
+    def actualizar_capas_entornos(self):
+        """Relación hijo -> capa base de los entornos registrados (lee un .pth por entorno)"""
+        self.capas_entornos = {}
+        for _nombre, ruta in self.obtener_entornos_registrados():
+            base = capa_base_de(ruta)
+            if base:
+                self.capas_entornos[ruta] = base
+
+    def hijos_de_capa(self, ruta_base):
+        ruta_base = os.path.realpath(ruta_base)
+        return sorted(ruta for ruta, base in self.capas_entornos.items() if os.path.realpath(base) == ruta_base)
+
+    def menu_capa_entorno(self):
+        item_actual = self.lista_entornos.currentItem()
+        if not item_actual:
+            return
+        ruta_entorno = item_actual.data(Qt.UserRole)
+        menu = QMenu(self)
+        if es_capa_base(ruta_entorno):
+            menu.addAction(self.get_string("create_child_env"), lambda: self.crear_entorno_hijo(ruta_entorno))
+            menu.addAction(self.get_string("unmark_base_layer"), lambda: self.alternar_capa_base(ruta_entorno))
+        else:
+            menu.addAction(self.get_string("mark_base_layer"), lambda: self.alternar_capa_base(ruta_entorno))
+        menu.exec(self.btn_capa.mapToGlobal(self.btn_capa.rect().bottomLeft()))
+
+    def alternar_capa_base(self, ruta_entorno):
+        if es_capa_base(ruta_entorno):
+            hijos = self.hijos_de_capa(ruta_entorno)
+            if hijos:
+                QMessageBox.warning(
+                    self, self.get_string("warning"),
+                    f"{self.get_string('layer_has_children')}:\n" + "\n".join(os.path.basename(h) for h in hijos)
+                )
+                return
+            desmarcar_capa_base(ruta_entorno)
+        else:
+            _, error = self.ejecutar_con_progreso(self.get_string("mark_base_layer"), marcar_capa_base, ruta_entorno)
+            if error:
+                QMessageBox.critical(self, self.get_string("error"), error)
+                return
+        self.actualizar_estados_entornos()
+
+    def crear_entorno_hijo(self, ruta_base):
+        nombre_entorno, ok = QInputDialog.getText(
+            self, self.get_string("create_child_env"),
+            f"{self.get_string('child_env_name')} {os.path.basename(ruta_base)}:"
+        )
+        nombre_entorno = nombre_entorno.strip()
+        if not ok or not nombre_entorno:
+            return
+        # El registro usa '|' como separador y el nombre es un único directorio
+        if os.sep in nombre_entorno or '|' in nombre_entorno:
+            QMessageBox.warning(self, self.get_string("warning"), self.get_string("invalid_env_name"))
+            return
+        base_dir = self.config['directorio_base_env']
+        ruta_entorno = os.path.join(base_dir, nombre_entorno)
+        if os.path.exists(ruta_entorno):
+            QMessageBox.warning(self, self.get_string("warning"), f"{self.get_string('env_already_exists')}: {ruta_entorno}")
+            return
+
+        _, error = self.ejecutar_con_progreso(
+            self.get_string("create_child_env"), crear_entorno_en_capa, ruta_base, ruta_entorno
+        )
+        if error:
+            QMessageBox.warning(self, self.get_string("error"), f"{self.get_string('venv_error')}\n\nDetalle:\n{error}")
+            return
+
+        with open(ARCHIVO_REGISTRO, "a") as log_file:
+            log_file.write(f"{nombre_entorno}|{base_dir}\n")
+        self.capas_entornos[ruta_entorno] = ruta_base
+        self.agregar_item_entorno(nombre_entorno, ruta_entorno)
+        self.actualizar_estados_entornos()
+
+    def confirmar_borrado_en_uso(self, rutas):
+        """Comprueba en el momento (no con el último escaneo) si algún entorno está en uso.
+        Devuelve True si se puede continuar con el borrado."""
+        en_uso = escanear_procesos(rutas)
+        if not en_uso:
+            return True
+        detalle = "\n".join(
+            f"{os.path.basename(ruta)}: {pid} {cmdline[:80]}"
+            for ruta, procesos in en_uso.items() for pid, cmdline in procesos
+        )
+        respuesta = QMessageBox.warning(
+            self, self.get_string("delete_env"),
+            f"{self.get_string('env_in_use_warning')}\n\n{detalle}",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No
+        )
+        return respuesta == QMessageBox.StandardButton.Yes
+
+    def obtener_entornos_registrados(self):
+        """Devuelve la lista de (nombre, ruta_completa) de los entornos del registro que existen"""
+        entornos = []
+        if os.path.exists(ARCHIVO_REGISTRO):
+            with open(ARCHIVO_REGISTRO, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line: continue
+                    try:
+                        nombre, base_path = line.split('|', 1)
+                    except ValueError:
+                        # Formato antiguo
+                        nombre, base_path = line, self.config.get('directorio_base_env', CONFIG_BASE_DIR)
+                    full_path = os.path.join(base_path, nombre)
+                    if os.path.exists(full_path):
+                        entornos.append((nombre, full_path))
+        return entornos
 
     def actualizar_registro_a_nuevo_formato(self):
         """Actualiza el archivo de registro del formato antiguo al nuevo formato"""
@@ -1333,33 +8018,10 @@ class CreadorEntornos(QMainWindow):
             with open(ARCHIVO_REGISTRO, "a") as log_file:
                 log_file.write(f"{nombre_entorno}|{base_dir}\n")
 
-            # Crear el item y establecer el texto con la ruta acortada
-            ruta_acortada = self.acortar_ruta(ruta_entorno)
-            item_text = f"{nombre_entorno}\n{ruta_acortada}"
-            
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, ruta_entorno)
-            item.setToolTip(ruta_entorno)  # Tooltip con la ruta completa
-            
-            # Crear widget personalizado
-            custom_widget = QWidget()
-            custom_layout = QVBoxLayout(custom_widget)
-            custom_layout.setContentsMargins(5, 5, 5, 5)
-            custom_layout.setSpacing(2)
-            
-            entorno_label = QLabel(nombre_entorno)
-            entorno_label.setStyleSheet("font-weight: bold;")
-            
-            ruta_label = QLabel(ruta_acortada)
-            ruta_label.setStyleSheet("font-size: 9pt; color: #BEBEBE;")
-            
-            custom_layout.addWidget(entorno_label)
-            custom_layout.addWidget(ruta_label)
-            
-            self.lista_entornos.addItem(item)
-            self.lista_entornos.setItemWidget(item, custom_widget)
+            self.agregar_item_entorno(nombre_entorno, ruta_entorno)
             
             self.entrada_nombre_entorno.clear()
+            self.precompilar_en_segundo_plano(ruta_entorno)
             
             QMessageBox.information(self, self.get_string("success"), f"{self.get_string('env_created')} '{nombre_entorno}' usando {python_interpreter}")
             
@@ -1390,30 +8052,57 @@ class CreadorEntornos(QMainWindow):
                 nombre_entorno = item_text.split('\n')[0]
                 
             ruta_entorno = item_actual.data(Qt.UserRole)
-            base_path = os.path.dirname(ruta_entorno)
+
+            if not self.confirmar_borrado_en_uso([ruta_entorno]):
+                return
 
             respuesta = QMessageBox.question(self, self.get_string("delete_env"), f"{self.get_string('confirm_delete_env')} '{nombre_entorno}'?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
             if respuesta == QMessageBox.StandardButton.Yes:
                 try:
-                    subprocess.run(['rm', '-rf', ruta_entorno])
-
-                    if os.path.exists(ARCHIVO_REGISTRO):
-                        line_to_remove = f"{nombre_entorno}|{base_path}\n"
-                        
-                        with open(ARCHIVO_REGISTRO, "r") as log_file:
-                            lineas = log_file.readlines()
-                        
-                        with open(ARCHIVO_REGISTRO, "w") as log_file:
-                            for linea in lineas:
-                                if linea.strip() != line_to_remove.strip(): 
-                                    log_file.write(linea)
+                    self.borrar_entorno(ruta_entorno)
 
                     row = self.lista_entornos.row(item_actual)
                     self.lista_entornos.takeItem(row)
-                    QMessageBox.information(self, self.get_string("success"), f"Entorno '{nombre_entorno}' eliminado correctamente.")
+                    QMessageBox.information(self, self.get_string("success"), f"{self.get_string('env_deleted')}: '{nombre_entorno}'")
 
                 except Exception as e:
-                    QMessageBox.critical(self, self.get_string("error"), f"No se pudo eliminar el entorno: {str(e)}")
+                    QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('env_delete_error')}: {str(e)}")
+
+    def borrar_entorno(self, ruta_entorno):
+        """Borra el directorio del entorno y su entrada del registro.
+        Una capa base no se borra mientras tenga entornos hijos."""
+        self.actualizar_capas_entornos()
+        hijos = self.hijos_de_capa(ruta_entorno)
+        if hijos:
+            raise RuntimeError(f"{self.get_string('layer_has_children')}: {', '.join(os.path.basename(h) for h in hijos)}")
+        if es_capa_base(ruta_entorno):
+            desmarcar_capa_base(ruta_entorno)
+
+        nombre_entorno = os.path.basename(ruta_entorno)
+        base_path = os.path.dirname(ruta_entorno)
+        subprocess.run(['rm', '-rf', ruta_entorno], check=True)
+        self.capas_entornos.pop(ruta_entorno, None)
+
+        if os.path.exists(ARCHIVO_REGISTRO):
+            line_to_remove = f"{nombre_entorno}|{base_path}\n"
+            
+            with open(ARCHIVO_REGISTRO, "r") as log_file:
+                lineas = log_file.readlines()
+            
+            with open(ARCHIVO_REGISTRO, "w") as log_file:
+                for linea in lineas:
+                    if linea.strip() != line_to_remove.strip(): 
+                        log_file.write(linea)
+
+        self.cache_metadatos.invalidar(ruta_entorno)
+        self.planificador_metadatos.olvidar(ruta_entorno)
+        self.indice_paleta.quitar_entorno(ruta_entorno)
+        self.registro_uso.olvidar(ruta_entorno)
+        cache_verificacion = CacheVerificacion(ARCHIVO_CACHE_VERIFICACION)
+        cache_verificacion.olvidar_entorno(ruta_entorno)
+        cache_verificacion.guardar()
+        if self.origenes_entornos.pop(ruta_entorno, None):
+            escribir_json_atomico(ARCHIVO_ORIGENES_ENTORNOS, self.origenes_entornos)
 
     def abrir_directorio_entorno(self):
         item_actual = self.lista_entornos.currentItem()
@@ -1441,47 +8130,116 @@ class CreadorEntornos(QMainWindow):
                 
             ruta_entorno = item_actual.data(Qt.UserRole)
 
-            terminal_seleccionada = self.seleccionar_terminal()
+            # Ruta rápida: se abre directamente la última terminal; con Mayús se muestra el selector
+            terminal_seleccionada = None
+            if not (QApplication.keyboardModifiers() & Qt.ShiftModifier):
+                terminal_seleccionada = self.obtener_terminal_recordada()
+            if not terminal_seleccionada:
+                terminal_seleccionada = self.seleccionar_terminal()
+
             if terminal_seleccionada:
-                temp_script_path = "/tmp/activate_venv.sh"
-                
-                # Crear script de activación
-                with open(temp_script_path, 'w') as temp_script:
-                    temp_script.write("#!/bin/bash\n")
-                    temp_script.write(f"source \"{ruta_entorno}/bin/activate\"\n") 
-                    temp_script.write(f"echo \"Entorno virtual activado: {nombre_entorno}\"\n")
-                    temp_script.write(f"echo \"Directorio: {ruta_entorno}\"\n")
-                    temp_script.write(f"echo \"\"\n")
-                    temp_script.write("exec bash\n")
+                self.lanzar_terminal(terminal_seleccionada, ruta_entorno, nombre_entorno)
+                self.registro_uso.registrar(ruta_entorno)
+
+    def lanzar_terminal(self, terminal_seleccionada, ruta_entorno, nombre_entorno):
+        archivo_marca = os.path.join(tempfile.gettempdir(), f"venv-gui-terminal-{os.getpid()}-{time.monotonic_ns()}")
+
+        # Script de activación propio de cada apertura: dos lanzamientos seguidos no se pisan
+        # y otro usuario no puede sustituirlo. Se borra cuando aparece la marca.
+        descriptor, temp_script_path = tempfile.mkstemp(prefix='venv-gui-activar-', suffix='.sh')
+        with os.fdopen(descriptor, 'w') as temp_script:
+            temp_script.write("#!/bin/bash\n")
+            # Marca para medir cuánto tarda la terminal en mostrarse
+            temp_script.write(f": > \"{archivo_marca}\"\n")
+            temp_script.write(script_activacion_shell(ruta_entorno))
+            temp_script.write(f"echo \"Entorno virtual activado: {nombre_entorno}\"\n")
+            temp_script.write(f"echo \"Directorio: {ruta_entorno}\"\n")
+            temp_script.write(f"echo \"\"\n")
+            temp_script.write("exec bash\n")
+
+        os.chmod(temp_script_path, 0o700)
 
-                os.chmod(temp_script_path, 0o755)
+        try:
+            executable = terminal_seleccionada['ruta']
+            reutilizar = self.config.get('reutilizar_instancia_terminal', True)
+            inicio = time.time()
+            
+            if terminal_seleccionada['tipo'] == 'sistema':
+                if terminal_seleccionada['nombre'] == "Deepin Terminal":
+                    # SOLUCIÓN SIMPLE PARA DEEPIN TERMINAL (como en tu versión que funciona)
+                    subprocess.Popen([executable, '-e', temp_script_path])
+                    
+                elif terminal_seleccionada['nombre'] == "GNOME Terminal":
+                    # gnome-terminal delega en gnome-terminal-server si ya está en ejecución
+                    subprocess.Popen([executable, '--', '/bin/bash', '-i', '-c', temp_script_path])
 
-                try:
-                    executable = terminal_seleccionada['ruta']
+                elif terminal_seleccionada['nombre'] == "WezTerm" and reutilizar and self.lanzar_wezterm_existente(executable, temp_script_path):
+                    pass
                     
-                    if terminal_seleccionada['tipo'] == 'sistema':
-                        if terminal_seleccionada['nombre'] == "Deepin Terminal":
-                            # SOLUCIÓN SIMPLE PARA DEEPIN TERMINAL (como en tu versión que funciona)
-                            subprocess.Popen([executable, '-e', temp_script_path])
-                            
-                        elif terminal_seleccionada['nombre'] == "GNOME Terminal":
-                            subprocess.Popen([executable, '--', '/bin/bash', '-i', '-c', temp_script_path])
-                            
-                        else:
-                            # Para otras terminales, usar la lógica del template
-                            comando_template = terminal_seleccionada['comando']
-                            command_to_run = f"bash --init-file {temp_script_path}"
-                            comando_final = comando_template.format(command=command_to_run)
-                            args_list = shlex.split(comando_final, posix=True)
-                            full_command = [executable] + args_list
-                            subprocess.Popen(full_command)
-                            
-                    elif terminal_seleccionada['tipo'] == 'personalizado':
-                        custom_command = terminal_seleccionada['comando'].replace('{script}', temp_script_path)
-                        subprocess.Popen(['bash', '-c', custom_command])
-                        
-                except Exception as e:
-                    QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('terminal_error')}: {str(e)}")
+                else:
+                    # Para otras terminales, usar la lógica del template
+                    comando_template = terminal_seleccionada['comando']
+                    command_to_run = f"bash --init-file {temp_script_path}"
+                    comando_final = comando_template.format(command=command_to_run)
+                    args_list = shlex.split(comando_final, posix=True)
+                    if reutilizar:
+                        args_list = terminal_reutilizacion.get(terminal_seleccionada['nombre'], []) + args_list
+                    full_command = [executable] + args_list
+                    subprocess.Popen(full_command)
+                    
+            elif terminal_seleccionada['tipo'] == 'personalizado':
+                custom_command = terminal_seleccionada['comando'].replace('{script}', temp_script_path)
+                subprocess.Popen(['bash', '-c', custom_command])
+
+            self.medir_latencia_terminal(terminal_seleccionada['nombre'], archivo_marca, inicio, temp_script_path)
+                
+        except Exception as e:
+            os.remove(temp_script_path)
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('terminal_error')}: {str(e)}")
+
+    def lanzar_wezterm_existente(self, executable, temp_script_path):
+        """Abre una ventana en el proceso de WezTerm en ejecución. Devuelve False si no hay ninguno."""
+        try:
+            resultado = subprocess.run(
+                [executable, 'cli', 'spawn', '--new-window', '--', 'bash', '--init-file', temp_script_path],
+                capture_output=True, timeout=2
+            )
+            return resultado.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def medir_latencia_terminal(self, nombre_terminal, archivo_marca, inicio, script_activacion):
+        """Espera a que el script de activación cree la marca, registra la latencia de apertura y borra el script"""
+        self.mediciones_terminal[archivo_marca] = (
+            nombre_terminal, inicio, time.monotonic() + self.TIEMPO_MAXIMO_MEDICION, script_activacion
+        )
+        if not self.temporizador_mediciones.isActive():
+            self.temporizador_mediciones.start()
+
+    def revisar_mediciones_terminal(self):
+        ahora = time.monotonic()
+        for archivo_marca, (nombre_terminal, inicio, limite, script_activacion) in list(self.mediciones_terminal.items()):
+            if os.path.exists(archivo_marca):
+                latencia_ms = max(0.0, (os.stat(archivo_marca).st_mtime - inicio) * 1000.0)
+                os.remove(archivo_marca)
+                # bash ya ha leído el script al crear la marca
+                self.borrar_script_activacion(script_activacion)
+                del self.mediciones_terminal[archivo_marca]
+                latencias = self.config.setdefault('latencias_terminal', {})
+                latencias[nombre_terminal] = (latencias.get(nombre_terminal, []) + [round(latencia_ms, 1)])[-self.MAX_LATENCIAS_GUARDADAS:]
+                self.guardar_config()
+            elif ahora > limite:
+                self.borrar_script_activacion(script_activacion)
+                del self.mediciones_terminal[archivo_marca]
+        if not self.mediciones_terminal:
+            self.temporizador_mediciones.stop()
+
+    @staticmethod
+    def borrar_script_activacion(script_activacion):
+        try:
+            os.remove(script_activacion)
+        except OSError:
+            pass
 
     def buscar_entornos_existentes(self):
         """Permite al usuario seleccionar una carpeta para escanear y añadir entornos venv existentes."""
@@ -1539,6 +8297,296 @@ class CreadorEntornos(QMainWindow):
             self.get_string("added_new_envs") % len(found_new_envs)
         )
 
+    def cargar_origenes_entornos(self):
+        """Herramienta que gestiona cada entorno descubierto automáticamente {ruta: origen}"""
+        if os.path.exists(ARCHIVO_ORIGENES_ENTORNOS):
+            try:
+                with open(ARCHIVO_ORIGENES_ENTORNOS, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def descubrir_entornos_herramientas(self, forzar=False, interactivo=False):
+        """Lanza los adaptadores de descubrimiento en segundo plano"""
+        if self.tarea_descubrimiento and self.tarea_descubrimiento.isRunning():
+            return
+        self.tarea_descubrimiento = TareaSegundoPlano(
+            descubrir_entornos, self.config.get('raices_proyectos', [QDir.homePath()]),
+            ARCHIVO_CACHE_DESCUBRIMIENTO, forzar=forzar, parent=self
+        )
+        self.tarea_descubrimiento.terminado.connect(lambda encontrados: self.fusionar_entornos_descubiertos(encontrados, interactivo))
+        self.tarea_descubrimiento.fallo.connect(lambda e: print(f"Error en el descubrimiento de entornos: {e}"))
+        self.tarea_descubrimiento.start(QThread.LowPriority)
+
+    def fusionar_entornos_descubiertos(self, encontrados, interactivo=False):
+        """Añade al registro los entornos descubiertos que aún no estaban, anotando su origen"""
+        registrados = {os.path.realpath(ruta) for _nombre, ruta in self.obtener_entornos_registrados()}
+        nuevos = [ruta for ruta in encontrados if os.path.realpath(ruta) not in registrados]
+        if nuevos:
+            with open(ARCHIVO_REGISTRO, "a") as log_file:
+                for ruta in nuevos:
+                    log_file.write(f"{os.path.basename(ruta)}|{os.path.dirname(ruta)}\n")
+
+            # Solo se etiquetan los que añade el descubrimiento: los ya registrados pueden ser de la aplicación
+            # aunque vivan en una ubicación de otra herramienta (p.ej. ~/.virtualenvs)
+            for ruta in nuevos:
+                self.origenes_entornos[ruta] = encontrados[ruta]
+            escribir_json_atomico(ARCHIVO_ORIGENES_ENTORNOS, self.origenes_entornos)
+            self.cargar_entornos_desde_registro()
+        if interactivo:
+            QMessageBox.information(self, self.get_string("success"), self.get_string("discovered_envs") % len(nuevos))
+
+    def procesar_argumentos(self, argv):
+        """Atiende los argumentos de la línea de comandos o de otra instancia"""
+        args = analizar_argumentos(argv)
+
+        if args.servicio or args.sin_ventana:
+            self.activar_servicio_rpc(True)
+        if args.sin_ventana:
+            return
+
+        # Traer la ventana al frente
+        if self.isMinimized():
+            self.showNormal()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+        objetivo = args.abrir or args.ruta
+        if objetivo:
+            ruta_objetivo = os.path.abspath(os.path.expanduser(objetivo)) if os.sep in objetivo else None
+            for i in range(self.lista_entornos.count()):
+                item = self.lista_entornos.item(i)
+                ruta = item.data(Qt.UserRole)
+                if ruta == ruta_objetivo or os.path.basename(ruta) == objetivo:
+                    self.lista_entornos.setCurrentItem(item)
+                    self.lista_entornos.scrollToItem(item)
+                    break
+
+        if args.crear_desde:
+            directorio = os.path.abspath(os.path.expanduser(args.crear_desde))
+            self.entrada_nombre_entorno.setText(os.path.basename(directorio.rstrip(os.sep)))
+            self.entrada_nombre_entorno.setFocus()
+            self.entrada_nombre_entorno.selectAll()
+
+    def agregar_entorno_a_registro(self, nombre_entorno, base_dir):
+        """Añade un entorno al registro y refresca la lista"""
+        with open(ARCHIVO_REGISTRO, "a") as log_file:
+            log_file.write(f"{nombre_entorno}|{base_dir}\n")
+        self.cargar_entornos_desde_registro()
+
+    def reemplazar_en_registro(self, ruta_antigua, nombre_nuevo, base_nueva):
+        """Sustituye la entrada de un entorno en el registro escribiendo un temporal y renombrándolo"""
+        lineas = []
+        if os.path.exists(ARCHIVO_REGISTRO):
+            with open(ARCHIVO_REGISTRO, "r") as f:
+                lineas = f.readlines()
+
+        nuevas = []
+        for linea in lineas:
+            linea = linea.strip()
+            if not linea:
+                continue
+            nombre, _, base = linea.partition('|')
+            base = base or self.config.get('directorio_base_env', CONFIG_BASE_DIR)
+            if os.path.join(base, nombre) == ruta_antigua:
+                linea = f"{nombre_nuevo}|{base_nueva}"
+            nuevas.append(linea + "\n")
+
+        fd, ruta_temporal = tempfile.mkstemp(dir=os.path.dirname(ARCHIVO_REGISTRO))
+        with os.fdopen(fd, 'w') as f:
+            f.writelines(nuevas)
+        # mkstemp crea el archivo con 0600; se conservan los permisos del registro original
+        if os.path.exists(ARCHIVO_REGISTRO):
+            shutil.copymode(ARCHIVO_REGISTRO, ruta_temporal)
+        os.replace(ruta_temporal, ARCHIVO_REGISTRO)
+
+    def reubicar_entorno_seleccionado(self):
+        item_actual = self.lista_entornos.currentItem()
+        if not item_actual:
+            return
+        ruta_entorno = item_actual.data(Qt.UserRole)
+        dialog = ReubicarEntornoDialog(self, ruta_entorno)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        destino = dialog.destino()
+        self.actualizar_capas_entornos()
+        hijos = self.hijos_de_capa(ruta_entorno)
+        _, error = self.ejecutar_con_progreso(self.get_string("relocate_env_title"), reubicar_entorno, ruta_entorno, destino)
+        if error:
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('relocate_error')}: {error}")
+            return
+
+        copiado = os.path.exists(ruta_entorno)
+        try:
+            self.reemplazar_en_registro(ruta_entorno, os.path.basename(destino), os.path.dirname(destino))
+        except OSError as e:
+            # Tras una copia entre dispositivos el origen sigue intacto: se descarta la copia
+            if copiado:
+                for site_packages in buscar_site_packages(destino):
+                    proteger_directorios(site_packages, False)
+                shutil.rmtree(destino, ignore_errors=True)
+                if es_capa_base(ruta_entorno):
+                    for site_packages in buscar_site_packages(ruta_entorno):
+                        proteger_directorios(site_packages, True)
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('relocate_error')}: {e}")
+            return
+        self.migrar_datos_entorno(ruta_entorno, destino)
+
+        # Los hijos de una capa base apuntan a sus site-packages: se enlazan con la nueva ubicación
+        for hijo in hijos:
+            try:
+                enlazar_con_capa_base(hijo, destino)
+            except OSError as e:
+                QMessageBox.warning(self, self.get_string("warning"), f"{self.get_string('relink_child_error')} {os.path.basename(hijo)}: {e}")
+        if copiado:
+            try:
+                shutil.rmtree(ruta_entorno)
+            except OSError as e:
+                QMessageBox.warning(self, self.get_string("warning"), f"{self.get_string('relocate_source_remove_error')} {ruta_entorno}: {e}")
+        self.cargar_entornos_desde_registro()
+        QMessageBox.information(self, self.get_string("success"), f"{self.get_string('relocate_done')}: {destino}")
+
+    def migrar_datos_entorno(self, ruta_antigua, ruta_nueva):
+        """Traslada el uso registrado, el origen y la caché de verificación a la nueva ruta"""
+        self.registro_uso.mover(ruta_antigua, ruta_nueva)
+        if ruta_antigua in self.origenes_entornos:
+            self.origenes_entornos[ruta_nueva] = self.origenes_entornos.pop(ruta_antigua)
+            escribir_json_atomico(ARCHIVO_ORIGENES_ENTORNOS, self.origenes_entornos)
+        cache_verificacion = CacheVerificacion(ARCHIVO_CACHE_VERIFICACION)
+        cache_verificacion.mover_entorno(ruta_antigua, ruta_nueva)
+        cache_verificacion.guardar()
+        self.cache_metadatos.invalidar(ruta_antigua)
+
+    def optimizar_entorno_seleccionado(self):
+        item_actual = self.lista_entornos.currentItem()
+        if not item_actual:
+            return
+        ruta_entorno = item_actual.data(Qt.UserRole)
+        dialog = OptimizarEntornoDialog(self, ruta_entorno)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        resultado, error = self.ejecutar_con_progreso(self.get_string("optimize_env_title"), optimizar_entorno, ruta_entorno, **dialog.opciones())
+        self.registro_uso.registrar_ejecucion_propia(ruta_entorno)
+        if error:
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('optimize_error')}: {error}")
+            return
+        self.cache_metadatos.invalidar(ruta_entorno)
+
+        lineas = [
+            f"{self.get_string('optimize_size')}: {formatear_tamaño(resultado['tamaño_antes'])} → {formatear_tamaño(resultado['tamaño_despues'])}",
+            f"{self.get_string('optimize_pyc_removed')}: {resultado['pyc_eliminados']}",
+        ]
+        if 'importacion_antes' in resultado:
+            antes, despues = resultado['importacion_antes'], resultado['importacion_despues']
+            if antes is None or despues is None:
+                lineas.append(f"{self.get_string('optimize_import_time')}: {self.get_string('measurement_unavailable')}")
+            else:
+                lineas.append(f"{self.get_string('optimize_import_time')}: {antes:.2f} s → {despues:.2f} s")
+        QMessageBox.information(self, self.get_string("optimize_done"), "\n".join(lineas))
+
+    def precompilar_en_segundo_plano(self, ruta_entorno):
+        """Precompila un entorno recién creado o importado sin bloquear la interfaz"""
+        if not self.config.get('precompilar_al_crear', True):
+            return
+        cancelar = threading.Event()
+        tarea = TareaSegundoPlano(optimizar_entorno, ruta_entorno, podar=False, medir=False, cancelar=cancelar, parent=self)
+        tarea.cancelar = cancelar
+        tarea.fallo.connect(lambda e: print(f"No se pudo precompilar {ruta_entorno}: {e}"))
+        tarea.finished.connect(lambda: self.registro_uso.registrar_ejecucion_propia(ruta_entorno))
+        tarea.finished.connect(tarea.deleteLater)
+        self.tareas_precompilacion.append(tarea)
+        tarea.finished.connect(lambda: self.tareas_precompilacion.remove(tarea))
+        tarea.start(QThread.LowPriority)
+
+    def ejecutar_con_progreso(self, titulo, funcion, *args, **kwargs):
+        """Ejecuta una tarea larga en segundo plano mostrando un diálogo de progreso.
+        Devuelve (resultado, error)."""
+        dialogo = QProgressDialog(titulo, None, 0, 100, self)
+        dialogo.setWindowTitle(titulo)
+        dialogo.setWindowModality(Qt.WindowModal)
+        dialogo.setMinimumDuration(0)
+        dialogo.setAutoClose(False)
+
+        salida = {'resultado': None, 'error': None}
+        tarea = TareaSegundoPlano(funcion, *args, parent=self, **kwargs)
+        tarea.progreso.connect(dialogo.setValue)
+        tarea.terminado.connect(lambda r: salida.update(resultado=r))
+        tarea.fallo.connect(lambda e: salida.update(error=e))
+        tarea.finished.connect(dialogo.accept)
+        tarea.start()
+        dialogo.exec()
+        tarea.wait()
+        return salida['resultado'], salida['error']
+
+    def exportar_entorno_seleccionado(self):
+        item_actual = self.lista_entornos.currentItem()
+        if not item_actual:
+            return
+        ruta_entorno = item_actual.data(Qt.UserRole)
+        dialog = ExportarEntornoDialog(self, ruta_entorno)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        ruta_archivo = dialog.input_ruta.text().strip()
+        _, error = self.ejecutar_con_progreso(
+            self.get_string("export_env_title"), exportar_entorno,
+            ruta_entorno, ruta_archivo, omitir_pycache=dialog.omitir_pycache_check.isChecked()
+        )
+        if error:
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('export_error')}: {error}")
+        else:
+            QMessageBox.information(self, self.get_string("success"), f"{self.get_string('export_done')}: {ruta_archivo}")
+
+    def importar_entorno_desde_archivo(self):
+        ruta_archivo, _ = QFileDialog.getOpenFileName(
+            self,
+            self.get_string("import_from_archive_button"),
+            QDir.homePath(),
+            "Entornos (*.tar.zst *.tar.xz)"
+        )
+        if not ruta_archivo:
+            return
+
+        try:
+            metadatos = leer_metadatos_exportacion(ruta_archivo)
+        except Exception as e:
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('import_error')}: {str(e)}")
+            return
+
+        nombre_sugerido = metadatos.get('nombre') or os.path.basename(ruta_archivo).split('.tar')[0]
+        nombre_entorno, ok = QInputDialog.getText(self, self.get_string("import_from_archive_button"), self.get_string("env_name_placeholder"), text=nombre_sugerido)
+        nombre_entorno = nombre_entorno.strip()
+        if not ok or not nombre_entorno:
+            return
+        if os.sep in nombre_entorno or '|' in nombre_entorno:
+            QMessageBox.warning(self, self.get_string("warning"), self.get_string("invalid_env_name"))
+            return
+
+        base_dir = self.config['directorio_base_env']
+        destino = os.path.join(base_dir, nombre_entorno)
+        if os.path.exists(destino):
+            QMessageBox.warning(self, self.get_string("warning"), f"{self.get_string('env_already_exists')}: {destino}")
+            return
+
+        metadatos, error = self.ejecutar_con_progreso(self.get_string("import_from_archive_button"), importar_entorno, ruta_archivo, destino)
+        if error:
+            QMessageBox.critical(self, self.get_string("error"), f"{self.get_string('import_error')}: {error}")
+            return
+
+        self.agregar_entorno_a_registro(nombre_entorno, base_dir)
+        mensaje = f"{self.get_string('import_done')}: {destino}"
+        python_path = os.path.join(destino, 'bin', 'python')
+        if not os.path.exists(python_path):
+            # bin/python es un enlace al intérprete base de la máquina de origen
+            mensaje += f"\n\n{self.get_string('import_missing_interpreter')} {metadatos.get('python_home') or ''}"
+        elif metadatos.get('omitir_pycache'):
+            self.precompilar_en_segundo_plano(destino)
+        QMessageBox.information(self, self.get_string("success"), mensaje)
+
     def mostrar_acerca_de(self):
         acerca_de_dialogo = QDialog(self)
         acerca_de_dialogo.setWindowTitle(self.get_string("about_title"))
@@ -1557,6 +8605,17 @@ class CreadorEntornos(QMainWindow):
 
 
 def main():
+    argumentos = sys.argv[1:]
+    args = analizar_argumentos(argumentos)
+    # Si ya hay una instancia en ejecución se le reenvían los argumentos y se sale sin iniciar Qt
+    if not args.nueva_instancia:
+        if InstanciaUnica.enviar_a_instancia_existente(argumentos):
+            sys.exit(0)
+
+    if args.sin_ventana:
+        # Demonio sin interfaz: no necesita servidor gráfico
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
     app = QApplication(sys.argv)
     
     if not os.path.exists(TRANSLATIONS_DIR):
@@ -1565,7 +8624,13 @@ def main():
     app.setStyleSheet(DARK_STYLE)
 
     window = CreadorEntornos()
-    window.show()
+    if not args.sin_ventana:
+        # El demonio no registra la instancia única: un lanzamiento normal abre su propia ventana
+        instancia_unica = InstanciaUnica(window)
+        instancia_unica.argumentos_recibidos.connect(window.procesar_argumentos)
+        instancia_unica.iniciar_servidor()
+        window.show()
+    window.procesar_argumentos(argumentos)
     sys.exit(app.exec())
 
 